@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Matrix ANSI Encoder
+Byte-sparende Kodierung geänderter Zellen: pro Sprung die kürzeste Cursor-
+Bewegung (absolut, relativ oder die Zeichen dazwischen neu schreiben) und pro
+Farbwechsel die kürzeste SGR-Sequenz; Farbprofile für mono, 16, 256 und
+Truecolor werden aus TERM/COLORTERM erkannt
+"""
+
+import os
+
+# Farbstufe -> (Intensität, Vordergrund) als SGR-Parameter; '' = Terminal-Standard.
+# Index 0 ist der Grundzustand nach einem Reset, 1 ist der Kopf des Tropfens.
+PROFILES = {
+    'mono': (
+        ('', ''),
+        ('1', ''), ('1', ''), ('', ''), ('', ''), ('2', ''), ('2', ''),
+    ),
+    '16': (
+        ('', ''),
+        ('1', '97'), ('1', '92'), ('', '92'), ('', '32'), ('2', '32'), ('2', '32'),
+    ),
+    '256': (
+        ('', ''),
+        ('1', '97'), ('1', '92'), ('', '92'), ('', '32'), ('', '38;5;28'), ('', '38;5;22'),
+    ),
+    'truecolor': (
+        ('', ''),
+        ('1', '38;2;255;255;255'), ('1', '38;2;140;255;140'), ('', '38;2;0;255;65'),
+        ('', '38;2;0;190;40'), ('', '38;2;0;135;20'), ('', '38;2;0;90;10'),
+    ),
+}
+
+UNKNOWN = len(PROFILES['mono'])  # SGR-Zustand des Terminals unbekannt (Frame-Anfang)
+STATUS_SHADE = 5                 # Farbstufe der Statuszeile
+
+
+def detect_profile(environ=None):
+    """Farbprofil aus NO_COLOR, COLORTERM und TERM"""
+    env = os.environ if environ is None else environ
+    if 'NO_COLOR' in env:
+        return 'mono'
+    if env.get('COLORTERM', '').lower() in ('truecolor', '24bit'):
+        return 'truecolor'
+    term = env.get('TERM', '').lower()
+    if not term:
+        # Windows-Konsole: kein TERM, Windows Terminal kann 24 Bit
+        return 'truecolor' if 'WT_SESSION' in env else '256'
+    if term == 'dumb' or term.startswith(('vt1', 'vt2')):
+        return 'mono'
+    if term.endswith('-direct'):
+        return 'truecolor'
+    if '256' in term:
+        return '256'
+    return '16'
+
+
+def sgr_transition(current, target):
+    """Kürzeste SGR-Sequenz von current nach target (current None = unbekannt)"""
+    intensity, foreground = target
+    params = [p for p in (intensity, foreground) if p]
+    best = '\033[0;' + ';'.join(params) + 'm' if params else '\033[m'
+    if current is None:
+        return best
+    if current == target:
+        return ''
+    # Nur die Unterschiede setzen; 22 nimmt Fett und Dunkel zurück
+    delta = []
+    if current[0] != intensity:
+        delta.extend(['22', intensity] if current[0] and intensity else [intensity or '22'])
+    if current[1] != foreground:
+        delta.append(foreground or '39')
+    sequence = '\033[' + ';'.join(delta) + 'm'
+    return sequence if len(sequence) < len(best) else best
+
+
+def cursor_position(x, y):
+    """Absolute Position (CUP), Standardwerte 1 werden weggelassen"""
+    if x:
+        return f'\033[{y + 1};{x + 1}H'
+    return f'\033[{y + 1}H' if y else '\033[H'
+
+
+class AnsiEncoder:
+    """Kodiert Zellen (y, x, code, color) mit minimalen Cursor- und SGR-Sequenzen"""
+
+    def __init__(self, profile='256'):
+        self.profile = profile
+        states = PROFILES[profile]
+        # transitions[von][nach], von = UNKNOWN: Zustand des Terminals unbekannt
+        self.transitions = [[sgr_transition(current, target) for target in states]
+                            for current in states + (None,)]
+        self.set_glyphs((' ',), b'\1')
+
+    def set_glyphs(self, glyphs, advance):
+        """Glyph-Tabelle und Cursor-Vorschub pro Code (doppelt breit: 2)"""
+        self.glyphs = glyphs
+        self.advance = advance
+        self.lengths = bytes(len(g.encode('utf-8')) for g in glyphs)
+
+    def encode(self, changes, width, screen=None, status=None):
+        """Text für sortierte Änderungen; screen (FrameBuffer mit dem neuen Bildinhalt)
+        erlaubt, kurze Lücken mit den dort stehenden Zeichen zu überschreiben,
+        status = (Zeile, Text) hängt die Statuszeile an"""
+        glyphs, advance, transitions = self.glyphs, self.advance, self.transitions
+        output = []
+        append = output.append
+        cursor_x = cursor_y = -1
+        state = UNKNOWN
+        for y, x, code, color in changes:
+            if x != cursor_x or y != cursor_y:
+                # Nach der letzten Spalte steht der Cursor je nach Terminal anders
+                if cursor_x < 0 or cursor_x >= width:
+                    append(cursor_position(x, y))
+                else:
+                    append(self.move(cursor_x, cursor_y, x, y, state, screen))
+            if code and color != state:
+                append(transitions[state][color])
+                state = color
+            append(glyphs[code])
+            cursor_x, cursor_y = x + advance[code], y
+        if status is not None:
+            row, text = status
+            append(cursor_position(0, row) if cursor_x < 0 or cursor_x >= width
+                   else self.move(cursor_x, cursor_y, 0, row, state, None))
+            append('\033[2K')
+            append(transitions[state][STATUS_SHADE])
+            append(text)
+            append(transitions[STATUS_SHADE][0])
+        return ''.join(output)
+
+    def move(self, cursor_x, cursor_y, x, y, state, screen):
+        """Kürzeste Bewegung von (cursor_x, cursor_y) nach (x, y)"""
+        dy = y - cursor_y
+        if dy == 0:
+            if x > cursor_x:
+                return self.forward(cursor_x, x, y, state, screen)  # nie länger als CUP
+            if cursor_x - x < 4:
+                return '\b' * (cursor_x - x)
+        best = cursor_position(x, y)
+        if dy == 0:
+            candidates = (f'\033[{cursor_x - x}D', '\r' + self.forward(0, x, y, state, screen))
+        elif dy > 0:
+            candidates = ('\033[B' if dy == 1 else f'\033[{dy}B',) if x == cursor_x else ()
+            if 1 + dy < len(best):
+                # CR LF: Zeilenanfang weiter unten (nie über die letzte Zeile, also kein Scrollen)
+                candidates += ('\r' + '\n' * dy + self.forward(0, x, y, state, screen),)
+        elif x == cursor_x:
+            candidates = ('\033[A' if dy == -1 else f'\033[{-dy}A',)
+        else:
+            return best
+        for candidate in candidates:
+            if len(candidate) < len(best):
+                best = candidate
+        return best
+
+    def forward(self, start, x, y, state, screen):
+        """Cursor in Zeile y von start nach x: CUF oder die Zeichen dazwischen"""
+        distance = x - start
+        if distance <= 1:
+            if distance <= 0:
+                return ''
+            sequence = '\033[C'
+        else:
+            sequence = f'\033[{distance}C'
+        if screen is None or distance > 3:  # Mehr als 3 Zeichen sind nie kürzer als CUF
+            return sequence
+        # Leere Zellen als Leerzeichen (ohne Farbe sichtbar gleich), sonst nur
+        # schmale Zeichen, die schon in der aktuellen Farbe dastehen
+        glyphs, advance, lengths = self.glyphs, self.advance, self.lengths
+        n_glyphs = len(glyphs)
+        front_glyph, front_color = screen.front_glyph, screen.front_color
+        offset = y * screen.width
+        cost = 0
+        text = []
+        for i in range(offset + start, offset + x):
+            code = front_glyph[i]
+            if code == 0:
+                cost += 1
+                text.append(' ')
+            elif code < n_glyphs and front_color[i] == state and advance[code] == 1:
+                cost += lengths[code]
+                text.append(glyphs[code])
+            else:
+                return sequence
+        return ''.join(text) if cost < len(sequence) else sequence
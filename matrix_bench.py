@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Matrix Benchmark
+Headless-Benchmark für beide Rain-Engines - ohne TTY, ohne Sleeps,
+mit festem Seed und maschinenlesbarer JSON-Ausgabe
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import matrix_random
+import matrix_rain_win
+
+try:
+    import matrix_rain
+except ImportError:  # Kein curses (z.B. Windows)
+    matrix_rain = None
+
+
+DEFAULT_SIZES = ((80, 24), (160, 48), (300, 90), (500, 150), (1000, 300))
+
+
+class CountingSink:
+    """Null-Ausgabe für stdout, zählt nur Bytes und Schreibaufrufe"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.bytes = 0
+        self.writes = 0
+
+    def write(self, text):
+        self.bytes += len(text.encode('utf-8'))
+        self.writes += 1
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class FakeScreen(CountingSink):
+    """Ersatz für curses stdscr, zählt addstr-Aufrufe und Bytes"""
+
+    def __init__(self, width, height):
+        super().__init__()
+        self.width = width
+        self.height = height
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def addstr(self, y, x, text, attr=0):
+        self.write(text)
+
+    def getch(self):
+        return -1
+
+    def erase(self):
+        pass
+
+    def noutrefresh(self):
+        pass
+
+    def timeout(self, delay):
+        pass
+
+
+class HeadlessAnsiRain(matrix_rain_win.MatrixRain):
+    """ANSI-Engine mit fester Größe statt echter Terminal-Abfrage"""
+
+    def __init__(self, width, height):
+        self.size = (width, height)
+        super().__init__(colors='256')  # Festes Profil, unabhängig vom TERM der Messung
+
+    def setup_terminal(self):
+        self.width = self.size[0]
+        self.height = self.size[1] - 1  # Eine Zeile für Status
+
+
+if matrix_rain is not None:
+    class HeadlessCursesRain(matrix_rain.MatrixRain):
+        """Curses-Engine auf einem FakeScreen ohne initscr()"""
+
+        def setup_curses(self):
+            self.attrs = tuple(range(7))
+
+        def present(self):
+            self.stdscr.noutrefresh()
+
+
+def build_ansi(width, height, seek=0):
+    """Erzeugt die ANSI-Engine samt Phasen und Ausgabe-Zähler"""
+    sink = CountingSink()
+    rain = HeadlessAnsiRain(width, height)
+    rain.field.advance(seek)
+
+    def draw():
+        stdout = sys.stdout
+        sys.stdout = sink
+        try:
+            rain.draw_frame()
+        finally:
+            sys.stdout = stdout
+
+    return [('update', rain.update_drops), ('draw', draw)], sink
+
+
+def build_curses(width, height, seek=0):
+    """Erzeugt die curses-Engine samt Phasen und Ausgabe-Zähler"""
+    screen = FakeScreen(width, height)
+    rain = HeadlessCursesRain(screen)
+    rain.field.advance(seek)
+    rain.reset_frame()
+    return [('update', rain.update_drops), ('draw', rain.draw_frame),
+            ('refresh', rain.present)], screen
+
+
+ENGINES = {'ansi': build_ansi}
+if matrix_rain is not None:
+    ENGINES['curses'] = build_curses
+
+
+def run_case(engine, width, height, frames, warmup, seed, seek=0):
+    """Misst eine Engine bei einer Terminal-Größe (ab Simulations-Tick seek)"""
+    matrix_random.seed(seed)
+    phases, sink = ENGINES[engine](width, height, seek)
+    for _ in range(warmup):
+        for _, func in phases:
+            func()
+
+    sink.reset()
+    totals = [0.0] * len(phases)
+    clock = time.perf_counter
+    start = clock()
+    for _ in range(frames):
+        for i, (_, func) in enumerate(phases):
+            t = clock()
+            func()
+            totals[i] += clock() - t
+    elapsed = clock() - start
+
+    return {
+        'engine': engine,
+        'width': width,
+        'height': height,
+        'frames': frames,
+        'fps': round(frames / elapsed, 2) if elapsed else None,
+        'frame_ms': round(elapsed * 1000 / frames, 4),
+        'phases_ms': {name: round(total * 1000 / frames, 4)
+                      for (name, _), total in zip(phases, totals)},
+        'bytes_per_frame': round(sink.bytes / frames, 1),
+        'writes_per_frame': round(sink.writes / frames, 2),
+    }
+
+
+def measure_peak_memory(engine, width, height, frames, warmup, seed, seek=0):
+    """Spitzen-Speicher (KiB) für Aufbau und Lauf einer Engine"""
+    matrix_random.seed(seed)
+    tracemalloc.start()
+    try:
+        phases, _ = ENGINES[engine](width, height, seek)
+        for _ in range(warmup + frames):
+            for _, func in phases:
+                func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def compare(results, baseline, tolerance):
+    """Vergleicht mit einer früheren Ergebnisdatei, gibt Regressionen zurück"""
+    previous = {(r['engine'], r['width'], r['height']): r
+                for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        old = previous.get((result['engine'], result['width'], result['height']))
+        if old is None:
+            continue
+        if old.get('fps') and result['fps'] < old['fps'] * (1 - tolerance):
+            regressions.append((result, 'fps', old['fps'], result['fps']))
+        if result['bytes_per_frame'] > old['bytes_per_frame'] * (1 + tolerance):
+            regressions.append((result, 'bytes_per_frame',
+                                old['bytes_per_frame'], result['bytes_per_frame']))
+    return regressions
+
+
+def parse_sizes(text):
+    """Parst '80x24,300x90' zu [(80, 24), (300, 90)]"""
+    sizes = []
+    for item in text.split(','):
+        width, height = item.lower().split('x')
+        sizes.append((int(width), int(height)))
+    return sizes
+
+
+def main():
+    """Main Entry Point"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--engines', default=','.join(ENGINES),
+                        help='Kommagetrennte Engines (ansi, curses)')
+    parser.add_argument('--sizes', type=parse_sizes,
+                        default=list(DEFAULT_SIZES),
+                        help='Terminal-Größen, z.B. 80x24,300x90')
+    parser.add_argument('--frames', type=int, default=200,
+                        help='Gemessene Frames pro Lauf')
+    parser.add_argument('--warmup', type=int, default=100,
+                        help='Frames vor der Messung (Caches und Ausgabe-Zustand)')
+    parser.add_argument('--seed', type=int, default=1999)
+    parser.add_argument('--seek', type=int, default=0, metavar='TICKS',
+                        help='Simulation vor dem Start in geschlossener Form vorspulen')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Speichermessung (tracemalloc) überspringen')
+    parser.add_argument('--output', help='JSON-Datei statt stdout')
+    parser.add_argument('--baseline', help='Frühere JSON-Ergebnisse zum Vergleich')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Erlaubte Verschlechterung gegenüber Baseline')
+    args = parser.parse_args()
+
+    results = []
+    for engine in args.engines.split(','):
+        if engine not in ENGINES:
+            parser.error(f"Engine nicht verfügbar: {engine}")
+        for width, height in args.sizes:
+            result = run_case(engine, width, height, args.frames, args.warmup, args.seed,
+                              args.seek)
+            if not args.no_memory:
+                result['peak_kib'] = measure_peak_memory(
+                    engine, width, height, min(args.frames, 20), args.warmup, args.seed,
+                    args.seek)
+            results.append(result)
+            print(f"{engine:7} {width}x{height}: {result['fps']} FPS, "
+                  f"{result['bytes_per_frame']} B/Frame", file=sys.stderr)
+
+    report = {
+        'version': 1,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'seek': args.seek,
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for result, metric, old, new in regressions:
+            print(f"REGRESSION {result['engine']} {result['width']}x{result['height']} "
+                  f"{metric}: {old} -> {new}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
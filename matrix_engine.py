@@ -0,0 +1,558 @@
+#!/usr/bin/env python3
+"""
+Matrix Rain Engine
+Gemeinsamer Simulationskern für matrix_rain.py und matrix_rain_win.py
+"""
+
+import math
+import time
+from array import array
+from collections import deque
+
+import matrix_random
+
+
+class RainField:
+    """Tropfen-Zustand als parallele Arrays (ein Eintrag pro Spalte)"""
+
+    def __init__(self, width, height, chars, speed=(0.2, 1.0), length=(8, 25),
+                 trail=35, respawn=(-30, -5), flicker=0.03, flicker_skip=2, pool=None,
+                 warm=True):
+        self.width = width
+        self.height = height
+        # Code 0 = leere Zelle, Code n = chars[n - 1]
+        self.glyphs = (' ',) + tuple(chars)
+        self.speed_range = speed
+        self.length_range = length
+        self.trail = trail
+        self.respawn_range = respawn
+        self.flicker = flicker
+        self.flicker_skip = flicker_skip  # Die neuesten n Zeichen flackern nicht
+        # Zufallswerte blockweise aus dem (per matrix_random.seed setzbaren) Pool
+        self.pool = pool or matrix_random.pool
+        self.flicker_threshold = round(flicker * 0x10000)  # Vergleich mit 16-Bit-Werten
+        self.visible = trail  # Sichtbare Spurlänge (<= trail), vom Governor verkürzbar
+        self.stride = 1       # Nur jede stride-te Spalte startet neue Tropfen
+        self.parked = []      # Spalten, die wegen stride pausieren
+
+        # Ein Tropfen bewegt sich alle ceil(1 / speed) Frames um eine Zeile
+        self.wheel_size = math.ceil(1.0 / speed[0]) + 1
+        self.warm = warm  # Start (und neue Spalten) im eingeschwungenen Zustand statt leer
+        self.init_drops()
+
+    def init_drops(self):
+        """Initialisiere fallende Zeichen-Tropfen"""
+        width = self.width
+        self.tick = 0
+        self.head = array('i', bytes(4 * width))
+        self.speed = array('d', bytes(8 * width))
+        self.period = array('B', bytes(width))
+        self.length = array('B', bytes(width))
+        self.count = array('B', bytes(width))  # Aktuelle Länge der Spur
+        # Glyph-Codes der Spur, pro Spalte ein Ringpuffer über y % trail
+        self.codes = bytearray(width * self.trail)
+        self.wheel = [[] for _ in range(self.wheel_size)]
+        self.spare = []
+
+        self.dirty = bytearray(width)
+        self.dirty_columns = []
+
+        if self.warm:
+            self.settle(range(width))
+        else:
+            for x in range(width):
+                self.spawn(x, self.pool.randint(-self.height, 0))
+
+    def spawn(self, x, y):
+        """Setzt Spalte x auf einen neuen Tropfen ab Zeile y"""
+        speed = self.pool.uniform(*self.speed_range)
+        period = max(1, math.ceil(1.0 / speed))
+        self.head[x] = y
+        self.speed[x] = speed
+        self.period[x] = period
+        self.length[x] = self.pool.randint(*self.length_range)
+        self.count[x] = 0
+        self.wheel[(self.tick + period) % self.wheel_size].append(x)
+
+    def step(self):
+        """Simuliert einen Frame - nur fällige Spalten werden angefasst"""
+        self.tick += 1
+        slot = self.tick % self.wheel_size
+        due = self.wheel[slot]
+        if not due:
+            return
+        self.wheel[slot] = self.spare
+
+        head, count, codes = self.head, self.count, self.codes
+        dirty, dirty_columns = self.dirty, self.dirty_columns
+        trail, visible, limit = self.trail, self.visible, self.height
+        threshold, skip = self.flicker_threshold, self.flicker_skip
+        # Pro Spalte ein neuer Code, ein Ersatzcode und ein 16-Bit-Wurf fürs Flackern
+        pool, n_glyphs, n_due = self.pool, len(self.glyphs) - 1, len(due)
+        fresh = pool.codes(n_glyphs, 2 * n_due)
+
+        for x, code, spare, roll in zip(due, fresh, fresh[n_due:], pool.words(n_due)):
+            y = head[x] + 1
+            head[x] = y
+            n = count[x]
+            if n < visible:
+                n += 1
+                count[x] = n
+            elif n > visible:  # Spur wurde verkürzt
+                n = visible
+                count[x] = n
+
+            # Neues Zeichen am Kopf
+            base = x * trail
+            codes[base + y % trail] = code
+
+            # Manchmal Zeichen ändern (Flackern); roll < threshold ist gleichverteilt
+            # und liefert damit auch das Alter des Zeichens
+            if n > skip and roll < threshold:
+                age = skip + roll * (n - skip) // threshold
+                codes[base + (y - age) % trail] = spare
+
+            if not dirty[x]:
+                dirty[x] = 1
+                dirty_columns.append(x)
+
+            # Reset wenn komplett durch (ausgedünnte Spalten pausieren stattdessen)
+            if y > limit + self.length[x]:
+                if x % self.stride:
+                    count[x] = 0
+                    self.parked.append(x)
+                else:
+                    self.spawn(x, self.pool.randint(*self.respawn_range))
+            else:
+                self.wheel[(self.tick + self.period[x]) % self.wheel_size].append(x)
+
+        due.clear()
+        self.spare = due
+
+    def resize(self, width, height):
+        """Passt die Spaltenzahl an; bestehende Tropfen bleiben erhalten"""
+        old = self.width
+        self.width = width
+        self.height = height  # Ringpuffer hängt nicht von der Höhe ab
+        if width < old:
+            for values in (self.head, self.speed, self.period, self.length, self.count, self.dirty):
+                del values[width:]
+            del self.codes[width * self.trail:]
+            for slot in self.wheel:
+                slot[:] = [x for x in slot if x < width]
+            self.dirty_columns = [x for x in self.dirty_columns if x < width]
+            self.parked = [x for x in self.parked if x < width]
+        elif width > old:
+            added = width - old
+            for values in (self.head, self.speed, self.period, self.length, self.count):
+                values.extend(array(values.typecode, bytes(values.itemsize * added)))
+            self.codes.extend(bytes(added * self.trail))
+            self.dirty.extend(bytes(added))
+            if self.warm:
+                self.settle(range(old, width))
+            else:
+                for x in range(old, width):
+                    self.spawn(x, self.pool.randint(-height, 0))
+
+    def lifetime(self, period, length, y):
+        """Schritte eines Tropfens ab Zeile y bis zum Respawn (und deren Dauer in Ticks)"""
+        steps = self.height + length + 1 - y
+        return steps, steps * period
+
+    def settle(self, columns):
+        """Setzt Spalten auf einen zufälligen Zustand aus dem Dauerbetrieb: ein Tropfen
+        wird mit Wahrscheinlichkeit proportional zu seiner Lebensdauer gewählt, darin
+        eine gleichverteilte Phase (Erneuerungsprozess, O(1) pro Spalte)"""
+        pool, trail, visible = self.pool, self.trail, self.visible
+        n_glyphs = len(self.glyphs) - 1
+        low, high = self.respawn_range
+        longest = self.lifetime(math.ceil(1.0 / self.speed_range[0]), self.length_range[1], low)[1]
+        for x in columns:
+            if x % self.stride:
+                self.count[x] = 0
+                self.parked.append(x)
+                continue
+            while True:
+                speed = pool.uniform(*self.speed_range)
+                period = max(1, math.ceil(1.0 / speed))
+                length = pool.randint(*self.length_range)
+                y = pool.randint(low, high)
+                _, duration = self.lifetime(period, length, y)
+                if pool.random() * longest < duration:
+                    break
+            phase = pool.randint(0, duration - 1)  # Ticks seit dem Spawn
+            done = phase // period
+            self.head[x] = y + done
+            self.speed[x] = speed
+            self.period[x] = period
+            self.length[x] = length
+            self.count[x] = min(visible, done)
+            self.codes[x * trail:(x + 1) * trail] = pool.codes(n_glyphs, trail)
+            self.wheel[(self.tick + period - phase % period) % self.wheel_size].append(x)
+        self.touch_all()
+
+    def advance(self, ticks):
+        """Spult die Simulation um ticks Schritte vor, pro Spalte in geschlossener Form:
+        ganze Tropfen-Leben werden übersprungen, nach mehr als zwei maximalen
+        Lebensdauern wird direkt der eingeschwungene Zustand gezogen"""
+        if ticks <= 0:
+            return
+        tick, size = self.tick, self.wheel_size
+        end = tick + ticks
+        # Nächster fälliger Tick jeder Spalte aus dem Timing-Wheel
+        due = {}
+        for slot, columns in enumerate(self.wheel):
+            for x in columns:
+                due[x] = tick + (slot - tick - 1) % size + 1
+        self.wheel = [[] for _ in range(size)]
+        self.tick = end
+
+        pool, trail, visible = self.pool, self.trail, self.visible
+        head, count, codes = self.head, self.count, self.codes
+        n_glyphs = len(self.glyphs) - 1
+        longest = self.lifetime(math.ceil(1.0 / self.speed_range[0]), self.length_range[1],
+                                self.respawn_range[0])[1]
+        unsettled = []
+        for x, t in due.items():
+            period, y, n = self.period[x], head[x], count[x]
+            while True:
+                steps, _ = self.lifetime(period, self.length[x], y)
+                finish = t + (steps - 1) * period  # Tick des letzten Schritts
+                if finish > end:
+                    k = (end - t) // period + 1 if t <= end else 0
+                    break
+                if x % self.stride:
+                    k = -1
+                    count[x] = 0
+                    self.parked.append(x)
+                    break
+                if end - finish > 2 * longest:
+                    k = -1
+                    unsettled.append(x)  # Vorgeschichte vergessen: Dauerbetrieb ziehen
+                    break
+                # Respawn im Tick finish, danach erster Schritt eine Periode später
+                self.speed[x] = speed = pool.uniform(*self.speed_range)
+                self.period[x] = period = max(1, math.ceil(1.0 / speed))
+                self.length[x] = pool.randint(*self.length_range)
+                y, n = pool.randint(*self.respawn_range), 0
+                t = finish + period
+            if k < 0:
+                continue
+            y += k
+            n = min(visible, n + k)
+            head[x], count[x] = y, n
+            # Die k neuesten Zeichen sind neu (Flackern dazwischen ist ebenso zufällig)
+            fresh = pool.codes(n_glyphs, min(k, trail))
+            base = x * trail
+            for i, code in enumerate(fresh):
+                codes[base + (y - i) % trail] = code
+            self.wheel[(t + k * period) % size].append(x)
+        if unsettled:
+            self.settle(unsettled)
+        self.touch_all()
+
+    def set_quality(self, flicker=True, trail=1.0, stride=1):
+        """Stellschrauben des Governors: Flackern an/aus, Anteil der sichtbaren Spur,
+        nur jede stride-te Spalte aktiv (laufende Tropfen fallen zu Ende)"""
+        self.flicker_threshold = round(self.flicker * 0x10000) if flicker else 0
+        self.visible = max(1, min(self.trail, round(self.trail * trail)))
+        self.stride = stride
+        if self.parked:
+            # Wieder freigegebene Spalten starten neue Tropfen
+            resume = [x for x in self.parked if x % stride == 0]
+            self.parked = [x for x in self.parked if x % stride]
+            for x in resume:
+                self.spawn(x, self.pool.randint(*self.respawn_range))
+
+    def take_dirty(self):
+        """Gibt die seit dem letzten Aufruf veränderten Spalten zurück"""
+        columns = self.dirty_columns
+        for x in columns:
+            self.dirty[x] = 0
+        self.dirty_columns = []
+        return columns
+
+    def touch_all(self):
+        """Markiert alle Spalten als verändert (z.B. nach Bildschirm-Reset)"""
+        self.dirty[:] = b'\x01' * self.width
+        self.dirty_columns = list(range(self.width))
+
+    def column(self, x):
+        """Liefert (y, code, position) für die Spur von Spalte x, älteste zuerst"""
+        n = self.count[x]
+        top = self.head[x] - n + 1
+        base = x * self.trail
+        codes, trail = self.codes, self.trail
+        for i in range(n):
+            y = top + i
+            yield y, codes[base + y % trail], i
+
+
+class FrameBuffer:
+    """Doppelt gepufferter Frame aus Glyph- und Farbebene (bytearray)"""
+
+    def __init__(self, width, height, shade, trail):
+        self.width = width
+        self.height = height
+        size = width * height
+        # Soll-Zustand und aktuell auf dem Terminal sichtbarer Zustand
+        self.glyph = bytearray(size)
+        self.color = bytearray(size)
+        self.front_glyph = bytearray(size)
+        self.front_color = bytearray(size)
+        # Sichtbarer Zeilenbereich pro Spalte im letzten Frame
+        self.top = array('i', [0]) * width
+        self.bottom = array('i', [-1]) * width
+        self.trail = trail
+        self.blank = memoryview(bytes(max(height, trail)))
+        # Farbstufe pro Position, vorberechnet für jede Spurlänge
+        self.full_ramps = [bytes(shade(i, n) for i in range(n)) for n in range(trail + 1)]
+        self.ramps = self.full_ramps
+
+    def resize(self, width, height):
+        """Ändert die Größe in-place; der Inhalt im überlappenden Bereich bleibt gültig"""
+        old_width, old_height = self.width, self.height
+        rows, columns = min(height, old_height), min(width, old_width)
+        planes = []
+        for plane in (self.glyph, self.color, self.front_glyph, self.front_color):
+            resized = bytearray(width * height)
+            for y in range(rows):
+                resized[y * width:y * width + columns] = \
+                    plane[y * old_width:y * old_width + columns]
+            planes.append(resized)
+        self.glyph, self.color, self.front_glyph, self.front_color = planes
+
+        # Sichtbare Bereiche: neue Spalten leer, alte auf die neue Höhe gekürzt
+        del self.top[width:]
+        del self.bottom[width:]
+        if width > old_width:
+            self.top.extend(array('i', [0]) * (width - old_width))
+            self.bottom.extend(array('i', [-1]) * (width - old_width))
+        for x in range(columns):
+            if self.bottom[x] >= height:
+                self.bottom[x] = height - 1
+                if self.top[x] > self.bottom[x]:
+                    self.top[x], self.bottom[x] = 0, -1
+        self.width, self.height = width, height
+        self.blank = memoryview(bytes(max(height, self.trail)))
+
+    def set_palette(self, palette):
+        """Bildet Farbstufen über eine 256-Byte-Tabelle ab (weniger Stufen = weniger
+        Umfärbungen pro Frame); None = volle Palette"""
+        self.ramps = (self.full_ramps if palette is None
+                      else [ramp.translate(palette) for ramp in self.full_ramps])
+
+    def invalidate_row(self, y):
+        """Erzwingt das Neuzeichnen belegter Zellen einer Zeile (z.B. alte Statuszeile)"""
+        if 0 <= y < self.height:
+            self.front_glyph[y * self.width:(y + 1) * self.width] = b'\xff' * self.width
+
+    def update(self, field, columns):
+        """Überträgt Spalten aus field, liefert geänderte Zellen (y, x, code, color)"""
+        width, height = self.width, self.height
+        glyph, color = self.glyph, self.color
+        front_glyph, front_color = self.front_glyph, self.front_color
+        tops, bottoms, blank, ramps = self.top, self.bottom, self.blank, self.ramps
+        head, count, codes, trail = field.head, field.count, field.codes, field.trail
+        changes = []
+
+        for x in columns:
+            if x >= width:
+                continue
+
+            # Alten Bereich der Spalte in-place leeren
+            old_top, old_bottom = tops[x], bottoms[x]
+            if old_top <= old_bottom:
+                cells = slice(old_top * width + x, old_bottom * width + x + 1, width)
+                glyph[cells] = color[cells] = blank[:old_bottom - old_top + 1]
+
+            # Sichtbaren Teil der Spur eintragen
+            n = count[x]
+            first = head[x] - n + 1
+            top, bottom = max(first, 0), min(head[x], height - 1)
+            if top <= bottom:
+                k = bottom - top + 1
+                start = x * trail + top % trail
+                end = x * trail + trail
+                if start + k <= end:
+                    segment = codes[start:start + k]
+                else:
+                    segment = codes[start:end] + codes[x * trail:x * trail + start + k - end]
+                cells = slice(top * width + x, bottom * width + x + 1, width)
+                glyph[cells] = segment
+                color[cells] = ramps[n][top - first:bottom - first + 1]
+            tops[x], bottoms[x] = top, bottom
+
+            # Nur die Vereinigung beider Bereiche vergleichen
+            if old_top > old_bottom:
+                lo, hi = top, bottom
+            elif top > bottom:
+                lo, hi = old_top, old_bottom
+            else:
+                lo, hi = min(top, old_top), max(bottom, old_bottom)
+            for i in range(lo * width + x, hi * width + x + 1, width):
+                g, c = glyph[i], color[i]
+                if g != front_glyph[i] or c != front_color[i]:
+                    front_glyph[i] = g
+                    front_color[i] = c
+                    changes.append((i // width, x, g, c))
+
+        return changes
+
+
+class FrameScheduler:
+    """Fester Simulationstakt mit eigenem Render-Takt, driftfrei über perf_counter"""
+
+    def __init__(self, tick_rate, render_rate=None, max_catchup=0.25):
+        self.target_tps = tick_rate
+        self.target_fps = render_rate or tick_rate
+        self.tick_interval = 1.0 / self.target_tps
+        self.render_interval = 1.0 / self.target_fps
+        self.max_catchup = max_catchup  # Maximal nachzuholende Simulationszeit (s)
+        self.reset()
+
+    def reset(self):
+        """Startet die Zeitrechnung neu (z.B. nach Intro oder Pause)"""
+        now = time.perf_counter()
+        self.sim_time = now      # Bis hierhin ist simuliert
+        self.next_render = now   # Nächster Render-Termin
+        self.ticks = 0
+        self.frames = 0
+        self.skipped = 0         # Ausgelassene Render-Termine
+        self.fps = 0.0           # Erreichte Raten (gleitend, ca. 1 s)
+        self.tps = 0.0
+        self.window_start = now
+        self.window_ticks = 0
+        self.window_frames = 0
+
+    def delay(self):
+        """Sekunden bis zum nächsten Render-Termin (zum Warten in einer eigenen Event-Loop)"""
+        return max(0.0, self.next_render - time.perf_counter())
+
+    def wait(self):
+        """Schläft bis zum nächsten Render-Termin, gibt die fälligen Ticks zurück"""
+        delay = self.delay()
+        if delay > 0:
+            time.sleep(delay)
+        return self.advance()
+
+    def advance(self):
+        """Bucht den aktuellen Render-Termin, gibt die fälligen Ticks zurück"""
+        now = time.perf_counter()
+
+        # Vom Termin aus weiterplanen (kein Drift), verpasste Termine überspringen
+        self.next_render += self.render_interval
+        if self.next_render <= now:
+            missed = int((now - self.next_render) / self.render_interval) + 1
+            self.next_render += missed * self.render_interval
+            self.skipped += missed
+
+        # Simulation holt bis jetzt auf, nach langen Hängern nur begrenzt
+        if now - self.sim_time > self.max_catchup:
+            self.sim_time = now - self.max_catchup
+        ticks = int((now - self.sim_time) / self.tick_interval)
+        self.sim_time += ticks * self.tick_interval
+
+        self.ticks += ticks
+        self.frames += 1
+        self.window_ticks += ticks
+        self.window_frames += 1
+        elapsed = now - self.window_start
+        if elapsed >= 1.0:
+            self.fps = self.window_frames / elapsed
+            self.tps = self.window_ticks / elapsed
+            self.window_start = now
+            self.window_ticks = self.window_frames = 0
+        return ticks
+
+
+def palette(mapping):
+    """256-Byte-Tabelle für FrameBuffer.set_palette aus {Stufe: neue Stufe}"""
+    return bytes(mapping.get(i, i) for i in range(256))
+
+
+# Qualitätsstufen vom vollen Effekt (0) bis zur stärksten Entlastung. Weniger
+# Farbstufen sparen die meisten Umfärbungen (Bytes), kürzere Spuren Aufbauzeit;
+# ausgedünnte Spalten pausieren erst, wenn ihr Tropfen durchgelaufen ist.
+REDUCED = palette({3: 4, 5: 6})
+MINIMAL = palette({2: 4, 3: 4, 5: 4, 6: 4})  # Nur Kopf und Spur
+QUALITY_LEVELS = (
+    {'flicker': True, 'palette': None, 'trail': 1.0, 'stride': 1},
+    {'flicker': False, 'palette': None, 'trail': 1.0, 'stride': 1},
+    {'flicker': False, 'palette': REDUCED, 'trail': 1.0, 'stride': 1},
+    {'flicker': False, 'palette': REDUCED, 'trail': 0.6, 'stride': 1},
+    {'flicker': False, 'palette': MINIMAL, 'trail': 0.6, 'stride': 1},
+    {'flicker': False, 'palette': MINIMAL, 'trail': 0.5, 'stride': 2},
+    {'flicker': False, 'palette': MINIMAL, 'trail': 0.4, 'stride': 3},
+)
+
+
+def apply_quality(field, frame, level):
+    """Überträgt eine Stufe aus QUALITY_LEVELS auf Feld und FrameBuffer"""
+    settings = QUALITY_LEVELS[level]
+    field.set_quality(settings['flicker'], settings['trail'], settings['stride'])
+    frame.set_palette(settings['palette'])
+
+
+class QualityGovernor:
+    """Senkt die Qualität stufenweise, solange Frames das Zeitbudget reißen, und hebt
+    sie erst nach längerer Entlastung wieder an (Hysterese gegen Pendeln)"""
+
+    def __init__(self, budget, window=30, degrade=0.9, restore=0.5, hold=3.0):
+        self.budget = budget        # Sekunden Arbeitszeit pro Frame (Render-Intervall)
+        self.window = window        # Frames pro Entscheidung
+        self.degrade = degrade      # Last (Anteil am Budget), ab der ein Frame zu langsam ist
+        self.restore = restore      # Mittlere Last, unter der wieder angehoben werden darf
+        self.hold_frames = max(window, round(hold / budget))
+        self.hold = self.hold_frames  # Frames mit Luft vor dem Anheben, wächst bei Pendeln
+        self.level = 0
+        self.samples = deque(maxlen=window)
+        self.cooldown = window      # Nach jeder Änderung erst wieder neu messen
+        self.calm = 0
+        self.since_restore = None   # Frames seit dem letzten Anheben
+        self.changes = 0
+
+    def observe(self, busy, stalled=False):
+        """Nimmt die Arbeitszeit eines Frames auf (stalled: Ausgabe hat ihn verworfen),
+        gibt die Stufe zurück"""
+        load = busy / self.budget
+        self.samples.append(max(load, 1.0) if stalled else load)
+        if self.since_restore is not None:
+            self.since_restore += 1
+        if self.cooldown:
+            self.cooldown -= 1
+            return self.level
+
+        samples = self.samples
+        slow = sum(1 for value in samples if value > self.degrade)
+        if slow * 4 > len(samples):
+            if self.level < len(QUALITY_LEVELS) - 1:
+                # Kurz nach dem Anheben wieder überlastet: länger warten (bis 8x)
+                if self.since_restore is not None and self.since_restore < 2 * self.hold:
+                    self.hold = min(self.hold * 2, 8 * self.hold_frames)
+                self.change(self.level + 1)
+            self.calm = 0
+        elif sum(samples) / len(samples) < self.restore:
+            self.calm += 1
+            if self.calm >= self.hold and self.level > 0:
+                self.change(self.level - 1)
+                self.since_restore = 0
+        else:
+            self.calm = 0
+        return self.level
+
+    def change(self, level):
+        self.level = level
+        self.changes += 1
+        self.samples.clear()
+        self.cooldown = self.window
+        self.calm = 0
+
+    def hud(self):
+        """Kurzform für die HUD-Zeile"""
+        return f"Q{self.level}"
+
+    def report(self):
+        """Kennzahlen als dict (für JSON)"""
+        return {'level': self.level, 'changes': self.changes,
+                'hold_s': round(self.hold * self.budget, 2)}
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Matrix Firehose
+Headless-Modus des Monitors: die simulierten Operationen als strukturierte
+Datensätze (JSONL oder CSV) für Last-Tests von Log-Ingest-Pipelines -
+blockweise erzeugt, mit Zielrate oder ungebremst, verteilt auf mehrere Prozesse
+"""
+
+import argparse
+import ipaddress
+import signal
+import sys
+import time
+from datetime import datetime, timezone
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import wait
+
+from matrix_monitor import MatrixMonitor
+from matrix_random import RandomPool
+
+CHUNK = 2048  # Datensätze pro Block (und pro Schreibaufruf)
+TS = '@ts@'   # Platzhalter für den Zeitstempel in den Zeilen-Vorlagen
+
+# Operation -> Felder (Name, Typ: 's' Text, 'd' Ganzzahl) in Tupel-Reihenfolge
+FIELDS = {
+    'network_scan': (('ip', 's'), ('port', 'd'), ('status', 's')),
+    'process_monitoring': (('pid', 'd'), ('cpu', 'd'), ('mem', 'd')),
+    'firewall_log': (('ip', 's'), ('action', 's')),
+    'file_integrity': (('file', 's'), ('sha256', 's'), ('status', 's')),
+    'connection_analysis': (('local_ip', 's'), ('local_port', 'd'),
+                            ('ip', 's'), ('port', 'd'), ('status', 's')),
+    'encryption_status': (('algorithm', 's'), ('status', 's')),
+    'authentication_log': (('user', 's'), ('ip', 's'), ('status', 's')),
+    'bandwidth_monitor': (('down_mbs', 'd'), ('up_mbs', 'd'), ('latency_ms', 'd')),
+    'intrusion_detection': (('ip', 's'), ('status', 's')),
+    'database_query': (('rows', 'd'), ('query_ms', 'd')),
+    'system_resources': (('cpu', 'd'), ('mem', 'd'), ('disk_io', 'd'), ('network', 'd')),
+    'certificate_check': (('domain', 's'), ('days', 'd')),
+    'packet_analysis': (('proto', 's'), ('size', 'd'), ('ip', 's')),
+    'backup_status': (('hours_ago', 'd'), ('size_gb', 'd'), ('status', 's')),
+    'security_score': (('score', 'd'),),
+}
+
+# CSV: gemeinsame Spalten; die Felder jeder Operation kommen darin in Tupel-Reihenfolge vor
+COLUMNS = ('ts', 'op', 'user', 'proto', 'size', 'local_ip', 'local_port', 'ip', 'port',
+           'action', 'pid', 'cpu', 'mem', 'disk_io', 'network', 'down_mbs', 'up_mbs',
+           'latency_ms', 'file', 'sha256', 'algorithm', 'domain', 'days', 'rows', 'query_ms',
+           'hours_ago', 'size_gb', 'score', 'status')
+
+
+def picks(pool, options, n):
+    """n gleichverteilte Elemente aus options (bis 255 Einträge)"""
+    table = (None,) + tuple(options)
+    return [table[c] for c in pool.codes(len(options), n)]
+
+
+class Firehose:
+    """Erzeugt Datensätze der Monitor-Operationen blockweise als fertigen Text"""
+
+    def __init__(self, pool=None, fmt='jsonl', operations=None, subnets=None, port_ranges=None):
+        self.pool = pool or RandomPool()
+        self.fmt = fmt
+        self.operations = tuple(operations or FIELDS)
+        self.subnets = subnets          # [(CIDR, Gewicht), ...] für entfernte Adressen
+        self.port_ranges = port_ranges  # [((von, bis), Gewicht), ...] für Ports
+        # Mischung wie im Monitor: Gewicht aus SCHEDULE
+        self.weights = [MatrixMonitor.SCHEDULE[name][1] for name in self.operations]
+        self.templates = [self.template(name) for name in self.operations]
+
+    def template(self, name):
+        """%-Vorlage einer Zeile; der Zeitstempel wird pro Block eingesetzt"""
+        fields = FIELDS[name]
+        if self.fmt == 'csv':
+            positions = [COLUMNS.index(field) for field, _ in fields]
+            if positions != sorted(positions):
+                raise ValueError(f"Feldreihenfolge von {name} passt nicht zu COLUMNS")
+            slots = dict.fromkeys(COLUMNS, '')
+            slots['ts'], slots['op'] = TS, name
+            for field, kind in fields:
+                slots[field] = '%' + kind
+            return ','.join(slots.values()) + '\n'
+        # Werte stammen aus festen Vorräten und Zahlen - kein Escaping nötig
+        parts = [f'{{"ts":"{TS}","op":"{name}"']
+        for field, kind in fields:
+            parts.append(f',"{field}":"%s"' if kind == 's' else f',"{field}":%d')
+        return ''.join(parts) + '}\n'
+
+    def header(self):
+        """Kopfzeile (nur CSV)"""
+        return ','.join(COLUMNS) + '\n' if self.fmt == 'csv' else ''
+
+    def records(self, n):
+        """n Datensätze als Liste von (Operation, Tupel)"""
+        counts, order = self.pool.allocate(self.weights, n)
+        batches = [iter(getattr(self, name)(count)) if count else None
+                   for name, count in zip(self.operations, counts)]
+        return [(i, next(batches[i])) for i in order]
+
+    def chunk(self, n):
+        """n Datensätze als ein kodierter Block"""
+        ts = datetime.now(timezone.utc).isoformat(timespec='microseconds')
+        templates = [t.replace(TS, ts) for t in self.templates]
+        return ''.join([templates[i] % record for i, record in self.records(n)]).encode()
+
+    def ips(self, n):
+        return self.pool.ipv4_many(n, self.subnets)
+
+    def ports(self, n):
+        return self.pool.ports(n, self.port_ranges)
+
+    # Operationen: je n Tupel passend zu FIELDS
+
+    def network_scan(self, n):
+        pool = self.pool
+        return list(zip(self.ips(n), self.ports(n),
+                        picks(pool, ("OPEN",) * 7 + ("FILTERED",) * 3, n)))
+
+    def process_monitoring(self, n):
+        pool = self.pool
+        return list(zip(pool.pids(n), pool.integers(n, 0, 100), pool.integers(n, 0, 100)))
+
+    def firewall_log(self, n):
+        pool = self.pool
+        return list(zip(self.ips(n), picks(pool, ("ACCEPT", "DROP", "REJECT"), n)))
+
+    def file_integrity(self, n):
+        pool = self.pool
+        return list(zip(picks(pool, MatrixMonitor.FILES, n), pool.hashes(n), ("OK",) * n))
+
+    def connection_analysis(self, n):
+        pool = self.pool
+        local = ['192.168.1.%d' % octet for octet in pool.randbytes(n)]
+        return list(zip(local, self.ports(n), self.ips(n),
+                        self.ports(n), ("ESTABLISHED",) * n))
+
+    def encryption_status(self, n):
+        return list(zip(picks(self.pool, MatrixMonitor.ALGORITHMS, n), ("SECURE",) * n))
+
+    def authentication_log(self, n):
+        pool = self.pool
+        return list(zip(picks(pool, MatrixMonitor.USERS, n), self.ips(n),
+                        picks(pool, ("SUCCESS",) * 4 + ("FAILED",), n)))
+
+    def bandwidth_monitor(self, n):
+        pool = self.pool
+        return list(zip(pool.integers(n, 0, 1000), pool.integers(n, 0, 500), pool.integers(n, 0, 50)))
+
+    def intrusion_detection(self, n):
+        pool = self.pool
+        return [(ip if status == "ANOMALY" else "", status)
+                for ip, status in zip(self.ips(n), picks(pool, ("CLEAN",) * 4 + ("ANOMALY",), n))]
+
+    def database_query(self, n):
+        pool = self.pool
+        return list(zip(pool.integers(n, 0, 1000), pool.integers(n, 0, 999)))
+
+    def system_resources(self, n):
+        pool = self.pool
+        return list(zip(*(pool.integers(n, 0, 100) for _ in range(4))))
+
+    def certificate_check(self, n):
+        pool = self.pool
+        return list(zip(picks(pool, MatrixMonitor.DOMAINS, n), pool.integers(n, 30, 395)))
+
+    def packet_analysis(self, n):
+        pool = self.pool
+        return list(zip(picks(pool, MatrixMonitor.PROTOCOLS, n), pool.integers(n, 64, 1564),
+                        self.ips(n)))
+
+    def backup_status(self, n):
+        pool = self.pool
+        return list(zip(pool.integers(n, 0, 24), pool.integers(n, 0, 500), ("VERIFIED",) * n))
+
+    def security_score(self, n):
+        return [(score,) for score in self.pool.integers(n, 70, 100)]
+
+
+def produce(emit, options, rate, count, seed):
+    """Erzeugt Blöcke und übergibt sie an emit, gebremst auf rate Datensätze/s"""
+    firehose = Firehose(RandomPool(seed), **options)
+    # Bei niedriger Rate kleinere Blöcke, damit der Strom gleichmäßig bleibt
+    size = CHUNK if not rate else max(1, min(CHUNK, int(rate / 50)))
+    next_time = time.monotonic()
+    sent = 0
+    try:
+        while count is None or sent < count:
+            n = size if count is None else min(size, count - sent)
+            emit(firehose.chunk(n))
+            sent += n
+            if rate:
+                next_time += n / rate
+                delay = next_time - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_time -= delay / 2  # Rückstand nicht unbegrenzt aufholen
+    except KeyboardInterrupt:
+        pass
+    return sent
+
+
+def worker(conn, options, rate, count, seed):
+    """Erzeuger-Prozess: schickt fertige Blöcke an den Schreiber"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Beenden steuert der Hauptprozess
+    try:
+        produce(conn.send_bytes, options, rate, count, seed)
+    except (BrokenPipeError, EOFError):
+        pass
+    finally:
+        conn.close()
+
+
+def split(total, parts):
+    """Teilt total möglichst gleichmäßig auf parts auf"""
+    return [total // parts + (i < total % parts) for i in range(parts)]
+
+
+def run(output, fmt='jsonl', rate=None, count=None, workers=1, seed=None,
+        subnets=None, port_ranges=None):
+    """Schreibt den Strom nach output (Binär-Datei); liefert die Anzahl Datensätze"""
+    options = {'fmt': fmt, 'subnets': subnets, 'port_ranges': port_ranges}
+    output.write(Firehose(**options).header().encode())
+    if workers <= 1:
+        return produce(output.write, options, rate, count, seed)
+
+    # Mehrere Erzeuger, ein Schreiber: Zeilen verschiedener Prozesse vermischen sich nie
+    counts = split(count, workers) if count is not None else [None] * workers
+    connections, processes = [], []
+    for i in range(workers):
+        receiver, sender = Pipe(duplex=False)
+        process = Process(target=worker, daemon=True,
+                          args=(sender, options, rate / workers if rate else None, counts[i],
+                                None if seed is None else seed * 1000 + i))
+        process.start()
+        sender.close()
+        connections.append(receiver)
+        processes.append(process)
+
+    written = 0
+    try:
+        while connections:
+            for conn in wait(connections):
+                try:
+                    data = conn.recv_bytes()
+                except EOFError:
+                    connections.remove(conn)
+                    continue
+                output.write(data)
+                written += data.count(b'\n')
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+    return written
+
+
+def weighted(parse):
+    """argparse-Typ für WERT[:GEWICHT]"""
+    def convert(text):
+        value, _, weight = text.rpartition(':') if text.count(':') == 1 else (text, '', '1')
+        try:
+            parsed, weight = parse(value), int(weight)
+        except ValueError as error:
+            raise argparse.ArgumentTypeError(f"ungültig: {text} ({error})")
+        if weight < 1:
+            raise argparse.ArgumentTypeError(f"ungültig: {text} (Gewicht muss >= 1 sein)")
+        return parsed, weight
+    return convert
+
+
+def port_range(text):
+    """VON-BIS als Tupel"""
+    low, _, high = text.partition('-')
+    low, high = int(low), int(high or low)
+    if not 1 <= low <= high <= 65535:
+        raise ValueError("Ports 1..65535, VON <= BIS")
+    return low, high
+
+
+def main():
+    """Main Entry Point"""
+    parser = argparse.ArgumentParser(description="Matrix Firehose (strukturierte Monitor-Events)")
+    parser.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl')
+    parser.add_argument('--output', metavar='FILE', help='Zieldatei (Standard: stdout)')
+    parser.add_argument('--rate', type=float, help='Datensätze pro Sekunde (Standard: ungebremst)')
+    parser.add_argument('--count', type=int, help='Nach so vielen Datensätzen beenden')
+    parser.add_argument('--workers', type=int, default=1, help='Erzeuger-Prozesse')
+    parser.add_argument('--seed', type=int, help='Fester Seed für reproduzierbare Ströme')
+    parser.add_argument('--subnet', action='append', metavar='CIDR[:GEWICHT]',
+                        type=weighted(lambda net: str(ipaddress.IPv4Network(net, strict=False))),
+                        help='Adressen nur aus diesen Netzen (mehrfach, gewichtet, z.B. 10.0.0.0/8:3)')
+    parser.add_argument('--port-range', action='append', metavar='VON-BIS[:GEWICHT]',
+                        type=weighted(port_range),
+                        help='Ports nur aus diesen Bereichen (mehrfach, gewichtet, z.B. 1-1023:3)')
+    args = parser.parse_args()
+
+    output = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    start = time.perf_counter()
+    written = 0
+    try:
+        written = run(output, args.format, args.rate, args.count, args.workers, args.seed,
+                      args.subnet, args.port_range)
+        output.flush()
+    except BrokenPipeError:
+        sys.stderr.close()  # Leser (z.B. head) hat beendet
+        return
+    finally:
+        if args.output:
+            output.close()
+    if args.count is not None or args.output:
+        elapsed = time.perf_counter() - start
+        print(f"{written} Datensätze in {elapsed:.2f}s ({written / elapsed:,.0f}/s)",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
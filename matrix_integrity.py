@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Matrix Integrity Scanner
+SHA256-Prüfung echter Dateien und Verzeichnisbäume: große Dateien per mmap,
+parallel in einem Prozess-Pool, mit Cache über (Gerät, Inode, Größe, mtime_ns)
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+CHUNK_SIZE = 1 << 20          # Bytes pro hashlib.update bei mmap
+MMAP_THRESHOLD = 256 << 10    # Kleinere Dateien werden direkt gelesen
+POOL_THRESHOLD = 16           # Weniger geänderte Dateien: ohne Pool hashen
+
+
+def default_cache_path():
+    """Cache-Datei unter $XDG_CACHE_HOME bzw. ~/.cache"""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'matrix_monitor', 'integrity.json')
+
+
+def hash_file(path):
+    """SHA256 einer Datei als Hex-String, None bei Lesefehlern"""
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            digest = hashlib.sha256()
+            if size < MMAP_THRESHOLD:
+                digest.update(f.read())
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        for offset in range(0, size, CHUNK_SIZE):
+                            digest.update(view[offset:offset + CHUNK_SIZE])
+                    finally:
+                        view.release()
+            return digest.hexdigest()
+    except (OSError, ValueError):
+        return None
+
+
+def walk_files(paths):
+    """Liefert (Pfad, stat) aller regulären Dateien unter paths, ohne Symlinks"""
+    stack = list(paths)
+    while stack:
+        path = stack.pop()
+        try:
+            if not os.path.isdir(path):
+                yield path, os.stat(path)
+                continue
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.path, entry.stat(follow_symlinks=False)
+        except OSError:
+            continue
+
+
+class IntegrityScanner:
+    """Hasht konfigurierte Pfade; unveränderte Dateien kommen aus dem Cache"""
+
+    def __init__(self, paths, cache_path=None, workers=None):
+        self.paths = [os.path.abspath(p) for p in paths]
+        self.cache_path = cache_path or default_cache_path()
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = None
+        # Pfad -> [Gerät, Inode, Größe, mtime_ns, SHA256]; der Cache kann Einträge
+        # anderer Scans (andere Pfade, gleiche Cache-Datei) enthalten
+        self.files = self.load_cache()
+
+    def covers(self, path):
+        """True, wenn path zu einem der gescannten Pfade gehört"""
+        for root in self.paths:
+            if path == root or path.startswith(root if root.endswith(os.sep) else root + os.sep):
+                return True
+        return False
+
+    def load_cache(self):
+        """Lädt den Cache von der Platte (fehlend/defekt: leer)"""
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == 1:
+                return data['files']
+        except (OSError, ValueError, KeyError):
+            pass
+        return {}
+
+    def save_cache(self):
+        """Schreibt den Cache atomar (temporäre Datei + os.replace)"""
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'files': self.files}, f, separators=(',', ':'))
+        os.replace(tmp, self.cache_path)
+
+    def hash_many(self, paths):
+        """Hasht mehrere Dateien, ab POOL_THRESHOLD parallel im Prozess-Pool"""
+        if len(paths) < POOL_THRESHOLD or self.workers == 1:
+            return [hash_file(p) for p in paths]
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        chunksize = max(1, min(256, len(paths) // (self.workers * 4)))
+        return list(self.executor.map(hash_file, paths, chunksize=chunksize))
+
+    def scan(self):
+        """Prüft alle Dateien; liefert Zusammenfassung und Ergebnisse pro Datei
+
+        Status: OK (unverändert), NEW, CHANGED (anderer Hash), TOUCHED
+        (Metadaten geändert, Inhalt gleich), ERROR (nicht lesbar)
+        """
+        start = time.perf_counter()
+        old_files = self.files
+        # Umbenannte/verschobene Dateien über den Schlüssel wiederfinden
+        by_key = {tuple(v[:4]): v[4] for v in old_files.values()}
+
+        # Einträge außerhalb der gescannten Pfade bleiben unangetastet
+        files = {path: entry for path, entry in old_files.items() if not self.covers(path)}
+        results = []
+        pending = []
+        for path, st in walk_files(self.paths):
+            key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+            old = old_files.get(path)
+            digest = by_key.get(key)
+            if digest is not None:
+                files[path] = list(key) + [digest]
+                status = 'OK' if old is not None and old[4] == digest else 'NEW'
+                results.append((path, digest, status))
+            else:
+                pending.append((path, key, old))
+
+        for (path, key, old), digest in zip(pending, self.hash_many([p[0] for p in pending])):
+            if digest is None:
+                results.append((path, None, 'ERROR'))
+                continue
+            files[path] = list(key) + [digest]
+            if old is None:
+                status = 'NEW'
+            elif old[4] == digest:
+                status = 'TOUCHED'
+            else:
+                status = 'CHANGED'
+            results.append((path, digest, status))
+
+        self.files = files
+        removed = sum(1 for path in old_files if path not in files)
+        if pending or files.keys() != old_files.keys():
+            try:
+                self.save_cache()
+            except OSError:
+                pass  # Cache ist nur Beschleunigung
+
+        return {
+            'files': len(results),
+            'hashed': len(pending),
+            'cached': len(results) - len(pending),
+            'removed': removed,
+            'seconds': time.perf_counter() - start,
+            'results': results,
+        }
+
+    def close(self):
+        """Beendet den Prozess-Pool"""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+def main():
+    """Main Entry Point"""
+    parser = argparse.ArgumentParser(description="Matrix Integrity Scanner")
+    parser.add_argument('paths', nargs='+', help='Dateien oder Verzeichnisse')
+    parser.add_argument('--cache', help='Cache-Datei (Standard: ~/.cache/matrix_monitor)')
+    parser.add_argument('--workers', type=int, help='Prozesse zum Hashen')
+    parser.add_argument('--changes', action='store_true',
+                        help='Nur neue/geänderte/fehlerhafte Dateien ausgeben')
+    args = parser.parse_args()
+
+    scanner = IntegrityScanner(args.paths, args.cache, args.workers)
+    try:
+        summary = scanner.scan()
+    finally:
+        scanner.close()
+    for path, digest, status in summary['results']:
+        if not args.changes or status != 'OK':
+            print(f"{digest or '-' * 64}  {status:7}  {path}")
+    print(f"{summary['files']} Dateien, {summary['hashed']} gehasht, "
+          f"{summary['cached']} aus Cache, {summary['removed']} entfernt, "
+          f"{summary['seconds']:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
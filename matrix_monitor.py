@@ -4,12 +4,24 @@ Matrix-Style System Monitor
 Kontinuierliche Simulation von System-Operationen im Hacker-Style
 """
 
+import argparse
+import asyncio
+import os
 import random
-import time
+import re
+import shutil
+import socket
 import sys
-import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+import matrix_proc
+from matrix_integrity import IntegrityScanner
+from matrix_proc import ConnectionTable, ProcCollector, format_rate
+from matrix_random import pool
+from matrix_sinks import POLICIES, DatagramSink, EventPipeline, RotatingFileSink
+
 
 class Colors:
     """ANSI Farbcodes für Terminal-Ausgabe"""
@@ -22,49 +34,384 @@ class Colors:
     BOLD = '\033[1m'
 
 
+ANSI_PATTERN = re.compile(r'(\033\[[0-9;]*m)')
+
+
+def fit_ansi(text, width):
+    """Kürzt/füllt Text mit Farbcodes auf genau width sichtbare Zeichen"""
+    parts = []
+    visible = 0
+    pos = 0
+    for match in ANSI_PATTERN.finditer(text):
+        chunk = text[pos:match.start()][:width - visible]
+        parts.append(chunk)
+        visible += len(chunk)
+        parts.append(match.group())
+        pos = match.end()
+    chunk = text[pos:][:width - visible]
+    parts.append(chunk)
+    visible += len(chunk)
+    parts.append(Colors.NC + ' ' * (width - visible))
+    return ''.join(parts)
+
+
+def parse_sgr(state, params):
+    """Wendet SGR-Parameter auf einen Zustand (fett, Vordergrund) an"""
+    bold, fg = state
+    codes = params.split(';') if params else ['0']
+    i = 0
+    while i < len(codes):
+        code = codes[i]
+        if code in ('', '0'):
+            bold, fg = False, None
+        elif code == '1':
+            bold = True
+        elif code == '22':
+            bold = False
+        elif code == '38':
+            fg = ';'.join(codes[i:i + 3])  # 38;5;n
+            i += 2
+        elif code == '39':
+            fg = None
+        else:
+            fg = code
+        i += 1
+    return bold, fg
+
+
+class TerminalWriter:
+    """Gepufferte Terminal-Ausgabe: fasst Farbläufe zusammen, schreibt im Frame-Takt"""
+
+    DEFAULT = (False, None)
+
+    def __init__(self, stream=None, fps=30, max_pending=1 << 20):
+        self.stream = stream or sys.stdout
+        self.interval = 1.0 / fps
+        self.max_pending = max_pending  # Zeichen; älteste Ausgabe fällt zuerst weg
+        self.pending = deque()
+        self.starts = deque()           # SGR-Zustand, von dem jeder gepufferte Teil ausgeht
+        self.pending_size = 0
+        self.state = self.DEFAULT       # SGR-Zustand am Ende der gepufferten Ausgabe
+        self.wanted = self.DEFAULT      # Vom Text verlangter Zustand
+        self.transitions = {}
+        self.sgr_cache = {}
+        self.reveals = deque()          # Typing-Effekte: [Text, Farbe, Start, Delay, Pos, Future]
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.bytes = 0
+        self.writes = 0
+        self.dropped = 0
+
+    def transition(self, state, wanted):
+        """Kürzeste SGR-Sequenz von state nach wanted (gecacht)"""
+        key = (state, wanted)
+        sequence = self.transitions.get(key)
+        if sequence is None:
+            params = []
+            if (state[0] and not wanted[0]) or (state[1] and not wanted[1]):
+                params.append('0')
+                state = self.DEFAULT
+            if wanted[0] and not state[0]:
+                params.append('1')
+            if wanted[1] and wanted[1] != state[1]:
+                params.append(wanted[1])
+            sequence = f"\033[{';'.join(params)}m" if params else ''
+            self.transitions[key] = sequence
+        return sequence
+
+    def compress(self, text):
+        """Entfernt überflüssige Farbwechsel; Leerzeichen brauchen keine Farbe"""
+        out = []
+        state, wanted = self.state, self.wanted
+        for i, part in enumerate(ANSI_PATTERN.split(text)):
+            if i % 2:
+                key = (wanted, part)
+                after = self.sgr_cache.get(key)
+                if after is None:
+                    after = self.sgr_cache[key] = parse_sgr(wanted, part[2:-1])
+                wanted = after
+            elif part:
+                if wanted != state and not part.isspace():
+                    out.append(self.transition(state, wanted))
+                    state = wanted
+                out.append(part)
+        # Ein offener Wechsel wird erst beim nächsten sichtbaren Zeichen geschrieben
+        self.state, self.wanted = state, wanted
+        return ''.join(out)
+
+    def write(self, text):
+        """Puffert Text mit Farbcodes bis zum nächsten Frame"""
+        start = self.state
+        chunk = self.compress(text)
+        self.pending.append(chunk)
+        self.starts.append(start)
+        self.pending_size += len(chunk)
+        if self.pending_size > self.max_pending and len(self.pending) > 1:
+            while self.pending_size > self.max_pending and len(self.pending) > 1:
+                self.pending_size -= len(self.pending.popleft())
+                self.starts.popleft()
+                self.dropped += 1
+            # Der erste verbliebene Teil setzt Farben voraus, die nie geschrieben
+            # wurden: vom Reset aus auf seinen Ausgangszustand bringen
+            prefix = '\033[0m' + self.transition(self.DEFAULT, self.starts[0])
+            self.pending[0] = prefix + self.pending[0]
+            self.pending_size += len(prefix)
+
+    def reveal(self, text, color, delay):
+        """Typing-Effekt: Zeichen erscheinen zu geplanten Zeiten, ohne zu blockieren"""
+        loop = asyncio.get_event_loop()
+        done = loop.create_future()
+        self.reveals.append([text, color, loop.time(), delay, 0, done])
+        return done
+
+    def reveal_due(self, now):
+        """Schreibt alle Zeichen, deren Zeitpunkt erreicht ist"""
+        while self.reveals:
+            job = self.reveals[0]
+            text, color, start, delay, pos, done = job
+            end = len(text) if now is None else min(len(text), int((now - start) / delay) + 1)
+            if end > pos:
+                self.write(f"{color}{text[pos:end]}{Colors.NC}")
+                job[4] = end
+            if end < len(text):
+                break
+            self.reveals.popleft()
+            if not done.done():
+                done.set_result(None)
+
+    def take(self):
+        """Entnimmt die gesamte gepufferte Ausgabe als einen String"""
+        data = ''.join(self.pending)
+        self.pending.clear()
+        self.starts.clear()
+        self.pending_size = 0
+        return data
+
+    def emit(self, data):
+        """Ein Schreibvorgang ans Terminal (läuft im Executor-Thread)"""
+        self.stream.write(data)
+        self.stream.flush()
+        self.bytes += len(data.encode('utf-8'))
+        self.writes += 1
+
+    async def flush_loop(self):
+        """Schreibt im Frame-Takt; ein langsames Terminal bremst nur diesen Task"""
+        loop = asyncio.get_event_loop()
+        while True:
+            self.reveal_due(loop.time())
+            data = self.take()
+            if data:
+                await loop.run_in_executor(self.executor, self.emit, data)
+            await asyncio.sleep(self.interval)
+
+    def close(self):
+        """Restliche Ausgabe synchron schreiben und Farben zurücksetzen"""
+        self.executor.shutdown(wait=True)
+        self.reveal_due(None)
+        data = self.take() + self.transition(self.state, self.DEFAULT)
+        self.state = self.wanted = self.DEFAULT
+        if data:
+            self.emit(data)
+
+
+class StreamView:
+    """Fortlaufende Ausgabe, Zeilen mehrerer Worker verschränkt"""
+
+    def __init__(self, writer, workers):
+        self.writer = writer
+        self.workers = max(1, workers)
+        self.prefixed = self.workers > 1
+
+    def start(self):
+        pass
+
+    def line(self, slot, text):
+        if self.prefixed:
+            text = f"{Colors.GREEN}{slot + 1:>2}│{Colors.NC} {text}"
+        self.writer.write(text + "\n")
+
+    def done(self, slot):
+        if not self.prefixed:
+            self.writer.write("\n")
+
+    async def render_loop(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class PaneView:
+    """Bildschirm als Raster von Panes, ein Pane pro Worker"""
+
+    MIN_WIDTH = 64
+    MIN_HEIGHT = 8
+    FPS = 10
+
+    def __init__(self, writer, workers=0, size=None):
+        self.writer = writer
+        self.dropped = 0
+        # Feste Größe (Spalten, Zeilen) für Headless-Läufe, sonst die des Terminals
+        size = os.terminal_size(size or shutil.get_terminal_size())
+        columns = max(1, (size.columns + 1) // (self.MIN_WIDTH + 1))
+        rows = max(1, size.lines // self.MIN_HEIGHT)
+        if workers:
+            columns = min(columns, workers)
+            rows = -(-workers // columns)
+        self.workers = workers or columns * rows
+
+        width = (size.columns - (columns - 1)) // columns
+        height = size.lines // rows
+        # Pro Pane: (links, oben, Breite, Höhe)
+        self.panes = [((i % columns) * (width + 1), (i // columns) * height, width, height)
+                      for i in range(self.workers)]
+        self.lines = [deque(maxlen=height) for _ in self.panes]
+        self.dirty = set()
+
+    def start(self):
+        self.writer.write("\033[2J\033[?25l")
+
+    def line(self, slot, text):
+        self.lines[slot].append(text)
+        self.dirty.add(slot)
+
+    def done(self, slot):
+        pass
+
+    def render(self):
+        """Gibt alle geänderten Panes als einen Block an den Writer"""
+        if self.writer.dropped != self.dropped:
+            # Verworfene Ausgabe: alle Panes neu zeichnen
+            self.dropped = self.writer.dropped
+            self.dirty.update(range(self.workers))
+        output = []
+        for slot in self.dirty:
+            left, top, width, height = self.panes[slot]
+            lines = self.lines[slot]
+            for row in range(height):
+                text = lines[row] if row < len(lines) else ''
+                output.append(f"\033[{top + row + 1};{left + 1}H{fit_ansi(text, width)}")
+        self.dirty.clear()
+        if output:
+            self.writer.write(''.join(output))
+
+    async def render_loop(self):
+        while True:
+            self.render()
+            await asyncio.sleep(1.0 / self.FPS)
+
+    def close(self):
+        self.render()
+        self.writer.write(f"\033[{shutil.get_terminal_size().lines};1H\033[?25h")
+
+
 class MatrixMonitor:
     """Haupt-Klasse für Matrix-Style System Monitor"""
 
-    def __init__(self):
-        self.users = ["admin", "root", "operator", "sysmon", "netadmin"]
-        self.files = ["kernel.sys", "auth.conf", "network.db", "security.log", "crypto.key"]
-        self.algorithms = ["AES-256", "RSA-4096", "ChaCha20", "Twofish"]
-        self.protocols = ["TCP", "UDP", "ICMP"]
-        self.domains = ["secure.matrix.net", "auth.cyber.io", "api.quantum.dev"]
+    # Operation -> (Mindestabstand zwischen Starts in s, Gewicht, max. gleichzeitig)
+    SCHEDULE = {
+        'network_scan': (2.0, 3, 2),
+        'process_monitoring': (1.0, 3, 2),
+        'firewall_log': (1.0, 3, 2),
+        'file_integrity': (3.0, 2, 1),
+        'connection_analysis': (2.0, 2, 1),
+        'encryption_status': (5.0, 1, 1),
+        'authentication_log': (1.0, 3, 2),
+        'bandwidth_monitor': (2.0, 2, 1),
+        'intrusion_detection': (3.0, 2, 1),
+        'database_query': (2.0, 2, 1),
+        'system_resources': (2.0, 2, 1),
+        'certificate_check': (5.0, 1, 1),
+        'packet_analysis': (1.0, 3, 2),
+        'backup_status': (10.0, 1, 1),
+        'security_score': (10.0, 1, 1),
+    }
+
+    # Wertevorrat der simulierten Operationen (auch für matrix_firehose.py)
+    USERS = ("admin", "root", "operator", "sysmon", "netadmin")
+    FILES = ("kernel.sys", "auth.conf", "network.db", "security.log", "crypto.key")
+    ALGORITHMS = ("AES-256", "RSA-4096", "ChaCha20", "Twofish")
+    PROTOCOLS = ("TCP", "UDP", "ICMP")
+    DOMAINS = ("secure.matrix.net", "auth.cyber.io", "api.quantum.dev")
+
+    def __init__(self, workers=1, layout='stream', rate=None, source='auto',
+                 integrity_paths=None, integrity_cache=None, integrity_workers=None, sinks=()):
+        self.users = list(self.USERS)
+        self.files = list(self.FILES)
+        self.algorithms = list(self.ALGORITHMS)
+        self.protocols = list(self.PROTOCOLS)
+        self.domains = list(self.DOMAINS)
+
+        # Echte Werte aus /proc (Linux), sonst Zufallswerte
+        if source == 'proc' or (source == 'auto' and matrix_proc.available()):
+            self.collector = ProcCollector()
+            self.connections = ConnectionTable()
+        else:
+            self.collector = None
+            self.connections = None
+
+        # Echte SHA256-Prüfung konfigurierter Pfade, sonst Zufalls-Hashes
+        if integrity_paths:
+            self.integrity = IntegrityScanner(integrity_paths, integrity_cache,
+                                              integrity_workers)
+        else:
+            self.integrity = None
 
-    @staticmethod
-    def clear_screen():
+        self.writer = TerminalWriter()
+        if layout == 'panes':
+            self.view = PaneView(self.writer, workers)
+        else:
+            self.view = StreamView(self.writer, workers)
+        self.workers = self.view.workers
+        # Zusätzliche Ziele (Log-Datei, Collector-Socket) mit eigenen Threads
+        self.events = EventPipeline(sinks) if sinks else None
+        self.rate = rate  # Gestartete Operationen pro Sekunde (None = unbegrenzt)
+        # Pause nach jeder Operation; klassisch 1-3 s bei nur einem Worker
+        self.gap = (1.0, 3.0) if self.workers == 1 else (0.2, 1.0)
+        self.running = dict.fromkeys(self.SCHEDULE, 0)
+        self.last_start = {}
+        self.tasks = set()
+
+    def clear_screen(self):
         """Terminal löschen"""
-        print("\033[2J\033[H", end="")
+        self.writer.write("\033[2J\033[H")
+
+    def typing_effect(self, text, color, delay=0.01):
+        """Typing-Effekt für Text (Zeichen werden im Frame-Takt aufgedeckt)"""
+        return self.writer.reveal(text + "\n", color, delay)
 
     @staticmethod
-    def typing_effect(text, color, delay=0.01):
-        """Typing-Effekt für Text"""
-        for char in text:
-            print(f"{color}{char}{Colors.NC}", end="", flush=True)
-            time.sleep(delay)
-        print()
+    def header(tag, text):
+        """Kopfzeile einer Operation"""
+        return f"{Colors.BRIGHT_GREEN}[{tag}]{Colors.NC} {Colors.CYAN}{text}{Colors.NC}"
+
+    @staticmethod
+    def item(text):
+        """Eingerückte Detailzeile einer Operation"""
+        return f"  {Colors.GREEN}►{Colors.NC} {text}"
+
+    async def pause(self, seconds):
+        """Nicht-blockierende Pause innerhalb einer Operation"""
+        await asyncio.sleep(seconds)
 
     @staticmethod
     def random_ip():
         """Generiert zufällige IP-Adresse"""
-        return f"{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(0, 255)}"
+        return pool.ipv4()
 
     @staticmethod
     def random_port():
         """Generiert zufälligen Port"""
-        return random.randint(1, 65535)
+        return pool.randint(1, 65535)
 
     @staticmethod
     def random_pid():
         """Generiert zufällige Prozess-ID"""
-        return random.randint(1000, 9999)
+        return pool.randint(1000, 9999)
 
     @staticmethod
     def random_hash():
         """Generiert zufälligen Hash-Wert"""
-        random_data = str(random.random()).encode()
-        return hashlib.sha256(random_data).hexdigest()
+        return pool.hashes(1)[0]  # Hex direkt aus Zufallsbytes, ohne SHA256-Lauf
 
     def show_banner(self):
         """Zeigt Matrix-Banner"""
@@ -82,222 +429,380 @@ class MatrixMonitor:
 ║                                                               ║
 ╚═══════════════════════════════════════════════════════════════╝
 {Colors.NC}"""
-        print(banner)
+        self.writer.write(banner + "\n")
 
-    def initialize(self):
+    async def initialize(self):
         """Initialisierungs-Sequenz"""
-        self.typing_effect("[INIT] Starte Systemüberwachung...", Colors.CYAN)
-        time.sleep(0.5)
-        self.typing_effect("[INIT] Verbinde zu Netzwerk-Matrix...", Colors.CYAN)
-        time.sleep(0.5)
-        self.typing_effect("[INIT] Initialisiere Sicherheitsprotokolle...", Colors.CYAN)
-        time.sleep(0.5)
-        print(f"{Colors.GREEN}[OK] System bereit{Colors.NC}\n")
-        time.sleep(1)
-
-    def network_scan(self):
+        await self.typing_effect("[INIT] Starte Systemüberwachung...", Colors.CYAN)
+        await self.pause(0.5)
+        await self.typing_effect("[INIT] Verbinde zu Netzwerk-Matrix...", Colors.CYAN)
+        await self.pause(0.5)
+        await self.typing_effect("[INIT] Initialisiere Sicherheitsprotokolle...", Colors.CYAN)
+        await self.pause(0.5)
+        self.writer.write(f"{Colors.GREEN}[OK] System bereit{Colors.NC}\n\n")
+        await self.pause(1)
+
+    async def network_scan(self):
         """Simuliert Netzwerk-Scan"""
-        print(f"{Colors.BRIGHT_GREEN}[SCAN]{Colors.NC} {Colors.CYAN}Netzwerk-Scan gestartet...{Colors.NC}")
+        yield self.header("SCAN", "Netzwerk-Scan gestartet...")
         for _ in range(5):
             ip = self.random_ip()
             port = self.random_port()
             status = random.choice(["OPEN"] * 7 + ["FILTERED"] * 3)
             color = Colors.GREEN if status == "OPEN" else Colors.RED
-            print(f"  {Colors.GREEN}►{Colors.NC} Probing {ip}:{port} {color}[{status}]{Colors.NC}")
-            time.sleep(0.3)
-
-    def process_monitoring(self):
-        """Simuliert Prozess-Monitoring"""
-        print(f"{Colors.BRIGHT_GREEN}[PROC]{Colors.NC} {Colors.CYAN}Überwache aktive Prozesse...{Colors.NC}")
-        for _ in range(4):
-            pid = self.random_pid()
-            cpu = random.randint(0, 100)
-            mem = random.randint(0, 100)
-            print(f"  {Colors.GREEN}►{Colors.NC} PID: {pid} | CPU: {cpu}% | MEM: {mem}%")
-            time.sleep(0.2)
-
-    def firewall_log(self):
+            yield self.item(f"Probing {ip}:{port} {color}[{status}]{Colors.NC}")
+            await self.pause(0.3)
+
+    async def process_monitoring(self):
+        """Prozess-Monitoring (echte Top-Prozesse aus /proc oder simuliert)"""
+        yield self.header("PROC", "Überwache aktive Prozesse...")
+        if self.collector is not None:
+            processes = self.collector.top_processes(4)
+        else:
+            processes = [(self.random_pid(), None, random.randint(0, 100), random.randint(0, 100))
+                         for _ in range(4)]
+        for pid, name, cpu, mem in processes:
+            line = f"PID: {pid} | CPU: {cpu:.0f}% | MEM: {mem:.0f}%"
+            yield self.item(f"{line} | {name}" if name else line)
+            await self.pause(0.2)
+
+    async def firewall_log(self):
         """Simuliert Firewall-Log-Analyse"""
-        print(f"{Colors.BRIGHT_GREEN}[FWALL]{Colors.NC} {Colors.CYAN}Analysiere Firewall-Logs...{Colors.NC}")
+        yield self.header("FWALL", "Analysiere Firewall-Logs...")
         for _ in range(3):
             ip = self.random_ip()
             action = random.choice(["ACCEPT", "DROP", "REJECT"])
             color = Colors.GREEN if action == "ACCEPT" else Colors.RED
-            print(f"  {Colors.GREEN}►{Colors.NC} Packet from {ip} {color}[{action}]{Colors.NC}")
-            time.sleep(0.3)
-
-    def file_integrity(self):
-        """Simuliert Datei-Integritätsprüfung"""
-        print(f"{Colors.BRIGHT_GREEN}[HASH]{Colors.NC} {Colors.CYAN}Prüfe Datei-Integrität...{Colors.NC}")
-        file = random.choice(self.files)
-        hash_value = self.random_hash()
-        print(f"  {Colors.GREEN}►{Colors.NC} {file}")
-        print(f"  {Colors.GREEN}►{Colors.NC} SHA256: {hash_value} {Colors.GREEN}[OK]{Colors.NC}")
-        time.sleep(0.4)
-
-    def connection_analysis(self):
-        """Simuliert Verbindungsanalyse"""
-        print(f"{Colors.BRIGHT_GREEN}[CONN]{Colors.NC} {Colors.CYAN}Aktive Verbindungen analysieren...{Colors.NC}")
-        for _ in range(4):
-            local_ip = f"192.168.1.{random.randint(0, 255)}"
-            remote_ip = self.random_ip()
-            local_port = self.random_port()
-            remote_port = self.random_port()
-            print(f"  {Colors.GREEN}►{Colors.NC} {local_ip}:{local_port} ↔ {remote_ip}:{remote_port} {Colors.GREEN}[ESTABLISHED]{Colors.NC}")
-            time.sleep(0.25)
-
-    def encryption_status(self):
+            yield self.item(f"Packet from {ip} {color}[{action}]{Colors.NC}")
+            await self.pause(0.3)
+
+    async def file_integrity(self):
+        """Datei-Integritätsprüfung (echte Pfade mit Cache oder simuliert)"""
+        yield self.header("HASH", "Prüfe Datei-Integrität...")
+        if self.integrity is None:
+            file = random.choice(self.files)
+            hash_value = self.random_hash()
+            yield self.item(file)
+            yield self.item(f"SHA256: {hash_value} {Colors.GREEN}[OK]{Colors.NC}")
+            await self.pause(0.4)
+            return
+
+        loop = asyncio.get_event_loop()
+        summary = await loop.run_in_executor(None, self.integrity.scan)
+        yield self.item(f"{summary['files']} Dateien | {summary['hashed']} gehasht | "
+                        f"{summary['cached']} aus Cache | {summary['seconds']:.2f}s")
+        # Auffällige Dateien zuerst, sonst eine zufällige unveränderte
+        changed = [r for r in summary['results'] if r[2] != 'OK'][:3]
+        if not changed and summary['results']:
+            changed = [random.choice(summary['results'])]
+        for path, digest, status in changed:
+            color = Colors.GREEN if status in ('OK', 'TOUCHED') else \
+                Colors.RED if status == 'CHANGED' else Colors.YELLOW
+            yield self.item(path)
+            yield self.item(f"SHA256: {digest or '-' * 64} {color}[{status}]{Colors.NC}")
+            await self.pause(0.2)
+
+    async def connection_analysis(self):
+        """Verbindungsanalyse (neue/geschlossene/geänderte Sockets aus /proc oder simuliert)"""
+        yield self.header("CONN", "Aktive Verbindungen analysieren...")
+        if self.connections is None:
+            for _ in range(4):
+                local_ip = f"192.168.1.{random.randint(0, 255)}"
+                remote_ip = self.random_ip()
+                local_port = self.random_port()
+                remote_port = self.random_port()
+                yield self.item(f"{local_ip}:{local_port} ↔ {remote_ip}:{remote_port} {Colors.GREEN}[ESTABLISHED]{Colors.NC}")
+                await self.pause(0.25)
+            return
+
+        # Ein Durchlauf in kleinen Schritten, dazwischen laufen andere Operationen
+        while not self.connections.step():
+            await self.pause(0)
+        events = self.connections.take_events(4)
+        if not events:
+            sizes = self.connections.sizes
+            total = sum(sizes.values())
+            detail = " | ".join(f"{proto}: {n}" for proto, n in sizes.items())
+            yield self.item(f"{total} Sockets ({detail}) {Colors.GREEN}[KEINE ÄNDERUNG]{Colors.NC}")
+        for kind, proto, (local_ip, local_port), (remote_ip, remote_port), before, after in events:
+            if kind == 'NEW':
+                status = f"{Colors.GREEN}[{kind} {after}]{Colors.NC}"
+            elif kind == 'CLOSED':
+                status = f"{Colors.RED}[{kind} {before}]{Colors.NC}"
+            else:
+                status = f"{Colors.YELLOW}[{before} → {after}]{Colors.NC}"
+            yield self.item(f"{proto} {local_ip}:{local_port} ↔ {remote_ip}:{remote_port} {status}")
+            await self.pause(0.25)
+
+    async def encryption_status(self):
         """Simuliert Verschlüsselungsstatus"""
-        print(f"{Colors.BRIGHT_GREEN}[CRYPT]{Colors.NC} {Colors.CYAN}Verschlüsselungsstatus...{Colors.NC}")
+        yield self.header("CRYPT", "Verschlüsselungsstatus...")
         algo = random.choice(self.algorithms)
-        print(f"  {Colors.GREEN}►{Colors.NC} Algorithmus: {algo}")
-        print(f"  {Colors.GREEN}►{Colors.NC} Key Exchange: {Colors.GREEN}[SECURE]{Colors.NC}")
-        print(f"  {Colors.GREEN}►{Colors.NC} Cipher Strength: {Colors.GREEN}[MAXIMUM]{Colors.NC}")
-        time.sleep(0.5)
+        yield self.item(f"Algorithmus: {algo}")
+        yield self.item(f"Key Exchange: {Colors.GREEN}[SECURE]{Colors.NC}")
+        yield self.item(f"Cipher Strength: {Colors.GREEN}[MAXIMUM]{Colors.NC}")
+        await self.pause(0.5)
 
-    def authentication_log(self):
+    async def authentication_log(self):
         """Simuliert Authentifizierungs-Logs"""
-        print(f"{Colors.BRIGHT_GREEN}[AUTH]{Colors.NC} {Colors.CYAN}Überprüfe Authentifizierung...{Colors.NC}")
+        yield self.header("AUTH", "Überprüfe Authentifizierung...")
         user = random.choice(self.users)
         ip = self.random_ip()
         success = random.randint(0, 9) < 8
         if success:
-            print(f"  {Colors.GREEN}►{Colors.NC} Login: {user}@{ip} {Colors.GREEN}[SUCCESS]{Colors.NC}")
+            yield self.item(f"Login: {user}@{ip} {Colors.GREEN}[SUCCESS]{Colors.NC}")
+        else:
+            yield self.item(f"Login: {user}@{ip} {Colors.YELLOW}[FAILED - BLOCKED]{Colors.NC}")
+        await self.pause(0.4)
+
+    async def bandwidth_monitor(self):
+        """Bandbreiten-Monitoring (echte Raten aus /proc/net/dev oder simuliert)"""
+        yield self.header("BAND", "Netzwerk-Traffic-Analyse...")
+        if self.collector is not None:
+            rates = self.collector.system()
+            packets = rates['rx_packets'] + rates['tx_packets']
+            yield self.item(f"Download: {format_rate(rates['rx'])}")
+            yield self.item(f"Upload: {format_rate(rates['tx'])}")
+            yield self.item(f"Pakete: {packets:.0f}/s {Colors.GREEN}[OPTIMAL]{Colors.NC}")
         else:
-            print(f"  {Colors.GREEN}►{Colors.NC} Login: {user}@{ip} {Colors.YELLOW}[FAILED - BLOCKED]{Colors.NC}")
-        time.sleep(0.4)
-
-    def bandwidth_monitor(self):
-        """Simuliert Bandbreiten-Monitoring"""
-        print(f"{Colors.BRIGHT_GREEN}[BAND]{Colors.NC} {Colors.CYAN}Netzwerk-Traffic-Analyse...{Colors.NC}")
-        down = random.randint(0, 1000)
-        up = random.randint(0, 500)
-        latency = random.randint(0, 50)
-        print(f"  {Colors.GREEN}►{Colors.NC} Download: {down} MB/s")
-        print(f"  {Colors.GREEN}►{Colors.NC} Upload: {up} MB/s")
-        print(f"  {Colors.GREEN}►{Colors.NC} Latenz: {latency}ms {Colors.GREEN}[OPTIMAL]{Colors.NC}")
-        time.sleep(0.4)
-
-    def intrusion_detection(self):
+            down = random.randint(0, 1000)
+            up = random.randint(0, 500)
+            latency = random.randint(0, 50)
+            yield self.item(f"Download: {down} MB/s")
+            yield self.item(f"Upload: {up} MB/s")
+            yield self.item(f"Latenz: {latency}ms {Colors.GREEN}[OPTIMAL]{Colors.NC}")
+        await self.pause(0.4)
+
+    async def intrusion_detection(self):
         """Simuliert Intrusion Detection"""
-        print(f"{Colors.BRIGHT_GREEN}[IDS]{Colors.NC} {Colors.CYAN}Intrusion Detection Scan...{Colors.NC}")
+        yield self.header("IDS", "Intrusion Detection Scan...")
         threats = random.randint(0, 9) < 8
         if threats:
-            print(f"  {Colors.GREEN}►{Colors.NC} Status: {Colors.GREEN}[CLEAN]{Colors.NC}")
-            print(f"  {Colors.GREEN}►{Colors.NC} Bedrohungen: 0")
+            yield self.item(f"Status: {Colors.GREEN}[CLEAN]{Colors.NC}")
+            yield self.item("Bedrohungen: 0")
         else:
             ip = self.random_ip()
-            print(f"  {Colors.GREEN}►{Colors.NC} Status: {Colors.YELLOW}[ANOMALIE ERKANNT]{Colors.NC}")
-            print(f"  {Colors.GREEN}►{Colors.NC} Quelle: {ip} {Colors.YELLOW}[BLOCKED]{Colors.NC}")
-        time.sleep(0.5)
+            yield self.item(f"Status: {Colors.YELLOW}[ANOMALIE ERKANNT]{Colors.NC}")
+            yield self.item(f"Quelle: {ip} {Colors.YELLOW}[BLOCKED]{Colors.NC}")
+        await self.pause(0.5)
 
-    def database_query(self):
+    async def database_query(self):
         """Simuliert Datenbankabfrage"""
-        print(f"{Colors.BRIGHT_GREEN}[DB]{Colors.NC} {Colors.CYAN}Datenbankabfrage läuft...{Colors.NC}")
-        print(f"  {Colors.GREEN}►{Colors.NC} SELECT * FROM network_events WHERE timestamp > NOW() - INTERVAL 5 MINUTE")
+        yield self.header("DB", "Datenbankabfrage läuft...")
+        yield self.item("SELECT * FROM network_events WHERE timestamp > NOW() - INTERVAL 5 MINUTE")
         rows = random.randint(0, 1000)
         query_time = random.randint(0, 999)
-        print(f"  {Colors.GREEN}►{Colors.NC} {rows} Zeilen gefunden")
-        print(f"  {Colors.GREEN}►{Colors.NC} Query Zeit: 0.{query_time:03d}s {Colors.GREEN}[OK]{Colors.NC}")
-        time.sleep(0.5)
-
-    def system_resources(self):
-        """Simuliert System-Ressourcen Check"""
-        print(f"{Colors.BRIGHT_GREEN}[SYS]{Colors.NC} {Colors.CYAN}System-Ressourcen Check...{Colors.NC}")
-        cpu = random.randint(0, 100)
-        memory = random.randint(0, 100)
-        disk_io = random.randint(0, 100)
-        network = random.randint(0, 100)
-        print(f"  {Colors.GREEN}►{Colors.NC} CPU Load: {cpu}%")
-        print(f"  {Colors.GREEN}►{Colors.NC} Memory: {memory}%")
-        print(f"  {Colors.GREEN}►{Colors.NC} Disk I/O: {disk_io}%")
-        print(f"  {Colors.GREEN}►{Colors.NC} Network: {network}% {Colors.GREEN}[HEALTHY]{Colors.NC}")
-        time.sleep(0.4)
-
-    def certificate_check(self):
+        yield self.item(f"{rows} Zeilen gefunden")
+        yield self.item(f"Query Zeit: 0.{query_time:03d}s {Colors.GREEN}[OK]{Colors.NC}")
+        await self.pause(0.5)
+
+    async def system_resources(self):
+        """System-Ressourcen Check (echte Last aus /proc oder simuliert)"""
+        yield self.header("SYS", "System-Ressourcen Check...")
+        if self.collector is not None:
+            rates = self.collector.system()
+            cpu, memory, disk_io = rates['cpu'], rates['memory'], rates['disk_io']
+            network = format_rate(rates['rx'] + rates['tx'])
+        else:
+            cpu = random.randint(0, 100)
+            memory = random.randint(0, 100)
+            disk_io = random.randint(0, 100)
+            network = f"{random.randint(0, 100)}%"
+        yield self.item(f"CPU Load: {cpu:.0f}%")
+        yield self.item(f"Memory: {memory:.0f}%")
+        yield self.item(f"Disk I/O: {disk_io:.0f}%")
+        yield self.item(f"Network: {network} {Colors.GREEN}[HEALTHY]{Colors.NC}")
+        await self.pause(0.4)
+
+    async def certificate_check(self):
         """Simuliert Zertifikats-Validierung"""
-        print(f"{Colors.BRIGHT_GREEN}[CERT]{Colors.NC} {Colors.CYAN}SSL/TLS Zertifikate validieren...{Colors.NC}")
+        yield self.header("CERT", "SSL/TLS Zertifikate validieren...")
         domain = random.choice(self.domains)
         days = random.randint(30, 395)
-        print(f"  {Colors.GREEN}►{Colors.NC} {domain}")
-        print(f"  {Colors.GREEN}►{Colors.NC} Gültig für: {days} Tage {Colors.GREEN}[VALID]{Colors.NC}")
-        time.sleep(0.4)
+        yield self.item(f"{domain}")
+        yield self.item(f"Gültig für: {days} Tage {Colors.GREEN}[VALID]{Colors.NC}")
+        await self.pause(0.4)
 
-    def packet_analysis(self):
+    async def packet_analysis(self):
         """Simuliert Packet Analysis"""
-        print(f"{Colors.BRIGHT_GREEN}[PKT]{Colors.NC} {Colors.CYAN}Deep Packet Inspection...{Colors.NC}")
+        yield self.header("PKT", "Deep Packet Inspection...")
         for _ in range(3):
             proto = random.choice(self.protocols)
             size = random.randint(64, 1564)
             ip = self.random_ip()
-            print(f"  {Colors.GREEN}►{Colors.NC} {proto} | Size: {size}B | Src: {ip} {Colors.GREEN}[ANALYZED]{Colors.NC}")
-            time.sleep(0.2)
+            yield self.item(f"{proto} | Size: {size}B | Src: {ip} {Colors.GREEN}[ANALYZED]{Colors.NC}")
+            await self.pause(0.2)
 
-    def backup_status(self):
+    async def backup_status(self):
         """Simuliert Backup-Status"""
-        print(f"{Colors.BRIGHT_GREEN}[BKUP]{Colors.NC} {Colors.CYAN}Backup-Status überprüfen...{Colors.NC}")
+        yield self.header("BKUP", "Backup-Status überprüfen...")
         hours_ago = random.randint(0, 24)
         last_backup = (datetime.now() - timedelta(hours=hours_ago)).strftime('%H:%M:%S')
         size = random.randint(0, 500)
-        print(f"  {Colors.GREEN}►{Colors.NC} Letzte Sicherung: {last_backup}")
-        print(f"  {Colors.GREEN}►{Colors.NC} Größe: {size}GB")
-        print(f"  {Colors.GREEN}►{Colors.NC} Integrität: {Colors.GREEN}[VERIFIED]{Colors.NC}")
-        time.sleep(0.5)
+        yield self.item(f"Letzte Sicherung: {last_backup}")
+        yield self.item(f"Größe: {size}GB")
+        yield self.item(f"Integrität: {Colors.GREEN}[VERIFIED]{Colors.NC}")
+        await self.pause(0.5)
 
-    def security_score(self):
+    async def security_score(self):
         """Simuliert Sicherheits-Bewertung"""
-        print(f"{Colors.BRIGHT_GREEN}[SCORE]{Colors.NC} {Colors.CYAN}Sicherheits-Bewertung...{Colors.NC}")
+        yield self.header("SCORE", "Sicherheits-Bewertung...")
         score = random.randint(70, 100)
-        print(f"  {Colors.GREEN}►{Colors.NC} Firewall: {Colors.GREEN}[ACTIVE]{Colors.NC}")
-        print(f"  {Colors.GREEN}►{Colors.NC} Encryption: {Colors.GREEN}[ENABLED]{Colors.NC}")
-        print(f"  {Colors.GREEN}►{Colors.NC} Updates: {Colors.GREEN}[CURRENT]{Colors.NC}")
-        print(f"  {Colors.GREEN}►{Colors.NC} Security Score: {score}/100 {Colors.GREEN}[GOOD]{Colors.NC}")
-        time.sleep(0.5)
+        yield self.item(f"Firewall: {Colors.GREEN}[ACTIVE]{Colors.NC}")
+        yield self.item(f"Encryption: {Colors.GREEN}[ENABLED]{Colors.NC}")
+        yield self.item(f"Updates: {Colors.GREEN}[CURRENT]{Colors.NC}")
+        yield self.item(f"Security Score: {score}/100 {Colors.GREEN}[GOOD]{Colors.NC}")
+        await self.pause(0.5)
+
+    def pick_operation(self, now):
+        """Wählt gewichtet eine Operation, die Intervall und Limit erlauben"""
+        names, weights = [], []
+        for name, (interval, weight, limit) in self.SCHEDULE.items():
+            if self.running[name] >= limit:
+                continue
+            if name in self.last_start and now - self.last_start[name] < interval:
+                continue
+            names.append(name)
+            weights.append(weight)
+        if not names:
+            return None
+        return random.choices(names, weights)[0]
+
+    async def run_operation(self, name, slot, free_slots):
+        """Führt eine Operation aus und gibt ihre Zeilen an das Pane/den Strom"""
+        try:
+            events = self.events
+            async for line in getattr(self, name)():
+                self.view.line(slot, line)
+                if events is not None:
+                    events.publish(name, line)
+            self.view.done(slot)
+            await self.pause(random.uniform(*self.gap))
+        finally:
+            self.running[name] -= 1
+            free_slots.put_nowait(slot)
+
+    def spawn(self, coro):
+        """Startet einen Task und merkt ihn für das Beenden vor"""
+        task = asyncio.ensure_future(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def dispatch(self):
+        """Startet Operationen, sobald ein Worker frei ist (mit globaler Rate)"""
+        loop = asyncio.get_event_loop()
+        free_slots = asyncio.Queue()
+        for slot in range(self.workers):
+            free_slots.put_nowait(slot)
+
+        interval = 1.0 / self.rate if self.rate else 0.0
+        next_start = loop.time()
+        while True:
+            slot = await free_slots.get()
+            if interval:
+                delay = next_start - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                next_start = max(next_start, loop.time() - interval) + interval
+
+            name = self.pick_operation(loop.time())
+            while name is None:
+                await asyncio.sleep(0.05)
+                name = self.pick_operation(loop.time())
+
+            self.running[name] += 1
+            self.last_start[name] = loop.time()
+            self.spawn(self.run_operation(name, slot, free_slots))
+
+    async def serve(self):
+        """Intro, danach Dispatcher und Bildschirmaktualisierung parallel ausführen"""
+        self.spawn(self.writer.flush_loop())
+        self.clear_screen()
+        self.show_banner()
+        await self.pause(1)
+        await self.initialize()
+
+        self.view.start()
+        await asyncio.gather(self.spawn(self.dispatch()),
+                             self.spawn(self.view.render_loop()))
 
     def run(self):
         """Hauptschleife"""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
         try:
-            self.clear_screen()
-            self.show_banner()
-            time.sleep(1)
-            self.initialize()
-
-            # Liste aller Operationen
-            operations = [
-                self.network_scan,
-                self.process_monitoring,
-                self.firewall_log,
-                self.file_integrity,
-                self.connection_analysis,
-                self.encryption_status,
-                self.authentication_log,
-                self.bandwidth_monitor,
-                self.intrusion_detection,
-                self.database_query,
-                self.system_resources,
-                self.certificate_check,
-                self.packet_analysis,
-                self.backup_status,
-                self.security_score
-            ]
-
-            # Endlosschleife
-            while True:
-                # Zufällige Operation ausführen
-                operation = random.choice(operations)
-                operation()
-                print()
-                time.sleep(random.uniform(1, 3))
+            loop.run_until_complete(self.serve())
 
         except KeyboardInterrupt:
+            for task in list(self.tasks):
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*self.tasks, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            self.view.close()
+            self.writer.close()
+            if self.events is not None:
+                self.events.close()
+            if self.integrity is not None:
+                self.integrity.close()
+            if self.collector is not None:
+                self.collector.close()
+                self.connections.close()
+            loop.close()
             print(f"\n\n{Colors.RED}[EXIT]{Colors.NC} {Colors.CYAN}System Monitor beendet{Colors.NC}")
+            if self.events is not None:
+                for line in self.events.hud():
+                    print(f"{Colors.GREEN}[SINK]{Colors.NC} {line}")
             print(f"{Colors.GREEN}[OK] Alle Verbindungen geschlossen{Colors.NC}\n")
             sys.exit(0)
 
 
 def main():
     """Main Entry Point"""
-    monitor = MatrixMonitor()
+    parser = argparse.ArgumentParser(description="Matrix-Style System Monitor")
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Gleichzeitig laufende Operationen (0 = Bildschirm mit Panes füllen)')
+    parser.add_argument('--layout', choices=('stream', 'panes'), default='stream',
+                        help='Verschränkter Strom oder ein Pane pro Worker')
+    parser.add_argument('--rate', type=float,
+                        help='Max. gestartete Operationen pro Sekunde (gesamt)')
+    parser.add_argument('--source', choices=('auto', 'proc', 'random'), default='auto',
+                        help='Systemwerte aus /proc lesen oder zufällig erzeugen')
+    parser.add_argument('--integrity-path', action='append', metavar='PATH',
+                        help='Datei oder Verzeichnis für die Integritätsprüfung (mehrfach)')
+    parser.add_argument('--integrity-cache', metavar='FILE',
+                        help='Hash-Cache (Standard: ~/.cache/matrix_monitor/integrity.json)')
+    parser.add_argument('--integrity-workers', type=int,
+                        help='Prozesse zum Hashen (Standard: CPU-Anzahl)')
+    parser.add_argument('--log', metavar='FILE',
+                        help='Ereignisse zusätzlich in eine rotierende Log-Datei schreiben')
+    parser.add_argument('--log-size', type=float, default=10.0, metavar='MB',
+                        help='Größe, ab der die Log-Datei rotiert wird')
+    parser.add_argument('--log-backups', type=int, default=3,
+                        help='Anzahl rotierter Log-Dateien (FILE.1 ...)')
+    parser.add_argument('--log-policy', choices=POLICIES, default='drop_newest',
+                        help='Verhalten bei vollem Puffer der Log-Datei')
+    parser.add_argument('--socket', metavar='PATH',
+                        help='Ereignisse als JSON-Datagramme an einen Unix-Socket senden')
+    parser.add_argument('--socket-policy', choices=POLICIES, default='drop_oldest',
+                        help='Verhalten bei vollem Puffer des Sockets')
+    args = parser.parse_args()
+    if args.source == 'proc' and not matrix_proc.available():
+        parser.error("/proc ist auf diesem System nicht verfügbar")
+
+    sinks = []
+    if args.log:
+        sinks.append(RotatingFileSink(args.log, int(args.log_size * (1 << 20)), args.log_backups,
+                                      policy=args.log_policy))
+    if args.socket:
+        if not hasattr(socket, 'AF_UNIX'):
+            parser.error("Unix-Sockets sind auf diesem System nicht verfügbar")
+        sinks.append(DatagramSink(args.socket, policy=args.socket_policy))
+
+    monitor = MatrixMonitor(workers=args.workers, layout=args.layout, rate=args.rate,
+                            source=args.source, integrity_paths=args.integrity_path,
+                            integrity_cache=args.integrity_cache,
+                            integrity_workers=args.integrity_workers, sinks=sinks)
     monitor.run()
 
 
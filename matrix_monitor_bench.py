@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Matrix Monitor Benchmark
+Headless-Benchmark der 15 Monitor-Operationen: Pausen laufen auf einer
+virtuellen Uhr, stdout geht in eine zählende Null-Ausgabe. Pro Operation und
+Ausgabe-Backend: CPU-Zeit, Allokationen, Bytes und Zeilen pro Sekunde als JSON
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+import matrix_proc
+import matrix_random
+from matrix_bench import CountingSink
+from matrix_monitor import MatrixMonitor, PaneView, StreamView, TerminalWriter
+
+PANE_SIZE = (80, 24)  # Feste Bildschirmgröße für das Pane-Backend
+
+
+class HeadlessMonitor(MatrixMonitor):
+    """Monitor ohne Terminal: Pausen zählen nur virtuelle Zeit"""
+
+    def __init__(self, sink, backend='stream', source='random'):
+        super().__init__(source=source)
+        self.sink = sink
+        self.backend = backend
+        self.virtual = 0.0  # Summe aller Pausen in Sekunden
+        self.writer = TerminalWriter(sink)
+        if backend == 'panes':
+            self.view = PaneView(self.writer, 1, PANE_SIZE)
+        else:
+            self.view = StreamView(self.writer, 1)
+
+    async def pause(self, seconds):
+        """Virtuelle Pause: nur Buchhaltung, kein Warten"""
+        self.virtual += seconds
+
+    async def collect(self, name):
+        """Ein Lauf einer Operation über das gewählte Backend, liefert die Zeilenzahl"""
+        lines = 0
+        if self.backend == 'print':
+            # Ungepuffert wie ein print() pro Zeile, Farbcodes unverändert
+            async for line in getattr(self, name)():
+                print(line, flush=True)
+                lines += 1
+            print(flush=True)
+            return lines
+        async for line in getattr(self, name)():
+            self.view.line(0, line)
+            lines += 1
+        self.view.done(0)
+        if self.backend == 'panes':
+            self.view.render()
+        # Ein Frame pro Lauf: gesammelte Ausgabe in einem Schreibaufruf
+        data = self.writer.take()
+        if data:
+            self.writer.emit(data)
+        return lines
+
+    def close(self):
+        self.writer.executor.shutdown(wait=False)
+        if self.collector is not None:
+            self.collector.close()
+            self.connections.close()
+
+
+def run_case(name, backend, runs, seed, source='random'):
+    """Misst eine Operation mit einem Backend über runs Läufe"""
+    random.seed(seed)
+    matrix_random.seed(seed)
+    sink = CountingSink()
+    monitor = HeadlessMonitor(sink, backend, source)
+    loop = asyncio.new_event_loop()
+    try:
+        with redirect_stdout(sink):
+            loop.run_until_complete(monitor.collect(name))  # Aufwärmen (Caches, /proc)
+            sink.reset()
+            monitor.virtual = 0.0
+            lines = 0
+            cpu, clock = time.process_time(), time.perf_counter()
+            for _ in range(runs):
+                lines += loop.run_until_complete(monitor.collect(name))
+            cpu = time.process_time() - cpu
+            wall = time.perf_counter() - clock
+    finally:
+        loop.close()
+        monitor.close()
+
+    return {
+        'operation': name,
+        'backend': backend,
+        'runs': runs,
+        'cpu_us': round(cpu * 1e6 / runs, 2),
+        'wall_us': round(wall * 1e6 / runs, 2),
+        'lines_per_run': round(lines / runs, 2),
+        'events_per_s': round(lines / cpu) if cpu else None,
+        'bytes_per_run': round(sink.bytes / runs, 1),
+        'writes_per_run': round(sink.writes / runs, 2),
+        'virtual_s': round(monitor.virtual / runs, 3),
+    }
+
+
+def measure_allocations(name, backend, runs, seed, source='random'):
+    """Speicherspitze und verbleibende Blöcke pro Lauf (tracemalloc)"""
+    random.seed(seed)
+    matrix_random.seed(seed)
+    sink = CountingSink()
+    monitor = HeadlessMonitor(sink, backend, source)
+    loop = asyncio.new_event_loop()
+    blocks = peak = 0
+    try:
+        with redirect_stdout(sink):
+            loop.run_until_complete(monitor.collect(name))
+            tracemalloc.start()
+            try:
+                for _ in range(runs):
+                    before = tracemalloc.take_snapshot()
+                    tracemalloc.reset_peak()
+                    base = tracemalloc.get_traced_memory()[0]
+                    loop.run_until_complete(monitor.collect(name))
+                    peak += tracemalloc.get_traced_memory()[1] - base
+                    after = tracemalloc.take_snapshot()
+                    # Nach dem Lauf noch lebende Blöcke (Caches, Lecks)
+                    blocks += sum(max(0, stat.count_diff)
+                                  for stat in after.compare_to(before, 'lineno'))
+            finally:
+                tracemalloc.stop()
+    finally:
+        loop.close()
+        monitor.close()
+    return {'alloc_peak_b': round(peak / runs), 'retained_blocks': round(blocks / runs, 1)}
+
+
+def compare(results, baseline, tolerance):
+    """Vergleicht mit einer früheren Ergebnisdatei, gibt Regressionen zurück"""
+    previous = {(r['operation'], r['backend']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        old = previous.get((result['operation'], result['backend']))
+        if old is None:
+            continue
+        if old.get('events_per_s') and result['events_per_s'] < old['events_per_s'] * (1 - tolerance):
+            regressions.append((result, 'events_per_s', old['events_per_s'], result['events_per_s']))
+        if result['bytes_per_run'] > old['bytes_per_run'] * (1 + tolerance):
+            regressions.append((result, 'bytes_per_run',
+                                old['bytes_per_run'], result['bytes_per_run']))
+    return regressions
+
+
+def summarize(results):
+    """Summen pro Backend über alle Operationen"""
+    backends = {}
+    for result in results:
+        total = backends.setdefault(result['backend'], {'cpu_us': 0.0, 'lines': 0.0, 'bytes': 0.0})
+        total['cpu_us'] += result['cpu_us']
+        total['lines'] += result['lines_per_run']
+        total['bytes'] += result['bytes_per_run']
+    return {backend: {'events_per_s': round(t['lines'] * 1e6 / t['cpu_us']) if t['cpu_us'] else None,
+                      'bytes_per_line': round(t['bytes'] / t['lines'], 1) if t['lines'] else None}
+            for backend, t in backends.items()}
+
+
+BACKENDS = ('print', 'stream', 'panes')
+
+
+def main():
+    """Main Entry Point"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--operations', default=','.join(MatrixMonitor.SCHEDULE),
+                        help='Kommagetrennte Operationen (Standard: alle)')
+    parser.add_argument('--backends', default=','.join(BACKENDS),
+                        help='Ausgabe-Backends: print, stream, panes')
+    parser.add_argument('--runs', type=int, default=500,
+                        help='Gemessene Läufe pro Operation und Backend')
+    parser.add_argument('--seed', type=int, default=1999)
+    parser.add_argument('--source', choices=('random', 'proc'), default='random',
+                        help='Simulierte Werte oder echte aus /proc')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Allokationsmessung (tracemalloc) überspringen')
+    parser.add_argument('--output', help='JSON-Datei statt stdout')
+    parser.add_argument('--baseline', help='Frühere JSON-Ergebnisse zum Vergleich')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Erlaubte Verschlechterung gegenüber Baseline')
+    args = parser.parse_args()
+    if args.source == 'proc' and not matrix_proc.available():
+        parser.error("/proc ist auf diesem System nicht verfügbar")
+
+    operations = args.operations.split(',')
+    backends = args.backends.split(',')
+    for name in operations:
+        if name not in MatrixMonitor.SCHEDULE:
+            parser.error(f"Unbekannte Operation: {name}")
+    for backend in backends:
+        if backend not in BACKENDS:
+            parser.error(f"Unbekanntes Backend: {backend}")
+
+    results = []
+    for backend in backends:
+        for name in operations:
+            result = run_case(name, backend, args.runs, args.seed, args.source)
+            if not args.no_memory:
+                result.update(measure_allocations(name, backend, min(args.runs, 20),
+                                                  args.seed, args.source))
+            results.append(result)
+            print(f"{backend:6} {name:20} {result['cpu_us']:8.1f} µs "
+                  f"{result['events_per_s']} Zeilen/s {result['bytes_per_run']} B",
+                  file=sys.stderr)
+
+    report = {
+        'version': 1,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'source': args.source,
+        'pane_size': PANE_SIZE,
+        'results': results,
+        'backends': summarize(results),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for result, metric, old, new in regressions:
+            print(f"REGRESSION {result['backend']} {result['operation']} "
+                  f"{metric}: {old} -> {new}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
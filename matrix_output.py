@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Matrix Output
+Entkoppelte Terminal-Ausgabe für die Rain-Engines: ein Writer-Thread besitzt das
+Terminal und holt fertige Frames aus einem Fach mit genau einem Platz. Ist das
+Fach noch belegt, wird der nächste Frame gar nicht erst aufgebaut - der folgende
+enthält als Delta zum zuletzt ausgegebenen Stand alle Änderungen. Die
+Simulation blockiert so nie auf I/O. curses schreibt selbst (und hält dabei den
+GIL); dort leitet PipeWriter die Ausgabe über eine Pipe und einen Kopier-Thread.
+"""
+
+import os
+import sys
+import threading
+import time
+from array import array
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import fcntl
+    import termios
+except ImportError:  # Windows: nur FrameWriter (PipeWriter ist für curses)
+    fcntl = termios = None
+
+
+class OutputStats:
+    """Ausgegebene und verworfene Frames, Schreib-Latenz als Ringpuffer"""
+
+    def __init__(self, window=512):
+        self.window = window
+        self.latency = array('d', bytes(8 * window))
+        self.written = 0
+        self.dropped = 0  # Wegen Rückstau nicht aufgebaute Frames
+
+    def record(self, seconds):
+        """Vermerkt einen geschriebenen Frame mit seiner Latenz"""
+        self.latency[self.written % self.window] = seconds
+        self.written += 1
+
+    def percentiles(self, *quantiles):
+        """Latenz-Perzentile über die letzten window Frames"""
+        n = min(self.written, self.window)
+        if not n:
+            return [0.0] * len(quantiles)
+        ordered = sorted(self.latency[:n])
+        return [ordered[min(n - 1, int(q * n))] for q in quantiles]
+
+    def hud(self):
+        """Kurzform für die HUD-Zeile"""
+        p50, p99 = self.percentiles(0.5, 0.99)
+        return f"stale {self.dropped} | out p50 {p50 * 1000:.1f}ms p99 {p99 * 1000:.1f}ms"
+
+    def report(self):
+        """Kennzahlen als dict (für JSON)"""
+        p50, p99 = self.percentiles(0.5, 0.99)
+        n = min(self.written, self.window)
+        return {
+            'written': self.written,
+            'dropped': self.dropped,
+            'latency_ms': {'p50': round(p50 * 1000, 4), 'p99': round(p99 * 1000, 4),
+                           'max': round(max(self.latency[:n], default=0.0) * 1000, 4)},
+        }
+
+
+class FrameWriter(OutputStats):
+    """Writer-Thread mit einem Fach: claim() vor dem Aufbau, submit() danach"""
+
+    def __init__(self, stream, window=512):
+        super().__init__(window)
+        self.stream = stream
+        self.condition = threading.Condition()
+        self.pending = []      # Fach: Texte in Ausgabe-Reihenfolge
+        self.submitted = 0.0   # Zeitpunkt des ältesten Texts im Fach
+        self.closed = False
+        self.error = None      # Fehler des Threads, wird im Hauptthread erneut ausgelöst
+        self.thread = threading.Thread(target=self.run, name='matrix-writer', daemon=True)
+        self.thread.start()
+
+    def claim(self):
+        """True, wenn das Fach frei ist; sonst zählt der Frame als verworfen"""
+        if self.error is not None:
+            raise self.error
+        if self.pending:
+            self.dropped += 1
+            return False
+        return True
+
+    def submit(self, text):
+        """Legt Text ins Fach; Steuersequenzen (Resize) werden nie verworfen"""
+        if self.error is not None:
+            raise self.error
+        with self.condition:
+            if not self.pending:
+                self.submitted = time.perf_counter()
+            self.pending.append(text)
+            self.condition.notify()
+
+    def run(self):
+        """Thread: Fach leeren, schreiben, Latenz vom Einlegen bis nach dem flush messen"""
+        stream = self.stream
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                text = ''.join(self.pending)
+                submitted = self.submitted
+                self.pending = []
+            try:
+                stream.write(text)
+                stream.flush()
+            except (OSError, ValueError) as e:
+                self.error = e
+                return
+            self.record(time.perf_counter() - submitted)
+
+    def close(self, timeout=5.0):
+        """Schreibt den Rest des Fachs und beendet den Thread"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join(timeout)
+
+
+class PipeWriter(OutputStats):
+    """Für curses: doupdate() schreibt (per dup2 umgeleitet) in eine Pipe, ein Thread
+    kopiert sie ans Terminal. curses blockiert im Schreiben samt GIL - in die Pipe
+    schreibt es ohne Warten, solange dort kein Frame mehr liegt (claim)."""
+
+    PIPE_SIZE = 1 << 20  # Linux: Pipe vergrößern, damit auch große Frames hineinpassen
+
+    def __init__(self, fd, window=512):
+        super().__init__(window)
+        self.fd = fd
+        self.tty = os.dup(fd)
+        self.read_end, self.write_end = os.pipe()
+        if hasattr(fcntl, 'F_SETPIPE_SZ'):
+            try:
+                fcntl.fcntl(self.write_end, fcntl.F_SETPIPE_SZ, self.PIPE_SIZE)
+            except OSError:
+                pass  # z.B. pipe-max-size zu klein: capacity meldet die echte Größe
+        # Gesicherte Größe der Pipe; 0 = unbekannt (ohne F_GETPIPE_SZ, z.B. macOS)
+        try:
+            self.capacity = fcntl.fcntl(self.write_end, fcntl.F_GETPIPE_SZ)
+        except (AttributeError, OSError):
+            self.capacity = 0
+        self.stamps = deque()  # Einlegezeitpunkte noch nicht ausgegebener Frames
+        self.error = None
+        self.thread = threading.Thread(target=self.run, name='matrix-pipe', daemon=True)
+        self.thread.start()
+
+    def pending(self):
+        """Bytes in der Pipe, die der Thread noch nicht übernommen hat"""
+        return int.from_bytes(fcntl.ioctl(self.read_end, termios.FIONREAD, bytes(4)),
+                              sys.byteorder)
+
+    def claim(self):
+        """True, wenn die Pipe leer ist; sonst zählt der Frame als verworfen"""
+        if self.error is not None:
+            raise self.error
+        if self.pending():
+            self.dropped += 1
+            return False
+        return True
+
+    def fits(self, size):
+        """True, wenn ein Frame von bis zu size Bytes in die leere Pipe passt. Größere
+        müssen direkt geschrieben werden: curses blockierte sonst an der vollen Pipe
+        samt GIL, und der Kopier-Thread könnte sie nie leeren."""
+        return size <= self.capacity
+
+    @contextmanager
+    def redirect(self):
+        """Leitet fd für die Dauer des Blocks in die Pipe um (ein Frame)"""
+        self.stamps.append(time.perf_counter())
+        os.dup2(self.write_end, self.fd)
+        try:
+            yield
+        finally:
+            os.dup2(self.tty, self.fd)
+
+    def run(self):
+        """Thread: Pipe ans Terminal kopieren; ist sie leer, sind alle Frames draußen"""
+        while True:
+            try:
+                data = os.read(self.read_end, 1 << 16)
+                if not data:
+                    return  # Schreibende geschlossen (close)
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(self.tty, view):]
+            except OSError as e:
+                self.error = e
+                return
+            if not self.pending():
+                now = time.perf_counter()
+                while self.stamps:
+                    self.record(now - self.stamps.popleft())
+
+    def close(self, timeout=5.0):
+        """Leert die Pipe ans Terminal und gibt alle Deskriptoren frei"""
+        os.close(self.write_end)
+        self.thread.join(timeout)
+        os.close(self.read_end)
+        os.close(self.tty)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Matrix Performance Stats
+Leichtgewichtige Phasen-Zeitmessung für die Rain-Engines: ein perf_counter-Aufruf
+pro Phase, Ringpuffer für gleitende Perzentile, HUD-Zeile und JSON-Export
+"""
+
+import json
+import time
+from array import array
+
+
+class PerfStats:
+    """Zeit pro Phase und Frame, Bytes, geänderte Zellen und ausgelassene Frames"""
+
+    PHASES = ('simulate', 'compose', 'encode', 'write', 'sleep')
+
+    def __init__(self, window=512):
+        self.window = window  # Frames für gleitende Werte
+        self.history = {phase: array('d', bytes(8 * window)) for phase in self.PHASES}
+        self.frame_times = array('d', bytes(8 * window))  # Arbeitszeit ohne sleep
+        self.stamps = array('d', bytes(8 * window))       # Ende jedes Frames
+        self.current = dict.fromkeys(self.PHASES, 0.0)
+        self.totals = dict.fromkeys(self.PHASES, 0.0)
+        self.frames = 0
+        self.bytes = 0
+        self.cells = 0
+        self.dropped = 0
+        self.output = None    # Optional: OutputStats der entkoppelten Ausgabe (matrix_output)
+        self.governor = None  # Optional: QualityGovernor (matrix_engine)
+        self.started = self.last = time.perf_counter()
+
+    def mark(self, phase):
+        """Rechnet die Zeit seit der letzten Marke der Phase zu"""
+        now = time.perf_counter()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def end_frame(self, dropped=None):
+        """Schließt einen Frame ab (dropped: ausgelassene Render-Termine insgesamt)"""
+        i = self.frames % self.window
+        busy = 0.0
+        for phase, value in self.current.items():
+            self.history[phase][i] = value
+            self.totals[phase] += value
+            if phase != 'sleep':
+                busy += value
+            self.current[phase] = 0.0
+        self.frame_times[i] = busy
+        self.stamps[i] = self.last
+        self.frames += 1
+        if dropped is not None:
+            self.dropped = dropped
+
+    @property
+    def last_frame_time(self):
+        """Arbeitszeit (ohne sleep) des zuletzt abgeschlossenen Frames"""
+        return self.frame_times[(self.frames - 1) % self.window] if self.frames else 0.0
+
+    def percentiles(self, values, *quantiles):
+        """Perzentile über die letzten window Frames"""
+        n = min(self.frames, self.window)
+        if not n:
+            return [0.0] * len(quantiles)
+        ordered = sorted(values[:n])
+        return [ordered[min(n - 1, int(q * n))] for q in quantiles]
+
+    @property
+    def fps(self):
+        """Erreichte Frames pro Sekunde über das Fenster"""
+        n = min(self.frames, self.window)
+        if n < 2:
+            return 0.0
+        newest = self.stamps[(self.frames - 1) % self.window]
+        oldest = self.stamps[(self.frames - n) % self.window]
+        return (n - 1) / (newest - oldest) if newest > oldest else 0.0
+
+    def hud(self):
+        """Einzeilige Zusammenfassung für die Statuszeile"""
+        p50, p99 = self.percentiles(self.frame_times, 0.5, 0.99)
+        n = min(self.frames, self.window) or 1
+        phases = " ".join(f"{phase[:3]} {sum(self.history[phase][:n]) / n * 1000:.1f}"
+                          for phase in self.PHASES[:-1])
+        text = (f"FPS {self.fps:.1f} | p50 {p50 * 1000:.1f}ms p99 {p99 * 1000:.1f}ms | "
+                f"{phases} | {self.cells / max(self.frames, 1):.0f} Zellen/F")
+        if self.bytes:
+            elapsed = max(self.last - self.started, 1e-9)
+            text += f" | {self.bytes / elapsed / 1024:.1f} KB/s"
+        text += f" | drop {self.dropped}"
+        if self.output is not None:
+            text += f" | {self.output.hud()}"
+        if self.governor is not None:
+            text += f" | {self.governor.hud()}"
+        return text
+
+    def report(self):
+        """Alle Kennzahlen als dict (für JSON)"""
+        frames = max(self.frames, 1)
+        elapsed = self.last - self.started
+        p50, p99 = self.percentiles(self.frame_times, 0.5, 0.99)
+        phases = {}
+        for phase in self.PHASES:
+            q50, q99 = self.percentiles(self.history[phase], 0.5, 0.99)
+            phases[phase] = {'mean_ms': round(self.totals[phase] * 1000 / frames, 4),
+                             'p50_ms': round(q50 * 1000, 4), 'p99_ms': round(q99 * 1000, 4)}
+        report = {
+            'frames': self.frames,
+            'seconds': round(elapsed, 3),
+            'fps': round(self.frames / elapsed, 2) if elapsed > 0 else None,
+            'frame_ms': {'p50': round(p50 * 1000, 4), 'p99': round(p99 * 1000, 4),
+                         'max': round(max(self.frame_times) * 1000, 4)},
+            'phases': phases,
+            'bytes': self.bytes,
+            'bytes_per_frame': round(self.bytes / frames, 1),
+            'cells_per_frame': round(self.cells / frames, 1),
+            'dropped': self.dropped,
+        }
+        if self.output is not None:
+            report['output'] = self.output.report()
+        if self.governor is not None:
+            report['quality'] = self.governor.report()
+        return report
+
+    def export(self, path):
+        """Schreibt report() als JSON-Datei"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+            f.write('\n')
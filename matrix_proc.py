@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Matrix /proc Collector
+Sparsames Auslesen echter Systemwerte unter Linux: Deskriptoren bleiben offen,
+gelesen wird mit os.pread, Raten ergeben sich aus Deltas zweier Samples
+"""
+
+import os
+import re
+import socket
+import struct
+import time
+from collections import deque
+
+
+def available():
+    """Prüft, ob /proc und os.pread nutzbar sind (Linux)"""
+    return hasattr(os, 'pread') and os.path.exists('/proc/stat')
+
+
+def format_rate(value):
+    """Formatiert Bytes/s menschenlesbar"""
+    for unit in ('B/s', 'KB/s', 'MB/s', 'GB/s'):
+        if value < 1024 or unit == 'GB/s':
+            return f"{value:.0f} {unit}" if unit == 'B/s' else f"{value:.1f} {unit}"
+        value /= 1024
+
+
+class ProcCollector:
+    """Sammelt CPU, Speicher, Netz, Platten und Prozesse aus /proc"""
+
+    MAX_PID_FDS = 512        # Offene /proc/[pid]/stat Deskriptoren
+    RESCAN_INTERVAL = 2.0    # Sekunden zwischen zwei Scans nach neuen PIDs
+    MIN_INTERVAL = 0.2       # Kürzere Abstände liefern die letzten Raten erneut
+
+    def __init__(self, budget=0.005, root='/proc'):
+        self.root = root
+        self.budget = budget  # Max. Sekunden pro Prozess-Sample
+        self.fds = {}
+        self.buffer_size = {}
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.page_size = os.sysconf('SC_PAGE_SIZE')
+        try:
+            self.disks = set(os.listdir('/sys/block'))
+        except OSError:
+            self.disks = None
+
+        self.last = None      # Rohwerte des letzten System-Samples
+        self.rates = {'cpu': 0.0, 'memory': 0.0, 'disk_io': 0.0,
+                      'rx': 0.0, 'tx': 0.0, 'rx_packets': 0.0, 'tx_packets': 0.0}
+        self.mem_total = 1
+
+        self.pids = []        # Bekannte PIDs, reihum abgefragt
+        self.pid_cursor = 0
+        self.last_rescan = 0.0
+        self.pid_ticks = {}   # pid -> (CPU-Ticks, Zeitpunkt)
+        self.processes = {}   # pid -> (Name, CPU %, MEM %)
+        self.pid_fds = {}
+
+        self.system()
+
+    def read(self, path):
+        """Liest eine Datei über einen offen gehaltenen Deskriptor neu ein"""
+        fd = self.fds.get(path)
+        if fd is None:
+            fd = self.fds[path] = os.open(path, os.O_RDONLY)
+        return self.pread_all(fd, path)
+
+    def pread_all(self, fd, key):
+        """pread ab Offset 0; Puffer wächst, bis die Datei vollständig passt"""
+        size = self.buffer_size.get(key, 4096)
+        while True:
+            data = os.pread(fd, size, 0)
+            if len(data) < size:
+                self.buffer_size[key] = size
+                return data
+            size *= 2
+
+    def close(self):
+        """Schließt alle offenen Deskriptoren"""
+        for fd in list(self.fds.values()) + list(self.pid_fds.values()):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self.fds.clear()
+        self.pid_fds.clear()
+
+    def read_raw(self):
+        """Ein Roh-Sample aller System-Zähler"""
+        raw = {}
+
+        # /proc/stat: erste Zeile "cpu user nice system idle iowait irq softirq steal"
+        line = self.read(f'{self.root}/stat').split(b'\n', 1)[0].split()
+        ticks = [int(v) for v in line[1:9]]
+        raw['cpu_total'] = sum(ticks)
+        raw['cpu_idle'] = ticks[3] + ticks[4]
+
+        # /proc/meminfo: "MemTotal:  16318588 kB"
+        mem = {}
+        for line in self.read(f'{self.root}/meminfo').split(b'\n'):
+            key, _, rest = line.partition(b':')
+            if key in (b'MemTotal', b'MemAvailable', b'MemFree'):
+                mem[key] = int(rest.split()[0])
+                if len(mem) == 3:
+                    break
+        self.mem_total = mem.get(b'MemTotal', 1)
+        raw['mem_available'] = mem.get(b'MemAvailable', mem.get(b'MemFree', 0))
+
+        # /proc/net/dev: zwei Kopfzeilen, dann "iface: rx_bytes rx_packets ... tx_bytes tx_packets"
+        rx = tx = rx_packets = tx_packets = 0
+        for line in self.read(f'{self.root}/net/dev').split(b'\n')[2:]:
+            name, _, values = line.partition(b':')
+            if not values or name.strip() == b'lo':
+                continue
+            fields = values.split()
+            rx += int(fields[0])
+            rx_packets += int(fields[1])
+            tx += int(fields[8])
+            tx_packets += int(fields[9])
+        raw['rx'], raw['tx'] = rx, tx
+        raw['rx_packets'], raw['tx_packets'] = rx_packets, tx_packets
+
+        # /proc/diskstats: "major minor name ... io_ticks(ms) an Index 12"
+        io_ticks = {}
+        for line in self.read(f'{self.root}/diskstats').split(b'\n'):
+            fields = line.split()
+            if len(fields) < 13:
+                continue
+            name = fields[2].decode()
+            if self.disks is not None and name not in self.disks:
+                continue  # Partitionen und Unbekanntes überspringen
+            if name.startswith(('loop', 'ram')):
+                continue
+            io_ticks[name] = int(fields[12])
+        raw['io_ticks'] = io_ticks
+        raw['time'] = time.monotonic()
+        return raw
+
+    def system(self):
+        """Aktuelle System-Raten (CPU/MEM/Disk in %, Netz in Bytes bzw. Pakete pro s)"""
+        now = time.monotonic()
+        if self.last is not None and now - self.last['time'] < self.MIN_INTERVAL:
+            return self.rates
+        raw = self.read_raw()
+        last, self.last = self.last, raw
+        rates = self.rates
+        rates['memory'] = 100.0 * (1 - raw['mem_available'] / self.mem_total)
+        if last is not None:
+            dt = raw['time'] - last['time']
+            total = raw['cpu_total'] - last['cpu_total']
+            if total > 0:
+                rates['cpu'] = 100.0 * (1 - (raw['cpu_idle'] - last['cpu_idle']) / total)
+            # Auslastung des am stärksten belasteten Geräts (io_ticks in ms)
+            busy = max((ticks - last['io_ticks'].get(name, ticks)
+                        for name, ticks in raw['io_ticks'].items()), default=0)
+            rates['disk_io'] = min(100.0, busy / (dt * 10))
+            for key in ('rx', 'tx', 'rx_packets', 'tx_packets'):
+                rates[key] = max(0, raw[key] - last[key]) / dt
+        return rates
+
+    def rescan_pids(self, now):
+        """Liest die PID-Liste neu (nur alle RESCAN_INTERVAL Sekunden)"""
+        self.pids = [int(name) for name in os.listdir(self.root) if name.isdigit()]
+        self.last_rescan = now
+        alive = set(self.pids)
+        for pid in [pid for pid in self.pid_ticks if pid not in alive]:
+            self.forget(pid)
+
+    def forget(self, pid):
+        """Entfernt einen beendeten Prozess samt Deskriptor"""
+        self.pid_ticks.pop(pid, None)
+        self.processes.pop(pid, None)
+        fd = self.pid_fds.pop(pid, None)
+        if fd is not None:
+            os.close(fd)
+
+    def read_pid(self, pid):
+        """Liest /proc/[pid]/stat, bevorzugt über einen offenen Deskriptor"""
+        fd = self.pid_fds.get(pid)
+        if fd is not None:
+            return self.pread_all(fd, 'pid')
+        fd = os.open(f'{self.root}/{pid}/stat', os.O_RDONLY)
+        if len(self.pid_fds) < self.MAX_PID_FDS:
+            self.pid_fds[pid] = fd
+            return self.pread_all(fd, 'pid')
+        try:
+            return self.pread_all(fd, 'pid')
+        finally:
+            os.close(fd)
+
+    def sample_processes(self):
+        """Aktualisiert Prozesse reihum, bis das Zeitbudget verbraucht ist"""
+        now = time.monotonic()
+        if now - self.last_rescan >= self.RESCAN_INTERVAL:
+            self.rescan_pids(now)
+        if not self.pids:
+            return
+        deadline = now + self.budget
+        hz = self.clock_ticks
+        mem_pages = self.mem_total * 1024 / self.page_size
+        count = len(self.pids)
+        for _ in range(count):
+            pid = self.pids[self.pid_cursor % count]
+            self.pid_cursor += 1
+            try:
+                data = self.read_pid(pid)
+            except OSError:
+                self.forget(pid)
+                continue
+            # "pid (comm) state ..." - comm kann Leerzeichen und Klammern enthalten
+            end = data.rfind(b')')
+            name = data[data.find(b'(') + 1:end].decode(errors='replace')
+            fields = data[end + 2:].split()
+            ticks = int(fields[11]) + int(fields[12])   # utime + stime
+            rss = int(fields[21])
+            t = time.monotonic()
+            previous = self.pid_ticks.get(pid)
+            self.pid_ticks[pid] = (ticks, t)
+            cpu = 0.0
+            if previous is not None and t > previous[1]:
+                cpu = 100.0 * (ticks - previous[0]) / hz / (t - previous[1])
+            self.processes[pid] = (name, cpu, 100.0 * rss / mem_pages)
+            if t >= deadline:
+                break
+
+    def top_processes(self, n=4):
+        """Die n Prozesse mit der höchsten CPU-Last: (pid, Name, CPU %, MEM %)"""
+        self.sample_processes()
+        top = sorted(self.processes.items(), key=lambda item: (item[1][1], item[1][2]),
+                     reverse=True)[:n]
+        return [(pid, name, cpu, mem) for pid, (name, cpu, mem) in top]
+
+
+# "\n   12: 0100007F:BC8F 00000000:0000 0A ..." -> b'0100007F:BC8F 00000000:0000 0A'
+# findall läuft komplett in C; Python sieht nur die Schlüssel, keine Zeilen.
+# Das führende \n (statt ^ mit re.M) erlaubt dem Regex-Modul eine schnelle Suche.
+SOCKET_ROW = re.compile(rb'\n *\d+: ([0-9A-F]+:[0-9A-F]{4} [0-9A-F]+:[0-9A-F]{4} [0-9A-F]{2})')
+
+TCP_STATES = {
+    b'01': 'ESTABLISHED', b'02': 'SYN_SENT', b'03': 'SYN_RECV', b'04': 'FIN_WAIT1',
+    b'05': 'FIN_WAIT2', b'06': 'TIME_WAIT', b'07': 'CLOSE', b'08': 'CLOSE_WAIT',
+    b'09': 'LAST_ACK', b'0A': 'LISTEN', b'0B': 'CLOSING',
+}
+UDP_STATES = {b'01': 'ESTABLISHED', b'07': 'UNCONN'}
+
+
+def decode_endpoint(field):
+    """b'0100007F:BC8F' -> ('127.0.0.1', 48271); Adresse in Host-Byte-Order je 32 Bit"""
+    address, _, port = field.partition(b':')
+    if len(address) == 8:
+        packed = struct.pack('=I', int(address, 16))
+        host = socket.inet_ntop(socket.AF_INET, packed)
+    else:
+        words = [int(address[i:i + 8], 16) for i in range(0, 32, 8)]
+        host = socket.inet_ntop(socket.AF_INET6, struct.pack('=4I', *words))
+    return host, int(port, 16)
+
+
+class ConnectionTable:
+    """Socket-Tabelle aus /proc/net/{tcp,tcp6,udp} mit Delta-Erkennung
+
+    Gelesen wird sequenziell in Blöcken; jeder step() arbeitet höchstens budget
+    Sekunden, ein kompletter Durchlauf kann sich also über mehrere Schritte ziehen.
+    """
+
+    CHUNK = 1 << 15           # Bytes pro os.read (ca. 220 IPv4-Zeilen)
+    MAX_EVENTS = 1000
+
+    def __init__(self, budget=0.003, root='/proc', protocols=('tcp', 'tcp6', 'udp')):
+        self.budget = budget
+        self.fds = {}
+        for proto in protocols:
+            try:
+                self.fds[proto] = os.open(f'{root}/net/{proto}', os.O_RDONLY)
+            except OSError:
+                pass  # z.B. ohne IPv6
+        self.protocols = list(self.fds)
+        self.index = {proto: set() for proto in self.protocols}  # Schlüssel des letzten Durchlaufs
+        self.sizes = dict.fromkeys(self.protocols, 0)
+        self.events = deque(maxlen=self.MAX_EVENTS)
+        self.passes = 0
+        self.current = 0          # Position in self.protocols
+        self.rows = set()         # Schlüssel des laufenden Durchlaufs
+        self.added = set()        # Davon nicht im letzten Durchlauf enthalten
+        self.remaining = None     # Alte Schlüssel, noch nicht wieder gesehen
+        self.rest = b''           # Angefangene Zeile am Blockende (ab ihrem \n)
+
+    def close(self):
+        """Schließt alle Deskriptoren"""
+        for fd in self.fds.values():
+            os.close(fd)
+        self.fds.clear()
+        self.protocols = []
+
+    def step(self):
+        """Liest und parst bis zum Zeitbudget; True, wenn ein Durchlauf fertig ist"""
+        if not self.protocols:
+            return True
+        deadline = time.perf_counter() + self.budget
+        findall = SOCKET_ROW.findall
+        while True:
+            proto = self.protocols[self.current]
+            if self.remaining is None:
+                self.remaining = self.index[proto]
+            data = os.read(self.fds[proto], self.CHUNK)
+            if data:
+                end = data.rfind(b'\n')
+                if end < 0:
+                    self.rest += data
+                    continue
+                chunk = set(findall(self.rest + data[:end]))
+                self.rest = data[end:]
+                # Abgleich blockweise, damit kein Schritt die ganze Tabelle anfasst
+                if self.passes:
+                    self.added.update(chunk.difference(self.remaining, self.rows))
+                    self.remaining.difference_update(chunk)
+                self.rows.update(chunk)
+            else:
+                self.finish(proto)
+                self.current += 1
+                if self.current == len(self.protocols):
+                    self.current = 0
+                    self.passes += 1
+                    return True
+            if time.perf_counter() >= deadline:
+                return False
+
+    def finish(self, proto):
+        """Schließt den Durchlauf eines Protokolls ab und meldet die Änderungen"""
+        added, removed = self.added, self.remaining
+        self.index[proto] = self.rows
+        self.sizes[proto] = len(self.rows)
+        self.rows, self.added, self.remaining, self.rest = set(), set(), None, b''
+        os.lseek(self.fds[proto], 0, os.SEEK_SET)
+        if not self.passes:
+            return  # Erster Durchlauf ist nur die Ausgangsbasis
+
+        added = {row[:-3]: row[-2:] for row in added}
+        removed = {row[:-3]: row[-2:] for row in removed}
+        states = UDP_STATES if proto.startswith('udp') else TCP_STATES
+        for key, state in added.items():
+            before = removed.pop(key, None)
+            kind = 'NEW' if before is None else 'CHANGED'
+            self.events.append(self.event(proto, kind, key, states, before, state))
+        for key, state in removed.items():
+            self.events.append(self.event(proto, 'CLOSED', key, states, state, None))
+
+    @staticmethod
+    def event(proto, kind, key, states, before, after):
+        """(Art, Protokoll, lokal, entfernt, alter Zustand, neuer Zustand)"""
+        local, remote = key.split(b' ')
+        return (kind, proto, decode_endpoint(local), decode_endpoint(remote),
+                before and states.get(before, before.decode()),
+                after and states.get(after, after.decode()))
+
+    def take_events(self, n):
+        """Die ältesten n noch nicht gemeldeten Änderungen"""
+        events = self.events
+        return [events.popleft() for _ in range(min(n, len(events)))]
@@ -4,10 +4,17 @@ Matrix Digital Rain Effect
 Klassischer Matrix-Style mit fallenden grünen Zeichen
 """
 
+import argparse
 import curses
-import random
+import sys
 import time
-from collections import deque
+
+import matrix_random
+from matrix_engine import (FrameBuffer, FrameScheduler, QualityGovernor, QUALITY_LEVELS,
+                           RainField, apply_quality)
+from matrix_output import PipeWriter
+from matrix_perf import PerfStats
+from matrix_record import Recorder
 
 
 class MatrixRain:
@@ -22,12 +29,31 @@ class MatrixRain:
         "ｦｧｨｩｪｫｬｭｮｯｰ"
     )
 
-    def __init__(self, stdscr):
+    TICK_RATE = 30    # Simulationsschritte pro Sekunde (Animationsgeschwindigkeit)
+    RENDER_RATE = 30  # Frames pro Sekunde
+    HUD_INTERVAL = 0.5  # Sekunden zwischen zwei HUD-Aktualisierungen
+    CELL_BYTES = 32     # Obergrenze pro geänderter Zelle (Position, Farbe, UTF-8)
+
+    def __init__(self, stdscr, record=None, hud=False, adaptive=True):
         self.stdscr = stdscr
+        self.hud = hud  # Performance-HUD statt Hinweis zum Beenden
+        self.adaptive = adaptive  # Qualität bei Überlast automatisch senken (QualityGovernor)
+        self.quality = 0          # Aktuelle Stufe aus QUALITY_LEVELS
+        self.perf = PerfStats()
+        self.output = None  # PipeWriter während run(): Frames auslassen statt blockieren
+        self.unsent = 0     # Seit dem letzten doupdate() geänderte Zellen (Größe des Updates)
         self.height, self.width = stdscr.getmaxyx()
-        self.drops = []
 
-        # Curses Setup
+        self.setup_curses()
+
+        # Initialisiere Tropfen für jede Spalte
+        self.init_drops()
+
+        # Optional: Aufzeichnung für matrix_replay.py
+        self.recorder = Recorder(record, self.field.glyphs, self.RENDER_RATE) if record else None
+
+    def setup_curses(self):
+        """Curses Setup (Cursor, Farben, Eingabe)"""
         curses.curs_set(0)  # Cursor verstecken
         curses.start_color()
         curses.use_default_colors()
@@ -40,78 +66,128 @@ class MatrixRain:
         curses.init_pair(5, 34, -1)   # Dunkles Grün
         curses.init_pair(6, 28, -1)   # Sehr dunkles Grün
 
-        self.stdscr.timeout(50)  # Non-blocking input mit 50ms timeout
+        # Attribute pro Farbstufe einmal berechnen (Index = Farbpaar)
+        self.attrs = (
+            0,
+            curses.color_pair(1) | curses.A_BOLD,
+            curses.color_pair(2) | curses.A_BOLD,
+            curses.color_pair(3) | curses.A_BOLD,
+            curses.color_pair(4),
+            curses.color_pair(5),
+            curses.color_pair(6),
+        )
 
-        # Initialisiere Tropfen für jede Spalte
-        self.init_drops()
+        self.stdscr.timeout(0)  # Non-blocking input, getaktet wird im FrameScheduler
 
     def init_drops(self):
         """Initialisiere fallende Zeichen-Tropfen"""
-        for x in range(self.width):
-            # Zufällige Start-Position und Geschwindigkeit
-            drop = {
-                'x': x,
-                'y': random.randint(-self.height, 0),
-                'speed': random.uniform(0.3, 1.5),
-                'length': random.randint(5, 25),
-                'chars': deque(maxlen=30),
-                'counter': 0.0
-            }
-            self.drops.append(drop)
-
-    def get_random_char(self):
-        """Gibt ein zufälliges Matrix-Zeichen zurück"""
-        return random.choice(self.CHARS)
-
-    def draw_drop(self, drop):
-        """Zeichnet einen einzelnen fallenden Tropfen"""
-        length = len(drop['chars'])
-
-        for i, (char, y_pos) in enumerate(drop['chars']):
-            if 0 <= y_pos < self.height - 1 and 0 <= drop['x'] < self.width:
-                # Farbintensität basierend auf Position im Tropfen
-                if i == length - 1:
-                    # Hellster Punkt (Kopf des Tropfens)
-                    color = curses.color_pair(1) | curses.A_BOLD
-                elif i == length - 2:
-                    color = curses.color_pair(2) | curses.A_BOLD
-                elif i == length - 3:
-                    color = curses.color_pair(3) | curses.A_BOLD
-                elif i > length - 6:
-                    color = curses.color_pair(4)
-                elif i > length - 10:
-                    color = curses.color_pair(5)
-                else:
-                    color = curses.color_pair(6)
-
+        self.field = RainField(self.width, self.height, self.CHARS,
+                               speed=(0.3, 1.5), length=(5, 25), trail=30,
+                               respawn=(-20, -5), flicker=0.05, flicker_skip=0)
+
+    @staticmethod
+    def get_shade(position, length):
+        """Gibt die Farbstufe basierend auf Position im Tropfen zurück"""
+        if position == length - 1:
+            return 1  # Hellster Punkt (Kopf des Tropfens)
+        elif position == length - 2:
+            return 2
+        elif position == length - 3:
+            return 3
+        elif position > length - 6:
+            return 4
+        elif position > length - 10:
+            return 5
+        else:
+            return 6
+
+    def update_drops(self):
+        """Aktualisiert alle Tropfen"""
+        self.field.step()
+
+    def reset_frame(self):
+        """Leert den Bildschirm und zeichnet beim nächsten Frame alles neu"""
+        self.stdscr.erase()
+        # Letzte Zeile bleibt für den Hinweis zum Beenden frei
+        self.frame = FrameBuffer(self.width, self.height - 1, self.get_shade, self.field.trail)
+        self.frame.set_palette(QUALITY_LEVELS[self.quality]['palette'])
+        self.field.touch_all()
+        self.status_drawn = False
+
+    def resize(self):
+        """Übernimmt eine neue Terminal-Größe (KEY_RESIZE); bestehende Tropfen bleiben erhalten"""
+        curses.update_lines_cols()
+        height, width = self.stdscr.getmaxyx()
+        if height == self.height and width == self.width:
+            return
+        old_status = self.height - 1
+        self.height, self.width = height, width
+        self.field.resize(width, height)
+        self.frame.resize(width, height - 1)
+        self.field.touch_all()
+        self.unsent = width * height  # ncurses zeichnet nach KEY_RESIZE alles neu
+        # Alte und neue Statuszeile leeren, Regen in der alten Zeile neu zeichnen
+        for y in (old_status, height - 1):
+            if y < height:
                 try:
-                    self.stdscr.addstr(y_pos, drop['x'], char, color)
+                    self.stdscr.move(y, 0)
+                    self.stdscr.clrtoeol()
                 except curses.error:
-                    pass  # Ignoriere Fehler am Rand des Bildschirms
-
-    def update_drop(self, drop):
-        """Aktualisiert einen Tropfen"""
-        drop['counter'] += drop['speed']
-
-        if drop['counter'] >= 1.0:
-            drop['counter'] = 0.0
-            drop['y'] += 1
-
-            # Neues Zeichen am Kopf hinzufügen
-            drop['chars'].append((self.get_random_char(), drop['y']))
-
-            # Manchmal Zeichen zufällig ändern (flackern)
-            if random.random() < 0.05 and len(drop['chars']) > 0:
-                idx = random.randint(0, len(drop['chars']) - 1)
-                old_char, y_pos = drop['chars'][idx]
-                drop['chars'][idx] = (self.get_random_char(), y_pos)
+                    pass
+        self.frame.invalidate_row(old_status)
+        self.status_drawn = False
+
+    def draw_frame(self):
+        """Zeichnet nur geänderte Zellen (Kopf, umgefärbte und verlassene Zellen)"""
+        glyphs, attrs = self.field.glyphs, self.attrs
+        addstr = self.stdscr.addstr
+        changes = self.frame.update(self.field, self.field.take_dirty())
+        if self.recorder is not None:
+            self.recorder.add(changes, self.frame)
+        self.perf.mark('compose')
+        for y, x, code, color in changes:
+            try:
+                addstr(y, x, glyphs[code], attrs[color])
+            except curses.error:
+                pass  # Ignoriere Fehler am Rand des Bildschirms
+        self.perf.cells += len(changes)
+        self.unsent += len(changes)
+        self.perf.mark('encode')
 
-        # Reset wenn Tropfen aus dem Bildschirm ist
-        if drop['y'] > self.height + drop['length']:
-            drop['y'] = random.randint(-20, -5)
-            drop['speed'] = random.uniform(0.3, 1.5)
-            drop['length'] = random.randint(5, 25)
-            drop['chars'].clear()
+    def draw_status(self):
+        """Zeigt Tastenkombination zum Beenden bzw. das Performance-HUD"""
+        try:
+            if self.hud:
+                hud = self.perf.hud()[:self.width - 1].ljust(self.width - 1)
+                self.stdscr.addstr(self.height - 1, 0, hud, self.attrs[5])
+            else:
+                exit_text = "Press 'q' or ESC to exit"
+                self.stdscr.addstr(self.height - 1,
+                                   max(0, self.width - len(exit_text) - 2),
+                                   exit_text,
+                                   self.attrs[5])
+        except curses.error:
+            pass
+        self.status_drawn = True
+
+    def present(self):
+        """Überträgt alle Änderungen mit einem minimalen Update ans Terminal"""
+        output = self.output
+        if output is None:
+            self.stdscr.noutrefresh()
+            curses.doupdate()
+        elif output.claim():
+            self.stdscr.noutrefresh()
+            # Auch ausgelassene Frames stecken im Update; passt es nicht sicher in die
+            # Pipe, direkt schreiben (blockiert, aber ohne sich selbst auszusperren)
+            cells = min(self.unsent + self.width, self.width * self.height)
+            if output.fits(cells * self.CELL_BYTES):
+                with output.redirect():
+                    curses.doupdate()
+            else:
+                curses.doupdate()
+            self.unsent = 0
+        # Sonst hängt das Terminal hinterher: curses überträgt beim nächsten Mal alles
 
     def draw_banner(self):
         """Zeigt den Matrix-Banner in der Mitte"""
@@ -122,11 +198,12 @@ class MatrixRain:
         ]
 
         start_y = self.height // 2 - 2
+        self.unsent += len(banner) * len(banner[0])
         for i, line in enumerate(banner):
             x = max(0, (self.width - len(line)) // 2)
             try:
                 self.stdscr.addstr(start_y + i, x, line,
-                                 curses.color_pair(2) | curses.A_BOLD)
+                                 self.attrs[2])
             except curses.error:
                 pass
 
@@ -149,14 +226,14 @@ class MatrixRain:
             x = max(0, (self.width - len(line)) // 2)
             try:
                 self.stdscr.addstr(start_y + i, x, line,
-                                 curses.color_pair(2) | curses.A_BOLD)
+                                 self.attrs[2])
             except curses.error:
                 pass
 
         self.stdscr.refresh()
         self.stdscr.timeout(-1)  # Blocking input
         self.stdscr.getch()
-        self.stdscr.timeout(50)  # Zurück zu non-blocking
+        self.stdscr.timeout(0)  # Zurück zu non-blocking
 
     def run(self):
         """Hauptschleife"""
@@ -165,51 +242,102 @@ class MatrixRain:
             self.show_intro()
 
             show_banner_until = time.time() + 3  # Banner für 3 Sekunden
+            banner_visible = True
+            self.reset_frame()
+            scheduler = FrameScheduler(self.TICK_RATE, self.RENDER_RATE)
+            self.perf = perf = PerfStats()  # Messung beginnt mit der Hauptschleife
+            # Tasten über ein eigenes 1x1-Fenster: getch() auf stdscr würde geänderte
+            # Zellen direkt (an der Pipe vorbei) ausgeben
+            keys = curses.newwin(1, 1, 0, 0)
+            keys.keypad(True)
+            keys.timeout(0)
+            keys.refresh()
+            self.output = perf.output = PipeWriter(sys.stdout.fileno())
+            hud_frames = max(1, int(self.RENDER_RATE * self.HUD_INTERVAL))
+            governor = perf.governor = (QualityGovernor(1.0 / self.RENDER_RATE)
+                                        if self.adaptive else None)
+            dropped = 0
 
             while True:
                 # Check für Tastendruck (ESC oder q zum Beenden)
-                key = self.stdscr.getch()
+                key = keys.getch()
                 if key in (27, ord('q'), ord('Q')):  # ESC oder q
                     break
-
-                # Bildschirm leicht dimmen (Spur-Effekt)
-                self.stdscr.clear()
-
-                # Aktualisiere und zeichne alle Tropfen
-                for drop in self.drops:
-                    self.update_drop(drop)
-                    self.draw_drop(drop)
-
-                # Zeige Banner am Anfang
-                if time.time() < show_banner_until:
-                    self.draw_banner()
-
-                # Zeige Tastenkombination zum Beenden
-                try:
-                    exit_text = "Press 'q' or ESC to exit"
-                    self.stdscr.addstr(self.height - 1,
-                                     max(0, self.width - len(exit_text) - 2),
-                                     exit_text,
-                                     curses.color_pair(5))
-                except curses.error:
-                    pass
-
-                self.stdscr.refresh()
-                time.sleep(0.03)  # ~30 FPS
+                if key == curses.KEY_RESIZE:  # ncurses meldet SIGWINCH als Taste
+                    self.resize()
+
+                # Simulation im festen Takt, gezeichnet wird nur der neueste Stand
+                ticks = scheduler.wait()
+                perf.mark('sleep')
+                for _ in range(ticks):
+                    self.update_drops()
+                perf.mark('simulate')
+                self.draw_frame()
+
+                # Zeige Banner am Anfang, danach einmal alles neu zeichnen
+                if banner_visible:
+                    if time.time() < show_banner_until:
+                        self.draw_banner()
+                    else:
+                        banner_visible = False
+                        self.reset_frame()
+
+                if self.hud and perf.frames % hud_frames == 0:
+                    self.status_drawn = False
+                if not self.status_drawn:
+                    self.draw_status()
+                perf.mark('encode')
+
+                self.present()
+                perf.mark('write')
+                perf.end_frame(scheduler.skipped)
+
+                if governor is not None:
+                    # Zu langsame Frames und von der Ausgabe verworfene zählen als Überlast
+                    stalled = self.output.dropped != dropped
+                    dropped = self.output.dropped
+                    level = governor.observe(perf.last_frame_time, stalled)
+                    if level != self.quality:
+                        self.quality = level
+                        apply_quality(self.field, self.frame, level)
 
         except KeyboardInterrupt:
             pass
+        finally:
+            if self.output is not None:
+                self.output.close()  # Vor endwin(): Rest der Pipe ans Terminal
+                self.output = None
+            if self.recorder is not None:
+                self.recorder.close()
 
 
-def main(stdscr):
+def main(stdscr, record=None, hud=False, adaptive=True):
     """Main Entry Point für curses"""
-    matrix = MatrixRain(stdscr)
+    matrix = MatrixRain(stdscr, record, hud, adaptive)
     matrix.run()
+    return matrix
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Matrix Digital Rain (curses)")
+    parser.add_argument('--record', metavar='FILE',
+                        help='Session aufzeichnen (Wiedergabe mit matrix_replay.py)')
+    parser.add_argument('--hud', action='store_true',
+                        help='Performance-HUD statt Hinweis zum Beenden anzeigen')
+    parser.add_argument('--perf-json', metavar='FILE',
+                        help='Performance-Werte beim Beenden als JSON speichern')
+    parser.add_argument('--seed', type=int,
+                        help='Fester Seed für reproduzierbare Läufe und Aufzeichnungen')
+    parser.add_argument('--fixed-quality', action='store_true',
+                        help='Qualität bei Überlast nicht automatisch senken')
+    args = parser.parse_args()
+    if args.seed is not None:
+        matrix_random.seed(args.seed)
+
     try:
-        curses.wrapper(main)
+        matrix = curses.wrapper(main, args.record, args.hud, not args.fixed_quality)
+        if args.perf_json:
+            matrix.perf.export(args.perf_json)
     except KeyboardInterrupt:
         pass
 
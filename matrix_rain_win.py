@@ -5,12 +5,21 @@ Klassischer Matrix-Style mit fallenden grünen Zeichen
 Funktioniert auf Windows, Linux und macOS
 """
 
+import argparse
 import os
 import sys
-import random
 import time
 import shutil
-from collections import deque
+import signal
+import unicodedata
+
+import matrix_random
+from matrix_ansi import AnsiEncoder, PROFILES, detect_profile
+from matrix_engine import (FrameBuffer, FrameScheduler, QualityGovernor, QUALITY_LEVELS,
+                           RainField, apply_quality)
+from matrix_output import FrameWriter
+from matrix_perf import PerfStats
+from matrix_record import Recorder
 
 
 class Colors:
@@ -38,10 +47,27 @@ class MatrixRain:
         "日月火水木金土"
     )
 
-    def __init__(self):
+    TICK_RATE = 25    # Simulationsschritte pro Sekunde (Animationsgeschwindigkeit)
+    RENDER_RATE = 25  # Frames pro Sekunde
+
+    STATUS = "Press Ctrl+C to exit | Matrix Digital Rain"
+    HUD_INTERVAL = 0.5  # Sekunden zwischen zwei HUD-Aktualisierungen
+
+    def __init__(self, record=None, hud=False, colors=None, adaptive=True):
         self.running = True
+        self.adaptive = adaptive  # Qualität bei Überlast automatisch senken (QualityGovernor)
+        self.quality = 0          # Aktuelle Stufe aus QUALITY_LEVELS
+        # Farbprofil (mono/16/256/truecolor), ohne Angabe aus TERM/COLORTERM
+        self.encoder = AnsiEncoder(colors or detect_profile())
+        self.hud = hud  # Performance-HUD statt Statuszeile
+        self.resize_pending = False  # Von SIGWINCH gesetzt, in der Hauptschleife angewendet
+        self.writer = None  # FrameWriter während run(), sonst wird direkt geschrieben
+        self.perf = PerfStats()
         self.setup_terminal()
         self.init_drops()
+        # Optional: Aufzeichnung für matrix_replay.py
+        self.recorder = Recorder(record, self.field.glyphs, self.RENDER_RATE) if record else None
+        self.reset_frame()
 
     def setup_terminal(self):
         """Terminal Setup"""
@@ -50,23 +76,40 @@ class MatrixRain:
             os.system('')  # Enable ANSI escape sequences
 
         # Terminal Größe
+        self.width, self.height = self.read_size()
+
+    def read_size(self):
+        """Aktuelle Terminal-Größe als (Breite, Höhe) ohne Statuszeile"""
         term_size = shutil.get_terminal_size()
-        self.width = term_size.columns
-        self.height = term_size.lines - 1  # Eine Zeile für Status
+        return term_size.columns, max(1, term_size.lines - 1)  # Eine Zeile für Status
+
+    def on_resize(self, signum, frame):
+        """SIGWINCH-Handler: merkt die Größenänderung nur vor"""
+        self.resize_pending = True
+
+    def resize(self):
+        """Passt Feld und Frame in-place an die Terminal-Größe an - ohne Clear und Subprozess"""
+        self.resize_pending = False
+        width, height = self.read_size()
+        if width == self.width and height == self.height:
+            return
+        old_height = self.height
+        self.width, self.height = width, height
+        # Bestehende Spalten behalten ihre Tropfen, nur die Ränder ändern sich
+        self.field.resize(width, height)
+        self.frame.resize(width, height)
+        self.field.touch_all()
+        if old_height < height:
+            # Die alte Statuszeile liegt jetzt im Regenbereich
+            self.write(f'\033[{old_height + 1};1H\033[2K')
+            self.frame.invalidate_row(old_height)
+        self.status_drawn = False
 
     def init_drops(self):
         """Initialisiere fallende Zeichen-Tropfen"""
-        self.drops = []
-        for x in range(self.width):
-            drop = {
-                'x': x,
-                'y': random.randint(-self.height, 0),
-                'speed': random.uniform(0.2, 1.0),
-                'length': random.randint(8, 25),
-                'chars': deque(maxlen=35),
-                'counter': 0.0
-            }
-            self.drops.append(drop)
+        self.field = RainField(self.width, self.height, self.CHARS,
+                               speed=(0.2, 1.0), length=(8, 25), trail=35,
+                               respawn=(-30, -5), flicker=0.03, flicker_skip=2)
 
     def clear_screen(self):
         """Bildschirm löschen"""
@@ -87,84 +130,85 @@ class MatrixRain:
         """Cursor bewegen"""
         print(f'\033[{y};{x}H', end='', flush=True)
 
-    def get_random_char(self):
-        """Gibt ein zufälliges Matrix-Zeichen zurück"""
-        return random.choice(self.CHARS)
-
-    def get_color(self, position, length):
-        """Gibt die Farbe basierend auf Position im Tropfen zurück"""
+    @staticmethod
+    def get_shade(position, length):
+        """Gibt die Farbstufe basierend auf Position im Tropfen zurück"""
         if position == length - 1:
-            return Colors.WHITE + Colors.BOLD  # Kopf: Weiß/Hell
+            return 1  # Kopf: Weiß/Hell
         elif position == length - 2:
-            return Colors.BRIGHT_GREEN + Colors.BOLD
+            return 2
         elif position > length - 5:
-            return Colors.BRIGHT_GREEN
+            return 3
         elif position > length - 10:
-            return Colors.GREEN
+            return 4
         elif position > length - 15:
-            return Colors.DARK_GREEN
+            return 5
         else:
-            return Colors.VERY_DARK_GREEN
+            return 6
+
+    def reset_frame(self):
+        """Vergisst den zuletzt ausgegebenen Frame (nach Clear/Resize)"""
+        self.frame = FrameBuffer(self.width, self.height, self.get_shade, self.field.trail)
+        self.frame.set_palette(QUALITY_LEVELS[self.quality]['palette'])
+        self.field.touch_all()
+        self.set_glyphs(self.field.glyphs)
+        self.status_drawn = False
+
+    def set_glyphs(self, glyphs):
+        """Glyph-Tabelle samt Cursor-Vorschub pro Code (doppelt breite Zeichen: 2)"""
+        self.glyphs = glyphs
+        self.advance = bytes(2 if unicodedata.east_asian_width(g) in 'WF' else 1
+                             for g in glyphs)
+        self.encoder.set_glyphs(glyphs, self.advance)
 
     def draw_frame(self):
-        """Zeichnet einen Frame"""
-        # Erstelle leeres Grid
-        grid = [[' ' for _ in range(self.width)] for _ in range(self.height)]
-        colors = [[Colors.NC for _ in range(self.width)] for _ in range(self.height)]
-
-        # Zeichne alle Tropfen ins Grid
-        for drop in self.drops:
-            length = len(drop['chars'])
-            for i, (char, y_pos) in enumerate(drop['chars']):
-                if 0 <= y_pos < self.height and 0 <= drop['x'] < self.width:
-                    grid[y_pos][drop['x']] = char
-                    colors[y_pos][drop['x']] = self.get_color(i, length)
-
-        # Ausgabe
-        self.move_cursor(0, 0)
-        output = []
-        for y in range(self.height):
-            line = ''
-            current_color = Colors.NC
-            for x in range(self.width):
-                char = grid[y][x]
-                color = colors[y][x]
-                if color != current_color:
-                    line += color
-                    current_color = color
-                line += char
-            output.append(line + Colors.NC)
-
-        print('\n'.join(output), flush=True)
-
-        # Status-Zeile
-        status = f"{Colors.DARK_GREEN}Press Ctrl+C to exit | Matrix Digital Rain{Colors.NC}"
-        print(status.ljust(self.width), end='', flush=True)
+        """Zeichnet nur die seit dem letzten Frame geänderten Zellen"""
+        if self.writer is not None and not self.writer.claim():
+            # Ausgabe hängt hinterher: der nächste Frame bringt alle Änderungen mit,
+            # die Aufzeichnung bekommt einen leeren Frame (Zeitachse bleibt erhalten)
+            if self.recorder is not None:
+                self.recorder.add([], self.frame)
+            return
+        changes = self.frame.update(self.field, self.field.take_dirty())
+        if self.recorder is not None:
+            self.recorder.add(changes, self.frame)
+        self.perf.mark('compose')
+        self.render(changes, self.frame)
+
+    def render(self, changes, screen=None):
+        """Gibt geänderte Zellen (y, x, code, color) mit einem einzigen write aus;
+        screen: FrameBuffer mit dem neuen Bildinhalt (erlaubt kürzere Sprünge)"""
+        # Statuszeile nur einmal zeichnen (HUD: bei jeder Aktualisierung)
+        status = None
+        if not self.status_drawn:
+            status = (self.height, self.status_text()[:self.width - 1].ljust(self.width - 1))
+            self.status_drawn = True
+
+        perf = self.perf
+        perf.cells += len(changes)
+        if changes or status:
+            # Zeilenweise sortiert; Cursor und Farbe nur bei Bedarf, jeweils die kürzeste Sequenz
+            text = self.encoder.encode(sorted(changes), self.width, screen, status)
+            perf.bytes += len(text.encode('utf-8'))
+            perf.mark('encode')
+            self.write(text)
+            perf.mark('write')
+
+    def status_text(self):
+        """Inhalt der Statuszeile: Hinweis zum Beenden oder Performance-HUD"""
+        return self.perf.hud() if self.hud else self.STATUS
+
+    def write(self, text):
+        """Schreibt einen fertigen Frame ans Terminal (über den Writer-Thread, falls aktiv)"""
+        if self.writer is not None:
+            self.writer.submit(text)
+        else:
+            sys.stdout.write(text)
+            sys.stdout.flush()
 
     def update_drops(self):
         """Aktualisiert alle Tropfen"""
-        for drop in self.drops:
-            drop['counter'] += drop['speed']
-
-            if drop['counter'] >= 1.0:
-                drop['counter'] = 0.0
-                drop['y'] += 1
-
-                # Neues Zeichen am Kopf
-                drop['chars'].append((self.get_random_char(), drop['y']))
-
-                # Manchmal Zeichen ändern (Flackern)
-                if random.random() < 0.03 and len(drop['chars']) > 2:
-                    idx = random.randint(0, len(drop['chars']) - 3)
-                    old_char, y_pos = drop['chars'][idx]
-                    drop['chars'][idx] = (self.get_random_char(), y_pos)
-
-            # Reset wenn komplett durch
-            if drop['y'] > self.height + drop['length']:
-                drop['y'] = random.randint(-30, -5)
-                drop['speed'] = random.uniform(0.2, 1.0)
-                drop['length'] = random.randint(8, 25)
-                drop['chars'].clear()
+        self.field.step()
 
     def show_intro(self):
         """Zeigt Intro"""
@@ -197,44 +241,67 @@ class MatrixRain:
 
     def run(self):
         """Hauptschleife"""
+        previous_winch = None  # Vorheriger SIGWINCH-Handler, wird am Ende wiederhergestellt
         try:
             self.show_intro()
             self.clear_screen()
             self.hide_cursor()
+            self.reset_frame()
 
+            scheduler = FrameScheduler(self.TICK_RATE, self.RENDER_RATE)
+            self.perf = perf = PerfStats()  # Messung beginnt mit der Hauptschleife
+            # Ab hier gehört das Terminal dem Writer-Thread
+            self.writer = perf.output = FrameWriter(sys.stdout)
+            hud_frames = max(1, int(self.RENDER_RATE * self.HUD_INTERVAL))
             frame_count = 0
-            start_time = time.time()
+            governor = perf.governor = (QualityGovernor(1.0 / self.RENDER_RATE)
+                                        if self.adaptive else None)
+            dropped = 0
+            # Größenänderungen per SIGWINCH, sonst (Windows) per Abfrage alle 50 Frames
+            winch = hasattr(signal, 'SIGWINCH')
+            if winch:
+                previous_winch = signal.signal(signal.SIGWINCH, self.on_resize)
 
             while True:
-                frame_start = time.time()
-
-                # Update und Draw
-                self.update_drops()
+                # Simulation im festen Takt, gezeichnet wird nur der neueste Stand
+                ticks = scheduler.wait()
+                perf.mark('sleep')
+                for _ in range(ticks):
+                    self.update_drops()
+                perf.mark('simulate')
                 self.draw_frame()
+                perf.end_frame(scheduler.skipped)
 
-                # FPS Control (~20-25 FPS für flüssige Animation)
-                frame_time = time.time() - frame_start
-                target_frame_time = 1.0 / 25.0  # 25 FPS
-                if frame_time < target_frame_time:
-                    time.sleep(target_frame_time - frame_time)
+                if governor is not None:
+                    # Zu langsame Frames und von der Ausgabe verworfene zählen als Überlast
+                    stalled = self.writer.dropped != dropped
+                    dropped = self.writer.dropped
+                    level = governor.observe(perf.last_frame_time, stalled)
+                    if level != self.quality:
+                        self.quality = level
+                        apply_quality(self.field, self.frame, level)
 
                 frame_count += 1
+                if self.hud and frame_count % hud_frames == 0:
+                    self.status_drawn = False
 
-                # Terminal-Größe neu checken alle 50 Frames
-                if frame_count % 50 == 0:
-                    old_width, old_height = self.width, self.height
-                    self.setup_terminal()
-                    if old_width != self.width or old_height != self.height:
-                        self.init_drops()
-                        self.clear_screen()
+                if self.resize_pending or (not winch and frame_count % 50 == 0):
+                    self.resize()
 
         except KeyboardInterrupt:
             pass
         finally:
+            if previous_winch is not None:
+                signal.signal(signal.SIGWINCH, previous_winch)
             self.cleanup()
 
     def cleanup(self):
         """Aufräumen"""
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
         self.show_cursor()
         self.clear_screen()
         print(f"\n{Colors.BRIGHT_GREEN}Disconnecting from the Matrix...{Colors.NC}")
@@ -243,6 +310,23 @@ class MatrixRain:
 
 def main():
     """Main Entry Point"""
+    parser = argparse.ArgumentParser(description="Matrix Digital Rain")
+    parser.add_argument('--record', metavar='FILE',
+                        help='Session aufzeichnen (Wiedergabe mit matrix_replay.py)')
+    parser.add_argument('--hud', action='store_true',
+                        help='Performance-HUD statt Statuszeile anzeigen')
+    parser.add_argument('--perf-json', metavar='FILE',
+                        help='Performance-Werte beim Beenden als JSON speichern')
+    parser.add_argument('--seed', type=int,
+                        help='Fester Seed für reproduzierbare Läufe und Aufzeichnungen')
+    parser.add_argument('--colors', choices=sorted(PROFILES),
+                        help='Farbprofil erzwingen (Standard: aus TERM/COLORTERM erkannt)')
+    parser.add_argument('--fixed-quality', action='store_true',
+                        help='Qualität bei Überlast nicht automatisch senken')
+    args = parser.parse_args()
+    if args.seed is not None:
+        matrix_random.seed(args.seed)
+
     # Check für Windows Terminal Features
     if sys.platform == 'win32':
         # Windows Terminal erkennen
@@ -251,8 +335,11 @@ def main():
             print(f"{Colors.YELLOW}  Download: https://aka.ms/terminal{Colors.NC}\n")
             time.sleep(2)
 
-    matrix = MatrixRain()
+    matrix = MatrixRain(record=args.record, hud=args.hud, colors=args.colors,
+                        adaptive=not args.fixed_quality)
     matrix.run()
+    if args.perf_json:
+        matrix.perf.export(args.perf_json)
 
 
 if __name__ == "__main__":
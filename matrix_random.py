@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Matrix Random Pool
+Gemeinsame Zufallsquelle für Rain und Monitor: Glyph-Codes, Ganzzahlen und
+Floats werden blockweise aus getrandbits erzeugt und billig ausgegeben;
+dazu Massen-Generatoren für IPs, Ports, PIDs und Hashes
+"""
+
+import ipaddress
+import random
+import sys
+from array import array
+
+BLOCK = 4096  # Werte pro Nachfüllen
+
+_pairs = None  # 16-Bit-Wert -> "a.b" (zwei Oktette), bei erster Nutzung aufgebaut
+
+
+def octet_pairs():
+    """Lookup-Tabellen für zwei Oktette: ("a.b.", "a.b") je 16-Bit-Wert in Speicher-Reihenfolge"""
+    global _pairs
+    if _pairs is None:
+        if sys.byteorder == 'little':
+            tail = [f'{w & 255}.{w >> 8}' for w in range(0x10000)]
+        else:
+            tail = [f'{w >> 8}.{w & 255}' for w in range(0x10000)]
+        _pairs = ([t + '.' for t in tail], tail)
+    return _pairs
+
+
+def subnet_tables(network):
+    """translate-Tabellen je Oktett: Zufallsbyte -> Netzadresse | (Byte & Hostmaske)"""
+    net = ipaddress.IPv4Network(network, strict=False)
+    base, host = net.network_address.packed, net.hostmask.packed
+    return [bytes(b | (r & h) for r in range(256)) for b, h in zip(base, host)]
+
+
+class RandomPool:
+    """Blockweise vorab erzeugte Zufallswerte mit optionalem Seed"""
+
+    def __init__(self, seed=None, block=BLOCK):
+        self.block = block
+        self.seed(seed)
+
+    def seed(self, value=None):
+        """Setzt den Generator neu und verwirft alle gepufferten Werte"""
+        self.rng = random.Random(value)
+        self.code_buffers = {}   # n -> (bytes, Position)
+        self.tables = {}         # n -> (translate-Tabelle, zu verwerfende Bytes)
+        self.words_buffer, self.words_pos = array('H'), 0
+        self.ints, self.ints_pos = array('I'), 0
+        self.floats, self.floats_pos = [], 0
+
+    def randbytes(self, n):
+        """n zufällige Bytes aus einem einzigen getrandbits-Aufruf"""
+        return self.rng.getrandbits(8 * n).to_bytes(n, 'little') if n else b''
+
+    def fill(self, typecode, count):
+        """array mit count zufälligen Werten"""
+        values = array(typecode)
+        values.frombytes(self.randbytes(count * values.itemsize))
+        return values
+
+    def codes(self, n, count):
+        """count gleichverteilte Codes 1..n (n < 256) als bytes"""
+        buffer, pos = self.code_buffers.get(n, (b'', 0))
+        if pos + count > len(buffer):
+            buffer = buffer[pos:] + self.fill_codes(n, max(self.block, count))
+            pos = 0
+        self.code_buffers[n] = (buffer, pos + count)
+        return buffer[pos:pos + count]
+
+    def fill_codes(self, n, count):
+        """Zufallsbytes per translate auf 1..n abbilden, Bytes oberhalb des
+        größten Vielfachen von n verwerfen (kein Modulo-Bias)"""
+        if n not in self.tables:
+            limit = 256 - 256 % n
+            self.tables[n] = (bytes(b % n + 1 if b < limit else 0 for b in range(256)),
+                              bytes(range(limit, 256)))
+        table, reject = self.tables[n]
+        result = b''
+        while len(result) < count:
+            # Etwas mehr ziehen, damit meist ein Durchlauf reicht
+            need = count - len(result)
+            result += self.randbytes(need + need // 4 + 16).translate(table, reject)
+        return result
+
+    def words(self, count):
+        """count zufällige 16-Bit-Werte als array('H')"""
+        pos = self.words_pos
+        if pos + count > len(self.words_buffer):
+            self.words_buffer = self.words_buffer[pos:] + self.fill('H', max(self.block, count))
+            pos = 0
+        self.words_pos = pos + count
+        return self.words_buffer[pos:pos + count]
+
+    def randint(self, a, b):
+        """Ganzzahl in [a, b]; Spannen bis 2^16 aus dem 32-Bit-Vorrat (Bias < 2^-16)"""
+        span = b - a + 1
+        if span > 0x10000:
+            return self.rng.randint(a, b)
+        i = self.ints_pos
+        if i >= len(self.ints):
+            self.ints = self.fill('I', self.block)
+            i = 0
+        self.ints_pos = i + 1
+        return a + self.ints[i] % span
+
+    def random(self):
+        """Float in [0, 1) mit 53 Bit Auflösung"""
+        i = self.floats_pos
+        if i >= len(self.floats):
+            scale = 2.0 ** -53
+            self.floats = [(v >> 11) * scale for v in self.fill('Q', self.block)]
+            i = 0
+        self.floats_pos = i + 1
+        return self.floats[i]
+
+    def uniform(self, a, b):
+        """Float zwischen a und b"""
+        return a + (b - a) * self.random()
+
+    def choice(self, seq):
+        """Zufälliges Element einer Sequenz"""
+        return seq[self.randint(0, len(seq) - 1)]
+
+    def ipv4(self):
+        """Zufällige IPv4-Adresse als Text"""
+        return '%d.%d.%d.%d' % tuple(self.words(2).tobytes())
+
+    # Massen-Generatoren: n Werte pro Aufruf, ohne Python-RNG-Aufruf pro Wert
+
+    def allocate(self, weights, n):
+        """Verteilt n Ziehungen auf gewichtete Klassen: (Anzahl je Klasse, Reihenfolge als bytes)"""
+        total = sum(weights)
+        if total <= 0 or min(weights) < 0:
+            raise ValueError("Gewichte müssen >= 0 sein, ihre Summe > 0")
+        if total > 255:  # Tabelle für codes() hat höchstens 255 Einträge
+            weights = [max(1, round(w * 255 / total)) if w else 0 for w in weights]
+            while sum(weights) > 255:
+                weights[weights.index(max(weights))] -= 1
+        table = bytes([0]) + bytes(i for i, w in enumerate(weights) for _ in range(w))
+        order = self.codes(len(table) - 1, n).translate(table.ljust(256, b'\0'))
+        return [order.count(i) for i in range(len(weights))], order
+
+    def ipv4_many(self, n, subnets=None):
+        """n IPv4-Adressen; subnets: [(CIDR, Gewicht), ...] statt gleichverteilt"""
+        if subnets:
+            counts, order = self.allocate([w for _, w in subnets], n)
+            blocks = [iter(self.ipv4_block(count, net))
+                      for (net, _), count in zip(subnets, counts)]
+            return [next(blocks[i]) for i in order]
+        return self.ipv4_block(n)
+
+    def ipv4_block(self, n, network=None):
+        """n IPv4-Adressen (aus network) über 16-Bit-Lookup-Tabellen"""
+        raw = self.randbytes(4 * n)
+        if network is not None:
+            octets = bytearray(raw)
+            for k, table in enumerate(subnet_tables(network)):
+                octets[k::4] = raw[k::4].translate(table)
+            raw = octets
+        words = array('H')
+        words.frombytes(raw)
+        head, tail = octet_pairs()
+        return [head[a] + tail[b] for a, b in zip(words[0::2], words[1::2])]
+
+    def integers(self, n, a, b):
+        """n Ganzzahlen in [a, b] (Bias < 2^-16 bei Spannen bis 2^16, sonst < 2^-32)"""
+        span = b - a + 1
+        values = self.fill('I' if span <= 0x10000 else 'Q', n)
+        return [a + v % span for v in values]
+
+    def ports(self, n, ranges=None):
+        """n Ports als array('H'); ranges: [((von, bis), Gewicht), ...] statt 1..65535"""
+        if ranges:
+            counts, order = self.allocate([w for _, w in ranges], n)
+            blocks = [iter(self.integers(count, low, high))
+                      for ((low, high), _), count in zip(ranges, counts)]
+            return array('H', [next(blocks[i]) for i in order])
+        raw = bytearray(self.randbytes(2 * n))
+        # Port 0 neu ziehen (etwa jeder 65536. Wert), gesucht wird auf den Rohdaten
+        pos = raw.find(b'\0\0')
+        while pos >= 0:
+            if pos % 2 == 0:
+                raw[pos:pos + 2] = self.randint(1, 65535).to_bytes(2, sys.byteorder)
+            pos = raw.find(b'\0\0', pos + 1)
+        values = array('H')
+        values.frombytes(raw)
+        return values
+
+    def pids(self, n, low=1000, high=9999):
+        """n Prozess-IDs als array('I')"""
+        return array('I', self.integers(n, low, high))
+
+    def hashes(self, n, size=32):
+        """n Hex-Strings aus je size Zufallsbytes (Standard: Länge eines SHA256)"""
+        text = self.randbytes(size * n).hex()
+        width = 2 * size
+        return [text[i:i + width] for i in range(0, len(text), width)]
+
+
+# Gemeinsamer Pool aller Module; seed() macht Läufe reproduzierbar
+pool = RandomPool()
+
+
+def seed(value=None):
+    """Setzt den gemeinsamen Pool (und das random-Modul) auf einen Seed"""
+    random.seed(value)
+    pool.seed(value)
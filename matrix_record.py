@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Matrix Recording
+Kompaktes Binärformat für Rain-Sessions: pro Frame die geänderten Zellen,
+periodisch Keyframes, Index am Dateiende - lesbar über mmap mit Sprung zu jedem Frame
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+
+MAGIC = b'MXRC'
+INDEX_MAGIC = b'MXIX'
+VERSION = 1
+
+# Dateikopf: Magic, Version, Frames pro Sekunde, Keyframe-Abstand, Länge der Glyph-Tabelle
+HEADER = struct.Struct('<4sBHHI')
+# Keyframe: b'K', Breite, Höhe, danach Glyph- und Farbebene (je Breite * Höhe Bytes).
+# b'K' ist selbst ein Frame (neue Geometrie), b'S' nur Sprungziel nach dem Delta davor
+KEYFRAME = struct.Struct('<cHH')
+# Delta: b'D', Anzahl Zellen, danach Positionen (y * Breite + x), Glyph-Codes, Farbstufen
+DELTA = struct.Struct('<cI')
+# Index: Anzahl Frames, Anzahl Keyframes, danach Offsets der Frames, Keyframe-Nummern und -Offsets
+INDEX = struct.Struct('<II')
+TRAILER = struct.Struct('<Q4s')
+
+
+def position_type(width, height):
+    """Positionen passen bis 65536 Zellen in 2 Bytes"""
+    return 'H' if width * height <= 0x10000 else 'I'
+
+
+def little_endian(values):
+    """Array in Little-Endian-Bytes (Dateiformat)"""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def from_little_endian(typecode, data):
+    """Array aus Little-Endian-Bytes"""
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+class Recorder:
+    """Schreibt die Änderungen eines FrameBuffers Frame für Frame in eine Datei"""
+
+    def __init__(self, path, glyphs, fps, keyframe_interval=None):
+        self.file = open(path, 'wb')
+        self.keyframe_interval = keyframe_interval or fps * 2
+        blob = ''.join(glyphs).encode('utf-8')
+        self.file.write(HEADER.pack(MAGIC, VERSION, fps, self.keyframe_interval, len(blob)))
+        self.file.write(blob)
+        self.offset = HEADER.size + len(blob)
+        self.frames = array('Q')          # Offset jedes Frames
+        self.keyframes = array('I')       # Frame-Nummern mit Keyframe
+        self.keyframe_offsets = array('Q')
+        self.last_frame = None
+        self.last_size = None
+
+    def add(self, changes, frame):
+        """Schreibt einen Frame aus den Änderungen (y, x, code, color) von frame.update"""
+        n = len(self.frames)
+        self.frames.append(self.offset)
+        width, height = frame.width, frame.height
+        if frame is not self.last_frame or (width, height) != self.last_size:
+            # Neuer FrameBuffer oder neue Größe: dieser Frame ist ein reiner Keyframe
+            self.last_frame = frame
+            self.last_size = (width, height)
+            self.write_keyframe(n, frame, b'K')
+            return
+
+        changes.sort()
+        positions = array(position_type(width, height), [y * width + x for y, x, _, _ in changes])
+        self.write(DELTA.pack(b'D', len(changes)))
+        self.write(little_endian(positions))
+        self.write(bytes([c[2] for c in changes]))
+        self.write(bytes([c[3] for c in changes]))
+        if n % self.keyframe_interval == 0:
+            self.write_keyframe(n, frame, b'S')
+
+    def write_keyframe(self, n, frame, kind):
+        """Vollständiger Bildinhalt nach Frame n"""
+        self.keyframes.append(n)
+        self.keyframe_offsets.append(self.offset)
+        self.write(KEYFRAME.pack(kind, frame.width, frame.height))
+        self.write(frame.front_glyph)
+        self.write(frame.front_color)
+
+    def write(self, data):
+        self.file.write(data)
+        self.offset += len(data)
+
+    def close(self):
+        """Schreibt den Index und schließt die Datei"""
+        if self.file.closed:
+            return
+        index = self.offset
+        self.write(INDEX.pack(len(self.frames), len(self.keyframes)))
+        self.write(little_endian(self.frames))
+        self.write(little_endian(self.keyframes))
+        self.write(little_endian(self.keyframe_offsets))
+        self.write(TRAILER.pack(index, INDEX_MAGIC))
+        self.file.close()
+
+
+class Recording:
+    """Liest eine Aufzeichnung über mmap; Frames per Index direkt adressierbar"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.fps, self.keyframe_interval, blob = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Keine Matrix-Aufzeichnung (Version {VERSION}): {path}")
+        start = HEADER.size + blob
+        self.glyphs = tuple(self.data[HEADER.size:start].decode('utf-8'))
+        if not self.load_index():
+            self.scan(start)  # Abgebrochene Aufnahme ohne Index
+        # Geometrie ab jedem Keyframe
+        self.sizes = [KEYFRAME.unpack_from(self.data, offset)[1:]
+                      for offset in self.keyframe_offsets]
+
+    def __len__(self):
+        return len(self.frames)
+
+    def load_index(self):
+        """Liest den Index über den Trailer am Dateiende"""
+        data = self.data
+        if len(data) < TRAILER.size:
+            return False
+        index, magic = TRAILER.unpack_from(data, len(data) - TRAILER.size)
+        if magic != INDEX_MAGIC:
+            return False
+        frames, keyframes = INDEX.unpack_from(data, index)
+        offset = index + INDEX.size
+        self.frames = from_little_endian('Q', data[offset:offset + 8 * frames])
+        offset += 8 * frames
+        self.keyframes = from_little_endian('I', data[offset:offset + 4 * keyframes])
+        offset += 4 * keyframes
+        self.keyframe_offsets = from_little_endian('Q', data[offset:offset + 8 * keyframes])
+        return True
+
+    def scan(self, offset):
+        """Baut den Index durch Ablaufen aller Einträge neu auf"""
+        data, end = self.data, len(self.data)
+        self.frames, self.keyframes, self.keyframe_offsets = array('Q'), array('I'), array('Q')
+        width = height = 0
+        while offset + DELTA.size <= end:
+            kind = data[offset:offset + 1]
+            if kind in (b'K', b'S'):
+                _, width, height = KEYFRAME.unpack_from(data, offset)
+                size = KEYFRAME.size + 2 * width * height
+                if offset + size > end:
+                    break
+                if kind == b'K':
+                    self.frames.append(offset)
+                self.keyframes.append(len(self.frames) - 1)
+                self.keyframe_offsets.append(offset)
+            elif kind == b'D':
+                _, count = DELTA.unpack_from(data, offset)
+                size = DELTA.size + count * (array(position_type(width, height)).itemsize + 2)
+                if offset + size > end:
+                    break
+                self.frames.append(offset)
+            else:
+                break
+            offset += size
+
+    def size_at(self, n):
+        """(Breite, Höhe) bei Frame n"""
+        return self.sizes[bisect_right(self.keyframes, n) - 1]
+
+    def frame(self, n):
+        """Frame n: ('K', Breite, Höhe, Glyphen, Farben) oder ('D', Positionen, Glyphen, Farben)"""
+        data, offset = self.data, self.frames[n]
+        if data[offset:offset + 1] == b'K':
+            _, width, height = KEYFRAME.unpack_from(data, offset)
+            offset += KEYFRAME.size
+            size = width * height
+            return ('K', width, height, data[offset:offset + size],
+                    data[offset + size:offset + 2 * size])
+        _, count = DELTA.unpack_from(data, offset)
+        offset += DELTA.size
+        typecode = position_type(*self.size_at(n))
+        end = offset + count * array(typecode).itemsize
+        positions = from_little_endian(typecode, data[offset:end])
+        return ('D', positions, data[end:end + count], data[end + count:end + 2 * count])
+
+    def seek(self, n):
+        """Bildinhalt nach Frame n: (Breite, Höhe, Glyphen, Farben) als bytearrays"""
+        i = bisect_right(self.keyframes, n) - 1
+        offset = self.keyframe_offsets[i]
+        _, width, height = KEYFRAME.unpack_from(self.data, offset)
+        offset += KEYFRAME.size
+        size = width * height
+        glyph = bytearray(self.data[offset:offset + size])
+        color = bytearray(self.data[offset + size:offset + 2 * size])
+        for k in range(self.keyframes[i] + 1, n + 1):
+            _, positions, codes, colors = self.frame(k)
+            for p, g, c in zip(positions, codes, colors):
+                glyph[p] = g
+                color[p] = c
+        return width, height, glyph, color
+
+    def close(self):
+        self.data.close()
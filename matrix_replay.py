@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Matrix Replay
+Spielt mit --record aufgezeichnete Rain-Sessions ab - ohne Simulation,
+mit Sprung zu beliebigen Frames und wählbarer Geschwindigkeit
+"""
+
+import argparse
+import os
+import sys
+
+from matrix_engine import FrameScheduler
+from matrix_rain_win import MatrixRain
+from matrix_record import Recording
+
+
+class ReplayRain(MatrixRain):
+    """Gibt eine Aufzeichnung über die ANSI-Ausgabe von matrix_rain_win wieder"""
+
+    STATUS = "Press Ctrl+C to exit | Matrix Replay"
+    MAX_RENDER_RATE = 60  # Bei schnellem Vorlauf werden Frames zusammengefasst
+
+    def __init__(self, recording, speed=1.0, start=0, end=None, loop=False):
+        self.recording = recording
+        self.speed = speed  # 0 = so schnell wie möglich, jeder Frame einzeln
+        self.start = min(start, len(recording) - 1)
+        self.end = len(recording) if end is None else min(end, len(recording))
+        self.loop = loop
+        super().__init__()
+
+    def init_drops(self):
+        """Keine Simulation - die Zellen kommen aus der Aufzeichnung"""
+        self.field = None
+
+    def reset_frame(self):
+        """Übernimmt die Glyph-Tabelle der Aufzeichnung"""
+        self.set_glyphs(self.recording.glyphs)
+        self.status_drawn = False
+        self.cells = {}      # Position -> (Code, Farbe), gesammelt bis zur nächsten Ausgabe
+        self.columns = self.rows = 1  # Größe der Aufzeichnung im aktuellen Abschnitt
+
+    def show(self, width, height, glyph, color):
+        """Zeichnet einen kompletten Bildinhalt (Sprung, Keyframe)"""
+        sys.stdout.write('\033[2J')
+        self.status_drawn = False
+        self.cells.clear()
+        self.columns, self.rows = width, height
+        self.render(self.visible([(i // width, i % width, g, c)
+                                  for i, (g, c) in enumerate(zip(glyph, color)) if g]))
+
+    def seek(self, n):
+        """Springt zu Frame n (nächster Keyframe davor plus Deltas)"""
+        self.show(*self.recording.seek(n))
+
+    def play_frame(self, n):
+        """Übernimmt die Änderungen von Frame n"""
+        record = self.recording.frame(n)
+        if record[0] == 'K':
+            self.show(*record[1:])
+        else:
+            _, positions, codes, colors = record
+            self.cells.update(zip(positions, zip(codes, colors)))
+
+    def flush(self):
+        """Gibt alle gesammelten Änderungen als einen Frame aus"""
+        width = self.columns
+        changes = [(p // width, p % width, g, c) for p, (g, c) in self.cells.items()]
+        self.cells.clear()
+        self.render(self.visible(changes))
+
+    def visible(self, changes):
+        """Schneidet auf die aktuelle Terminal-Größe zu"""
+        if self.columns <= self.width and self.rows <= self.height:
+            return changes
+        width, height = self.width, self.height
+        return [change for change in changes if change[0] < height and change[1] < width]
+
+    def run(self):
+        """Wiedergabe-Schleife"""
+        try:
+            self.hide_cursor()
+            n = self.start
+            self.seek(n)
+            rate = self.recording.fps * self.speed
+            scheduler = None
+            if rate > 0:
+                scheduler = FrameScheduler(rate, min(rate, self.MAX_RENDER_RATE))
+
+            while True:
+                for _ in range(scheduler.wait() if scheduler else 1):
+                    n += 1
+                    if n < self.end:
+                        self.play_frame(n)
+                    elif self.loop:
+                        n = self.start
+                        self.seek(n)
+                    else:
+                        self.flush()
+                        return
+                self.flush()
+
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.cleanup()
+
+
+def describe(path, recording):
+    """Kurzinfo zu einer Aufzeichnung"""
+    frames = len(recording)
+    width, height = recording.size_at(0)
+    size = os.path.getsize(path)
+    print(f"{path}: {width}x{height}, {frames} Frames, {recording.fps} FPS, "
+          f"{frames / recording.fps:.1f}s, {len(recording.keyframes)} Keyframes, "
+          f"{size / 1024:.1f} KiB ({size / max(frames, 1):.0f} B/Frame)")
+
+
+def main():
+    """Main Entry Point"""
+    parser = argparse.ArgumentParser(description="Matrix Replay")
+    parser.add_argument('file', help='Aufzeichnung von matrix_rain.py/matrix_rain_win.py --record')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='Wiedergabe-Geschwindigkeit (0 = so schnell wie möglich)')
+    parser.add_argument('--start', type=float, default=0.0, help='Startpunkt in Sekunden')
+    parser.add_argument('--end', type=float, help='Endpunkt in Sekunden')
+    parser.add_argument('--loop', action='store_true', help='Endlos wiederholen (Kiosk)')
+    parser.add_argument('--info', action='store_true', help='Nur Kurzinfo ausgeben')
+    args = parser.parse_args()
+
+    recording = Recording(args.file)
+    if not len(recording):
+        parser.error(f"Aufzeichnung ist leer: {args.file}")
+    if args.info:
+        describe(args.file, recording)
+        return
+
+    fps = recording.fps
+    end = int(args.end * fps) if args.end is not None else None
+    player = ReplayRain(recording, speed=args.speed, start=int(args.start * fps),
+                        end=end, loop=args.loop)
+    player.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Matrix Rain Server
+Verteilt den Digital Rain per TCP oder Unix-Socket an beliebig viele Zuschauer
+(telnet oder nc): eine Simulation und eine Kodierung pro Terminal-Größe,
+langsame Clients springen zum nächsten Keyframe statt unbegrenzt zu puffern
+"""
+
+import argparse
+import asyncio
+import os
+import re
+
+from matrix_ansi import PROFILES
+from matrix_engine import FrameScheduler
+from matrix_rain_win import MatrixRain
+
+# Telnet: IAC DO NAWS (Fenstergröße melden) und die Antwort IAC SB NAWS <B> <B> <H> <H> IAC SE
+DO_NAWS = b'\xff\xfd\x1f'
+NAWS = re.compile(rb'\xff\xfa\x1f((?:\xff\xff|[^\xff]){4})\xff\xf0')
+TELNET_COMMAND = re.compile(rb'\xff\xfa.*?\xff\xf0|\xff[\xfb-\xfe].', re.S)
+# Angefangene Sequenz am Ende eines Lesevorgangs (Rest folgt im nächsten)
+TELNET_PARTIAL = re.compile(rb'\xff(?:\xfa(?:(?!\xff\xf0).)*|[\xfb-\xfe])?\Z', re.S)
+QUIT = (b'q', b'Q', b'\x03', b'\xff\xf4')  # q, Ctrl+C (nc) bzw. IAC IP (telnet)
+
+ENTER = b'\033[0m\033[?25l\033[2J'
+LEAVE = b'\033[0m\033[2J\033[H\033[?25h'
+
+
+def split_keys(data):
+    """Tasten ohne Telnet-Verhandlung und der zurückgehaltene Rest einer
+    angefangenen Sequenz (zu lange Reste werden verworfen)"""
+    keys = TELNET_COMMAND.sub(b'', data)
+    partial = TELNET_PARTIAL.search(keys)
+    if partial is None:
+        return keys, b''
+    rest = keys[partial.start():]
+    return keys[:partial.start()], rest if len(rest) <= 64 else b''
+
+
+class BroadcastRain(MatrixRain):
+    """Rain ohne Terminal: jeder Frame wird einmal kodiert und als bytes geliefert"""
+
+    STATUS = "Press q to disconnect | Matrix Rain Broadcast"
+
+    def __init__(self, width, height, colors='256'):
+        self.size = (width, height)
+        self.output = []
+        self.frames = 0
+        self.cached_keyframe = (-1, b'')
+        super().__init__(colors=colors)
+
+    def setup_terminal(self):
+        """Größe kommt vom Client (NAWS) statt vom lokalen Terminal"""
+        self.width, self.height = self.size[0], max(1, self.size[1] - 1)
+
+    def write(self, text):
+        self.output.append(text)
+
+    def take(self):
+        """Gesammelte Ausgabe als bytes"""
+        data = ''.join(self.output).encode()
+        self.output.clear()
+        return data
+
+    def next_frame(self, ticks):
+        """Simuliert ticks Schritte, liefert das Delta zum vorigen Frame"""
+        for _ in range(ticks):
+            self.update_drops()
+        self.draw_frame()
+        self.frames += 1
+        return self.take()
+
+    def keyframe(self):
+        """Kompletter Bildinhalt des aktuellen Frames (einmal pro Frame kodiert)"""
+        if self.cached_keyframe[0] != self.frames:
+            frame, width = self.frame, self.width
+            changes = [(i // width, i % width, g, c)
+                       for i, (g, c) in enumerate(zip(frame.front_glyph, frame.front_color)) if g]
+            self.status_drawn = False
+            self.render(changes)
+            self.cached_keyframe = (self.frames, ENTER + self.take())
+        return self.cached_keyframe[1]
+
+
+class Viewer:
+    """Ein verbundener Client"""
+
+    __slots__ = ('writer', 'transport', 'size', 'synced', 'channel')
+
+    def __init__(self, writer, size):
+        self.writer = writer
+        self.transport = writer.transport
+        self.size = size
+        self.synced = False  # False: wartet auf einen Keyframe
+        self.channel = None
+
+
+class Channel:
+    """Eine Simulation für alle Clients gleicher Größe"""
+
+    def __init__(self, server, size):
+        self.server = server
+        self.size = size
+        self.rain = BroadcastRain(*size, colors=server.colors)
+        self.viewers = set()
+        self.task = asyncio.ensure_future(self.run())
+
+    async def run(self):
+        """Frame-Schleife: einmal simulieren und kodieren, an alle verteilen"""
+        rain = self.rain
+        scheduler = FrameScheduler(rain.TICK_RATE, rain.RENDER_RATE)
+        while True:
+            await asyncio.sleep(scheduler.delay())
+            self.broadcast(rain.next_frame(scheduler.advance()))
+
+    def broadcast(self, data):
+        """Dasselbe bytes-Objekt an jeden Client; Nachzügler bekommen später einen Keyframe"""
+        high_water, low_water = self.server.HIGH_WATER, self.server.LOW_WATER
+        for viewer in self.viewers:
+            transport = viewer.transport
+            if transport.is_closing():
+                continue
+            backlog = transport.get_write_buffer_size()
+            if viewer.synced:
+                if backlog > high_water:
+                    viewer.synced = False  # Deltas ab jetzt verwerfen
+                    self.server.skipped += 1
+                elif data:
+                    transport.write(data)
+            elif backlog <= low_water:
+                transport.write(self.rain.keyframe())
+                viewer.synced = True
+
+    def close(self):
+        self.task.cancel()
+
+
+class RainServer:
+    """asyncio-Server: Clients nach Größe auf Kanäle verteilt"""
+
+    HIGH_WATER = 128 << 10  # Sendepuffer (Bytes), ab dem ein Client übersprungen wird
+    LOW_WATER = 16 << 10    # Darunter bekommt er wieder einen Keyframe
+    NAWS_TIMEOUT = 0.5      # Wartezeit auf die Fenstergröße eines telnet-Clients
+    MAX_SIZE = (500, 200)
+
+    def __init__(self, size=(80, 24), fixed=False, colors='256'):
+        self.default_size = size
+        self.fixed = fixed  # Fenstergröße der Clients ignorieren
+        self.colors = colors  # Farbprofil für alle Clients (TERM der Clients ist unbekannt)
+        self.channels = {}
+        self.viewers = set()
+        self.skipped = 0    # Übersprungene Frames (Nachzügler)
+
+    def clamp(self, width, height):
+        """Begrenzt gemeldete Größen (Schutz vor riesigen Kanälen)"""
+        max_width, max_height = self.MAX_SIZE
+        return max(10, min(width, max_width)), max(3, min(height, max_height))
+
+    def join(self, viewer, size):
+        """Hängt einen Client an den Kanal seiner Größe (bei Bedarf neu)"""
+        if viewer.channel is not None:
+            if viewer.channel.size == size:
+                return
+            self.leave(viewer)
+        channel = self.channels.get(size)
+        if channel is None:
+            channel = self.channels[size] = Channel(self, size)
+        viewer.size, viewer.channel, viewer.synced = size, channel, False
+        channel.viewers.add(viewer)
+
+    def leave(self, viewer):
+        """Löst einen Client vom Kanal; leere Kanäle werden beendet"""
+        channel = viewer.channel
+        if channel is None:
+            return
+        channel.viewers.discard(viewer)
+        viewer.channel = None
+        if not channel.viewers:
+            channel.close()
+            del self.channels[channel.size]
+
+    def window_size(self, buffer):
+        """Letzte NAWS-Meldung im Puffer als (Breite, Höhe) oder None"""
+        found = None
+        for match in NAWS.finditer(buffer):
+            payload = match.group(1).replace(b'\xff\xff', b'\xff')
+            found = self.clamp(int.from_bytes(payload[:2], 'big'), int.from_bytes(payload[2:], 'big'))
+        return found
+
+    async def handle(self, reader, writer):
+        """Ein Client: Größe aushandeln, Kanal beitreten, auf Ende oder Resize warten"""
+        viewer = Viewer(writer, self.default_size)
+        self.viewers.add(viewer)
+        buffer = b''
+        try:
+            if not self.fixed:
+                writer.write(DO_NAWS)  # nc zeigt die drei Bytes nicht an, der Keyframe löscht
+                try:
+                    while self.window_size(buffer) is None:
+                        data = await asyncio.wait_for(reader.read(256), self.NAWS_TIMEOUT)
+                        if not data:
+                            return
+                        buffer += data
+                except asyncio.TimeoutError:
+                    pass
+            self.join(viewer, self.window_size(buffer) or self.default_size)
+
+            _, pending = split_keys(buffer)
+            buffer = pending  # Die schon ausgewertete Größe nicht erneut melden
+            while True:
+                data = await reader.read(256)
+                # Eine über zwei Lesevorgänge geteilte Sequenz (z.B. NAWS mit Breite 'q')
+                # ist keine Taste
+                keys, pending = split_keys(pending + data)
+                if not data or any(key in keys for key in QUIT):
+                    break
+                buffer = (buffer + data)[-64:]
+                size = None if self.fixed else self.window_size(buffer)
+                if size is not None:
+                    buffer = b''
+                    self.join(viewer, size)  # Fenster geändert: Kanal wechseln
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.leave(viewer)
+            self.viewers.discard(viewer)
+            if not writer.transport.is_closing():
+                writer.write(LEAVE)
+                writer.close()
+
+    def status(self):
+        """Kurzübersicht für das Server-Log"""
+        sizes = ", ".join(f"{w}x{h}: {len(c.viewers)}" for (w, h), c in self.channels.items())
+        return (f"{len(self.viewers)} Clients, {len(self.channels)} Kanäle ({sizes or '-'}), "
+                f"{self.skipped} Nachzügler-Sprünge")
+
+    async def serve(self, host=None, port=None, unix=None, report=10.0):
+        """Startet TCP- und/oder Unix-Socket-Server und läuft bis zum Abbruch"""
+        servers = []
+        if port is not None:
+            servers.append(await asyncio.start_server(self.handle, host, port))
+        if unix is not None:
+            if os.path.exists(unix):
+                os.unlink(unix)
+            servers.append(await asyncio.start_unix_server(self.handle, unix))
+        for server in servers:
+            for sock in server.sockets:
+                print(f"[SERVE] {sock.getsockname()}")
+        try:
+            while True:
+                await asyncio.sleep(report)
+                print(f"[STAT] {self.status()}")
+        finally:
+            for server in servers:
+                server.close()
+            for channel in list(self.channels.values()):
+                channel.close()
+            for viewer in list(self.viewers):
+                viewer.transport.abort()
+            if unix is not None and os.path.exists(unix):
+                os.unlink(unix)
+
+
+def main():
+    """Main Entry Point"""
+    parser = argparse.ArgumentParser(description="Matrix Rain Server (telnet/nc)")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='Adresse für TCP (Standard: nur lokal; 0.0.0.0 für alle Schnittstellen)')
+    parser.add_argument('--port', type=int, default=2323, help='TCP-Port (0 = kein TCP)')
+    parser.add_argument('--unix', metavar='PATH', help='Zusätzlich auf einem Unix-Socket lauschen')
+    parser.add_argument('--size', default='80x24',
+                        help='Größe für Clients ohne Fenstergröße (z.B. nc)')
+    parser.add_argument('--fixed', action='store_true',
+                        help='Alle Clients mit --size bedienen (ein einziger Kanal)')
+    parser.add_argument('--colors', choices=sorted(PROFILES), default='256',
+                        help='Farbprofil für alle Clients (Standard: 256)')
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split('x'))
+    server = RainServer((width, height), fixed=args.fixed, colors=args.colors)
+    try:
+        asyncio.run(server.serve(args.host, args.port or None, args.unix))
+    except KeyboardInterrupt:
+        print(f"\n[EXIT] {server.status()}")
+
+
+if __name__ == "__main__":
+    main()
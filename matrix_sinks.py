@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Matrix Sinks
+Derselbe Ereignisstrom des Monitors an mehrere Ziele gleichzeitig: Terminal bzw.
+beliebiger Text-Stream, rotierende Log-Datei und Unix-Datagramm-Socket. Jedes
+Ziel hat einen eigenen begrenzten Ringpuffer und einen eigenen Writer-Thread,
+der in Blöcken schreibt; ist ein Ziel langsam oder hängt, verliert nur dieses
+Ereignisse (nach seiner Policy) - Erzeugung und andere Ziele laufen weiter.
+"""
+
+import json
+import os
+import re
+import socket
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+from matrix_output import OutputStats
+
+ANSI = re.compile(r'\033\[[0-9;]*m')
+
+# Voller Puffer: älteste oder neue Ereignisse verwerfen. Der Erzeuger wartet nie -
+# er läuft auf der Event-Loop des Monitors, und ein hängendes Ziel darf weder ihn
+# noch die anderen Ziele bremsen
+POLICIES = ('drop_oldest', 'drop_newest')
+
+
+def plain(text):
+    """Zeile ohne Farbcodes und Einrückung/Aufzählungszeichen"""
+    return ANSI.sub('', text).strip().lstrip('► ')
+
+
+@lru_cache(maxsize=8)
+def whole_seconds(seconds):
+    """Datum und Uhrzeit einer ganzen Sekunde (pro Sekunde nur einmal formatiert)"""
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds))
+
+
+def timestamp(seconds):
+    """ISO-Zeitstempel in UTC im Format von matrix_firehose.py"""
+    whole = int(seconds)
+    return f"{whole_seconds(whole)}.{int((seconds - whole) * 1e6):06d}+00:00"
+
+
+class Sink(OutputStats):
+    """Ein Ziel: Ringpuffer mit Policy und Writer-Thread; written zählt Blöcke,
+    die Latenz ist die Wartezeit des ältesten Ereignisses eines Blocks"""
+
+    def __init__(self, name, capacity=4096, policy='drop_oldest', batch=512,
+                 interval=0.05, window=512):
+        if policy not in POLICIES:
+            raise ValueError(f"Unbekannte Policy: {policy}")
+        super().__init__(window)
+        self.name = name
+        self.capacity = capacity
+        self.policy = policy
+        self.batch = batch        # Höchstens so viele Ereignisse pro Schreibvorgang
+        self.interval = interval  # Mindestabstand zwischen zwei Schreibvorgängen
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.events = 0    # Geschriebene Ereignisse
+        self.bytes = 0
+        self.errors = 0    # Fehlgeschlagene Schreibvorgänge (deren Ereignisse zählen als verworfen)
+        self.reported = 0  # Schon als Lücke gemeldete Verluste
+        self.error = None  # Letzter Fehler, nur zur Anzeige
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(target=self.run, name=f'matrix-sink-{name}', daemon=True)
+        self.thread.start()
+
+    def offer(self, event):
+        """Legt ein Ereignis in den Puffer; False, wenn es verworfen wurde"""
+        with self.condition:
+            queue = self.queue
+            if len(queue) >= self.capacity:
+                self.dropped += 1
+                if self.policy == 'drop_newest':
+                    return False
+                queue.popleft()
+            queue.append(event)
+            if len(queue) == 1:
+                self.condition.notify_all()
+        return True
+
+    def run(self):
+        """Thread: Puffer in Blöcken leeren; Fehler kosten nur den aktuellen Block"""
+        queue, condition = self.queue, self.condition
+        while True:
+            with condition:
+                while not queue and not self.closed:
+                    condition.wait()
+                if not queue:
+                    return
+                if len(queue) <= self.batch:
+                    batch = list(queue)
+                    queue.clear()
+                else:
+                    batch = [queue.popleft() for _ in range(self.batch)]
+            lost = self.dropped - self.reported
+            self.reported += lost
+            try:
+                self.bytes += self.write(batch, lost)
+            except (OSError, ValueError) as e:  # ValueError: Stream geschlossen, Kodierung
+                with condition:
+                    self.errors += 1
+                    self.dropped += len(batch)
+                self.error = e
+            else:
+                self.events += len(batch)
+                self.record(time.time() - batch[0][0])
+            if self.interval and len(batch) < self.batch and not self.closed:
+                # Wenig los: kurz sammeln statt viele kleine Schreibvorgänge
+                with condition:
+                    condition.wait_for(lambda: self.closed, self.interval)
+
+    def write(self, batch, lost):
+        """Schreibt einen Block (lost = seit dem letzten Block verlorene Ereignisse), liefert Bytes"""
+        raise NotImplementedError
+
+    def lines(self, batch, lost):
+        """Block als Textzeilen 'Zeitstempel Operation Text', Lücken markiert"""
+        lines = [f"{timestamp(batch[0][0])} - [{lost} Ereignisse verworfen]\n"] if lost else []
+        lines.extend(f"{timestamp(ts)} {op} {plain(text)}\n" for ts, op, text in batch)
+        return lines
+
+    def stop(self):
+        """Thread endet, sobald der Puffer leer ist"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def release(self):
+        """Gibt Datei/Socket frei (erst nach dem Ende des Threads)"""
+
+    def report(self):
+        """Kennzahlen als dict (für JSON)"""
+        seconds = time.perf_counter() - self.started
+        report = super().report()
+        report.update({
+            'policy': self.policy,
+            'events': self.events,
+            'bytes': self.bytes,
+            'errors': self.errors,
+            'queued': len(self.queue),
+            'events_per_s': round(self.events / seconds, 1) if seconds else None,
+        })
+        if self.error is not None:
+            report['last_error'] = str(self.error)
+        return report
+
+    def hud(self):
+        """Kurzform für eine Statuszeile"""
+        seconds = time.perf_counter() - self.started
+        rate = self.events / seconds if seconds else 0.0
+        text = (f"{self.name}: {self.events} Ereignisse ({rate:.0f}/s), "
+                f"{self.dropped} verworfen, {self.errors} Fehler")
+        return text + f" ({self.error})" if self.error is not None else text
+
+
+class StreamSink(Sink):
+    """Text-Stream (z.B. sys.stdout oder eine Pipe), Zeilen mit Farbcodes"""
+
+    def __init__(self, stream, name='stream', **options):
+        self.stream = stream
+        super().__init__(name, **options)
+
+    def write(self, batch, lost):
+        lines = [f"[{lost} Ereignisse verworfen]\n"] if lost else []
+        lines.extend(text + '\n' for _, _, text in batch)
+        data = ''.join(lines)
+        self.stream.write(data)
+        self.stream.flush()
+        return len(data.encode('utf-8'))
+
+
+class RotatingFileSink(Sink):
+    """Log-Datei ohne Farbcodes; ab max_bytes wird nach path.1 .. path.backups rotiert"""
+
+    def __init__(self, path, max_bytes=10 << 20, backups=3, name='log', **options):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.file = open(path, 'ab')
+        self.size = self.file.tell()
+        super().__init__(name, **options)
+
+    def rotate(self):
+        """path -> path.1 -> ... -> path.backups (älteste fällt weg)"""
+        self.file.close()
+        for i in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.file = open(self.path, 'ab')
+        self.size = 0
+
+    def write(self, batch, lost):
+        data = ''.join(self.lines(batch, lost)).encode('utf-8')
+        if self.size and self.size + len(data) > self.max_bytes:
+            self.rotate()
+        self.file.write(data)
+        self.file.flush()
+        self.size += len(data)
+        return len(data)
+
+    def release(self):
+        self.file.close()
+
+
+class DatagramSink(Sink):
+    """Unix-Datagramm-Socket eines Collectors: JSON-Zeilen, mehrere pro Datagramm"""
+
+    MAX_DATAGRAM = 8192
+    SEND_TIMEOUT = 0.5  # Hängt der Collector länger, geht der Block verloren
+
+    def __init__(self, path, name='socket', **options):
+        self.path = path
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.socket.settimeout(self.SEND_TIMEOUT)
+        super().__init__(name, **options)
+
+    def write(self, batch, lost):
+        records = []
+        if lost:
+            records.append(json.dumps({'ts': timestamp(batch[0][0]), 'op': None,
+                                       'dropped': lost}).encode() + b'\n')
+        records.extend(json.dumps({'ts': timestamp(ts), 'op': op, 'text': plain(text)},
+                                  ensure_ascii=False).encode() + b'\n'
+                       for ts, op, text in batch)
+        # Ganze Zeilen zu Datagrammen bis MAX_DATAGRAM zusammenfassen
+        sent = 0
+        datagram = b''
+        for record in records:
+            if datagram and len(datagram) + len(record) > self.MAX_DATAGRAM:
+                sent += self.socket.sendto(datagram, self.path)
+                datagram = b''
+            datagram += record
+        if datagram:
+            sent += self.socket.sendto(datagram, self.path)
+        return sent
+
+    def release(self):
+        self.socket.close()
+
+
+class EventPipeline:
+    """Verteilt Ereignisse (Zeit, Operation, Text) an alle Ziele, ohne zu blockieren"""
+
+    def __init__(self, sinks=()):
+        self.sinks = list(sinks)
+        self.published = 0
+
+    def add(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    def publish(self, op, text):
+        """Ein Ereignis an alle Ziele; jedes entscheidet nach seiner Policy"""
+        event = (time.time(), op, text)
+        for sink in self.sinks:
+            sink.offer(event)
+        self.published += 1
+
+    def close(self, timeout=2.0):
+        """Leert alle Puffer; hängende Ziele werden nach timeout aufgegeben"""
+        for sink in self.sinks:
+            sink.stop()
+        deadline = time.monotonic() + timeout
+        for sink in self.sinks:
+            sink.thread.join(max(0.0, deadline - time.monotonic()))
+            if not sink.thread.is_alive():
+                sink.release()  # Ein hängender Thread behält seinen Deskriptor
+
+    def stats(self):
+        """Kennzahlen aller Ziele als dict"""
+        return {'published': self.published,
+                'sinks': {sink.name: sink.report() for sink in self.sinks}}
+
+    def hud(self):
+        """Eine Zeile pro Ziel"""
+        return [sink.hud() for sink in self.sinks]
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Matrix Wall
+Ein großes virtuelles Rain-Canvas, in Spalten-Kacheln von mehreren Prozessen
+simuliert (gemeinsamer Speicher) und auf mehrere Terminals/PTYs verteilt
+"""
+
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+from array import array
+from multiprocessing import Barrier, Process, RawArray
+
+import matrix_random
+from matrix_engine import FrameScheduler
+from matrix_rain_win import Colors, MatrixRain
+
+
+def split(total, parts):
+    """Teilt total Spalten in parts möglichst gleich breite Bereiche: [(links, Breite)]"""
+    base, extra = divmod(total, parts)
+    ranges, left = [], 0
+    for i in range(parts):
+        width = base + (1 if i < extra else 0)
+        ranges.append((left, width))
+        left += width
+    return ranges
+
+
+class SharedCanvas:
+    """Frame-Puffer und Frame-Deltas aller Kacheln im gemeinsamen Speicher (RawArray)
+
+    Pro Kachel liegen Glyph- und Farbebene zusammenhängend (zeilenweise, Kachelbreite).
+    Deltas sind doppelt gepuffert: Frame k liegt in Slot k % 2, während Frame k + 1
+    geschrieben wird, lesen die Ausgaben noch Frame k.
+    """
+
+    def __init__(self, width, height, tiles):
+        self.width = width
+        self.height = height
+        self.tiles = split(width, tiles)
+        self.plane_offsets = []
+        self.delta_offsets = []
+        planes = deltas = 0
+        for _, tile_width in self.tiles:
+            cells = tile_width * height
+            self.plane_offsets.append(planes)
+            self.delta_offsets.append(deltas)
+            planes += 2 * cells
+            deltas += 2 * (4 + 6 * cells)  # Anzahl, Positionen (u32), Glyphen, Farben
+        # RawArray statt multiprocessing.shared_memory: ohne Locks, ab Python 3.6
+        self.plane_memory = RawArray('B', planes)
+        self.delta_memory = RawArray('B', deltas)
+        self.views = None
+
+    def attach(self):
+        """Erzeugt die Speicher-Sichten im jeweiligen Prozess"""
+        if self.views is None:
+            self.views = (memoryview(self.plane_memory).cast('B'),
+                          memoryview(self.delta_memory).cast('B'))
+        return self.views
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['views'] = None  # memoryviews sind nicht übertragbar
+        return state
+
+    def planes(self, tile):
+        """(Glyphen, Farben) einer Kachel als beschreibbare Sichten"""
+        planes, _ = self.attach()
+        offset = self.plane_offsets[tile]
+        cells = self.tiles[tile][1] * self.height
+        return planes[offset:offset + cells], planes[offset + cells:offset + 2 * cells]
+
+    def slot(self, tile, k):
+        """Offset und Zellkapazität des Delta-Slots für Frame k"""
+        cells = self.tiles[tile][1] * self.height
+        return self.delta_offsets[tile] + (k % 2) * (4 + 6 * cells), cells
+
+    def write_delta(self, tile, k, changes):
+        """Legt die Änderungen (y, x, code, color) von Frame k ab"""
+        _, deltas = self.attach()
+        offset, cells = self.slot(tile, k)
+        width = self.tiles[tile][1]
+        n = len(changes)
+        deltas[offset:offset + 4] = array('I', [n]).tobytes()
+        offset += 4
+        deltas[offset:offset + 4 * n] = array('I', [y * width + x for y, x, _, _ in changes]).tobytes()
+        offset += 4 * cells
+        deltas[offset:offset + n] = bytes([c[2] for c in changes])
+        deltas[offset + cells:offset + cells + n] = bytes([c[3] for c in changes])
+
+    def read_delta(self, tile, k):
+        """(Positionen, Glyphen, Farben) von Frame k einer Kachel"""
+        _, deltas = self.attach()
+        offset, cells = self.slot(tile, k)
+        header = array('I')
+        header.frombytes(deltas[offset:offset + 4])
+        n = header[0]
+        offset += 4
+        positions = array('I')
+        positions.frombytes(deltas[offset:offset + 4 * n])
+        offset += 4 * cells
+        return positions, deltas[offset:offset + n], deltas[offset + cells:offset + cells + n]
+
+
+class TileRain(MatrixRain):
+    """Simuliert eine Kachel; der vordere Frame-Puffer liegt im gemeinsamen Speicher"""
+
+    def __init__(self, canvas, tile):
+        self.canvas = canvas
+        self.tile = tile
+        super().__init__()
+
+    def setup_terminal(self):
+        self.width = self.canvas.tiles[self.tile][1]
+        self.height = self.canvas.height
+
+    def reset_frame(self):
+        super().reset_frame()
+        self.frame.front_glyph, self.frame.front_color = self.canvas.planes(self.tile)
+
+
+class TileOutput(MatrixRain):
+    """Gibt einen Spaltenbereich des Canvas auf einem Terminal aus"""
+
+    def __init__(self, canvas, path, left, width):
+        self.canvas = canvas
+        self.path = path
+        self.left = left
+        self.columns = width
+        self.stream = open(path, 'w', encoding='utf-8') if path != '-' else sys.stdout
+        super().__init__()
+        # Kacheln, die diesen Bereich überdecken: (Kachel, links, Breite)
+        self.sources = [(tile, tile_left, tile_width)
+                        for tile, (tile_left, tile_width) in enumerate(canvas.tiles)
+                        if tile_left < left + width and tile_left + tile_width > left]
+
+    def setup_terminal(self):
+        self.width, self.height = self.columns, self.canvas.height
+        try:
+            size = os.get_terminal_size(self.stream.fileno())
+        except OSError:
+            return  # Datei oder Pipe: nicht zuschneiden
+        if size.columns and size.lines:  # Neue PTYs melden 0x0
+            self.width = min(self.columns, size.columns)
+            self.height = min(self.canvas.height, size.lines)
+
+    def init_drops(self):
+        """Keine Simulation - die Zellen kommen aus dem gemeinsamen Speicher"""
+        self.field = None
+
+    def reset_frame(self):
+        self.set_glyphs(tuple(' ' + ''.join(self.CHARS)))
+        self.status_drawn = True  # Keine Statuszeile auf der Wand
+
+    def write(self, text):
+        self.stream.write(text)
+        self.stream.flush()
+
+    def clip(self, changes):
+        """Nur Zellen innerhalb des Terminals"""
+        width, height = self.width, self.height
+        return [change for change in changes if change[1] < width and change[0] < height]
+
+    def redraw(self):
+        """Zeichnet den kompletten Bereich aus den Frame-Ebenen"""
+        self.write('\033[?25l\033[2J')
+        changes = []
+        for tile, tile_left, tile_width in self.sources:
+            glyph, color = self.canvas.planes(tile)
+            shift = tile_left - self.left
+            for i, g in enumerate(glyph):
+                if g:
+                    changes.append((i // tile_width, i % tile_width + shift, g, color[i]))
+        self.render(self.clip([c for c in changes if 0 <= c[1]]))
+
+    def draw(self, k):
+        """Zeichnet die Deltas von Frame k aller überdeckenden Kacheln"""
+        changes = []
+        right = self.width
+        for tile, tile_left, tile_width in self.sources:
+            positions, glyphs, colors = self.canvas.read_delta(tile, k)
+            shift = tile_left - self.left
+            for p, g, c in zip(positions, glyphs, colors):
+                y, x = divmod(p, tile_width)
+                x += shift
+                if 0 <= x < right:
+                    changes.append((y, x, g, c))
+        if self.height < self.canvas.height:
+            changes = [c for c in changes if c[0] < self.height]
+        self.render(changes)
+
+    def close(self):
+        self.write(f'{Colors.NC}\033[2J\033[H\033[?25h')
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+
+def simulate(canvas, tiles, barrier, ticks, seed):
+    """Simulations-Prozess: steppt seine Kacheln, legt Deltas im Slot k % 2 ab"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Beenden steuert der Hauptprozess
+    matrix_random.seed(None if seed is None else seed * 1000 + tiles[0])
+    rains = [TileRain(canvas, tile) for tile in tiles]
+    k = 0
+    try:
+        while True:
+            barrier.wait()
+            if ticks[k % 2] < 0:
+                break
+            for _ in range(ticks[k % 2]):
+                for rain in rains:
+                    rain.update_drops()
+            for rain in rains:
+                changes = rain.frame.update(rain.field, rain.field.take_dirty())
+                canvas.write_delta(rain.tile, k, changes)
+            k += 1
+    except threading.BrokenBarrierError:
+        pass
+
+
+def output(canvas, targets, barrier, ticks):
+    """Ausgabe-Prozess: zeichnet Frame k - 1, während Frame k simuliert wird"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    outputs = [TileOutput(canvas, path, left, width) for path, left, width in targets]
+    for out in outputs:
+        out.redraw()
+    k = -1
+    try:
+        while True:
+            barrier.wait()
+            if k >= 0:
+                for out in outputs:
+                    out.draw(k)
+            k += 1
+            if ticks[k % 2] < 0:
+                break
+    except threading.BrokenBarrierError:
+        pass
+    finally:
+        for out in outputs:
+            out.close()
+
+
+class MatrixWall:
+    """Startet Simulations- und Ausgabeprozesse und gibt den Takt vor"""
+
+    FRAME_TIMEOUT = 10.0  # Sekunden; länger hängt nur ein abgestürzter Prozess
+
+    def __init__(self, width, height, terminals, workers=None, outputs=None,
+                 tick_rate=MatrixRain.TICK_RATE, render_rate=MatrixRain.RENDER_RATE, seed=None):
+        workers = max(1, min(workers or os.cpu_count() or 1, width))
+        self.canvas = SharedCanvas(width, height, workers)
+        # Ausgabe-Bereiche: je Terminal gleich breit oder gemäß (Pfad, Breite)
+        widths = [w for _, w in terminals]
+        if None in widths:
+            widths = [w for _, w in split(width, len(terminals))]
+        targets, left = [], 0
+        for (path, _), target_width in zip(terminals, widths):
+            targets.append((path, left, target_width))
+            left += target_width
+        outputs = max(1, min(outputs or len(targets), len(targets)))
+
+        self.tick_rate = tick_rate
+        self.render_rate = render_rate
+        # Ticks pro Frame (-1 = Ende), doppelt gepuffert wie die Deltas
+        self.ticks = RawArray('i', 2)
+        self.barrier = Barrier(workers + outputs + 1)
+        self.processes = [Process(target=simulate, daemon=True,
+                                  args=(self.canvas, tiles, self.barrier, self.ticks, seed))
+                          for tiles in self.assign(range(workers), workers)]
+        self.processes += [Process(target=output, daemon=True,
+                                   args=(self.canvas, group, self.barrier, self.ticks))
+                           for group in self.assign(targets, outputs)]
+        self.frames = 0
+
+    @staticmethod
+    def assign(items, n):
+        """Verteilt items reihum auf n Gruppen"""
+        items = list(items)
+        return [items[i::n] for i in range(n)]
+
+    def run(self, duration=None, paced=True):
+        """Taktgeber: setzt die Ticks für Frame k und gibt ihn per Barriere frei"""
+        for process in self.processes:
+            process.start()
+        scheduler = FrameScheduler(self.tick_rate, self.render_rate)
+        end = time.perf_counter() + duration if duration else None
+        try:
+            while end is None or time.perf_counter() < end:
+                self.ticks[self.frames % 2] = scheduler.wait() if paced else 1
+                self.barrier.wait(self.FRAME_TIMEOUT)
+                self.frames += 1
+            # Reguläres Ende: Ausgaben zeichnen noch den letzten Frame, dann beenden sich alle
+            self.ticks[self.frames % 2] = -1
+            self.barrier.wait(self.FRAME_TIMEOUT)
+        except (KeyboardInterrupt, threading.BrokenBarrierError):
+            # Abbruch: wartende Prozesse per BrokenBarrierError freigeben
+            self.barrier.abort()
+        finally:
+            for process in self.processes:
+                process.join(2)
+                if process.is_alive():
+                    process.terminate()
+
+
+def parse_terminal(text):
+    """'/dev/pts/3' oder '/dev/pts/3:160' (Pfad, Spalten oder None)"""
+    path, _, width = text.rpartition(':')
+    if path and width.isdigit():
+        return path, int(width)
+    return text, None
+
+
+def main():
+    """Main Entry Point"""
+    parser = argparse.ArgumentParser(description="Matrix Wall")
+    parser.add_argument('--size', default='2000x600', help='Canvas-Größe in Zellen, z.B. 2000x600')
+    parser.add_argument('--tty', action='append', type=parse_terminal, metavar='PFAD[:SPALTEN]',
+                        help='Terminal/PTY für den nächsten Spaltenbereich (mehrfach, - = stdout)')
+    parser.add_argument('--workers', type=int, help='Simulationsprozesse (Standard: CPU-Anzahl)')
+    parser.add_argument('--outputs', type=int, help='Ausgabeprozesse (Standard: einer pro Terminal)')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--benchmark', type=float, metavar='SEKUNDEN',
+                        help='Ohne Takt und ohne Terminal laufen lassen, Frames/s ausgeben')
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split('x'))
+    terminals = args.tty or [('-', None)]
+    if args.benchmark:
+        terminals = [(os.devnull, None)] * (len(args.tty) if args.tty else 1)
+
+    wall = MatrixWall(width, height, terminals, workers=args.workers, outputs=args.outputs,
+                      seed=args.seed)
+    start = time.perf_counter()
+    wall.run(duration=args.benchmark, paced=not args.benchmark)
+    if args.benchmark:
+        elapsed = time.perf_counter() - start
+        fps = wall.frames / elapsed
+        print(f"{width}x{height}, {len(wall.processes)} Prozesse: {fps:.1f} Frames/s, "
+              f"{fps * width * height / 1e6:.1f} Mio. Zellen/s")
+
+
+if __name__ == "__main__":
+    main()